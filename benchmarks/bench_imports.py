@@ -0,0 +1,107 @@
+"""
+Import-time budget for the compute core.
+
+Each module is imported in a fresh interpreter, after pandas / numpy
+(which every caller pays for anyway), and must stay under the budget
+without pulling in any UI or lazily-loaded heavy library.
+
+Run from the project root:
+    python -m benchmarks.bench_imports
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+COMPUTE_MODULES = [
+    "utils.fuel_registry",
+    "utils.canonical",
+    "utils.range_index",
+    "utils.cii_utils",
+    "utils.cii_scenarios",
+    "utils.scc_utils",
+    "utils.operations",
+    "utils.port_master",
+    "utils.unlocode_utils",
+    "utils.leg_utils",
+    "utils.ingest_cache",
+    "utils.data_loader",
+    "utils.result_cache",
+    "utils.fleet_batch",
+    "utils.monthly_report",
+    "utils.eua_utils",
+    "utils.fueleu_utils",
+    "utils.fueleu_pooling",
+    "utils.validation",
+    "utils.profiling",
+    "utils.background",
+]
+
+# Must not be imported as a side effect of the compute core
+# (pandas itself may already have loaded pyarrow; only new imports count)
+FORBIDDEN = ["streamlit", "matplotlib", "pyarrow", "openpyxl"]
+
+# Seconds on top of pandas + numpy
+BUDGET_S = 0.10
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import numpy, pandas
+t1 = time.perf_counter()
+before = set(sys.modules)
+import {module}
+t2 = time.perf_counter()
+print(json.dumps({{
+    "base_s": t1 - t0,
+    "import_s": t2 - t1,
+    "loaded": sorted(m for m in {forbidden!r} if m in sys.modules and m not in before),
+}}))
+"""
+
+
+def probe(module, repeat=3):
+    """Best of `repeat` cold imports of module."""
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, forbidden=FORBIDDEN)],
+            capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(out.stdout))
+    best = min(runs, key=lambda r: r["import_s"])
+    return {"module": module, **best}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget", type=float, default=BUDGET_S)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write results to this path")
+    args = parser.parse_args(argv)
+
+    results = [probe(m, args.repeat) for m in COMPUTE_MODULES]
+    failed = 0
+
+    print(f"{'module':<24}{'import ms':>10}  status")
+    for r in results:
+        problems = []
+        if r["import_s"] > args.budget:
+            problems.append(f"over {args.budget * 1000:.0f} ms")
+        if r["loaded"]:
+            problems.append("loads " + ", ".join(r["loaded"]))
+        r["ok"] = not problems
+        failed += bool(problems)
+        print(f"{r['module']:<24}{r['import_s'] * 1000:>10.1f}  {'; '.join(problems) or 'ok'}")
+
+    print(f"\npandas + numpy baseline: {min(r['base_s'] for r in results) * 1000:.0f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"budget_s": args.budget, "results": results}, f, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+"""
+Benchmark for the vectorized
+cii_utils.classify_operation_by_events_in_range against the previous
+row-by-row implementation. Parity is asserted in tests/test_operations.py.
+
+Run from the project root:
+    python -m benchmarks.bench_operations --rows 1000000
+"""
+import argparse
+import time
+from datetime import date, datetime, time as dtime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_log_abstract
+from utils.cii_utils import classify_operation_by_events_in_range
+
+# Spellings and events real exports contain besides the generator's
+ODD_EVENTS = [" Noon (Sea) ", "IDLE IN PORT", "LOADING", "Bunkering", None]
+
+FUEL_COLS = [
+    "MEConsumptionHFO", "AEConsumptionHFO", "BoilerConsumptionHFO",
+    "MEConsumptionMGO", "AEConsumptionMGO", "BoilerConsumptionMGO",
+]
+
+
+# --------------------------------------------------
+# SYNTHETIC FRAME
+# --------------------------------------------------
+def make_frame(rows, seed=0):
+    # 15-minute reports with a few consumption gaps, as seen in real exports
+    df = make_log_abstract(rows, freq_hours=0.25, seed=seed, gaps=0.01)
+
+    rng = np.random.default_rng(seed)
+    odd = rng.choice(rows, rows // 20, replace=False)
+    df.loc[odd, "EventType"] = rng.choice(np.array(ODD_EVENTS, dtype=object), len(odd))
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+# --------------------------------------------------
+# REFERENCE (previous row-by-row implementation)
+# --------------------------------------------------
+def classify_operation_by_events_loop(df, date_from, date_to):
+    df = df.copy()
+
+    for c in FUEL_COLS:
+        df[c] = pd.to_numeric(df.get(c, 0), errors="coerce").fillna(0)
+
+    df["DateTimeInUTC"] = pd.to_datetime(df["DateTimeInUTC"], errors="coerce")
+    df = df.sort_values("DateTimeInUTC").reset_index(drop=True)
+
+    start_dt = datetime.combine(pd.to_datetime(date_from).date(), dtime.min)
+    end_dt = datetime.combine(pd.to_datetime(date_to).date(), dtime.max)
+    mask = (df["DateTimeInUTC"] >= start_dt) & (df["DateTimeInUTC"] <= end_dt)
+    filtered = df.loc[mask].reset_index(drop=True)
+
+    if filtered.empty:
+        return {k:0 for k in ["Sea Hours","Port Hours","Drifting Hours","Sea HFO","Port HFO","Drifting HFO","Sea MGO","Port MGO","Drifting MGO"]}
+
+    SEA = {"Arrival", "Departure", "BOSP", "Noon (Sea)"}
+    PORT = {"Shifting to Berth", "Idle In Port", "IDLE IN PORT", "Discharging", "Loading", "LOADING"}
+    DRIFT = {"Drifting", "Awaiting Orders", "Stopping Engine"}
+
+    sea_h = port_h = drift_h = 0
+    sea_hfo = port_hfo = drift_hfo = 0
+    sea_mgo = port_mgo = drift_mgo = 0
+
+    for _, row in filtered.iterrows():
+        interval = row["TimeSincePreviousReport"]
+        row_hfo = row["MEConsumptionHFO"] + row["AEConsumptionHFO"] + row["BoilerConsumptionHFO"]
+        row_mgo = row["MEConsumptionMGO"] + row["AEConsumptionMGO"] + row["BoilerConsumptionMGO"]
+
+        event = str(row["EventType"]).strip()
+        if event in SEA:
+            sea_h += interval
+            sea_hfo += row_hfo
+            sea_mgo += row_mgo
+        elif event in PORT:
+            port_h += interval
+            port_hfo += row_hfo
+            port_mgo += row_mgo
+        elif event in DRIFT:
+            drift_h += interval
+            drift_hfo += row_hfo
+            drift_mgo += row_mgo
+
+    return {
+        "Sea Hours": round(sea_h, 2),
+        "Sea HFO": round(sea_hfo, 3),
+        "Sea MGO": round(sea_mgo, 3),
+        "Port Hours": round(port_h, 2),
+        "Port HFO": round(port_hfo, 3),
+        "Port MGO": round(port_mgo, 3),
+        "Drifting Hours": round(drift_h, 2),
+        "Drifting HFO": round(drift_hfo, 3),
+        "Drifting MGO": round(drift_mgo, 3),
+    }
+
+
+# --------------------------------------------------
+# TIMING
+# --------------------------------------------------
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--legacy-rows", type=int, default=50_000,
+                        help="rows used for the loop timing")
+    args = parser.parse_args()
+
+    date_from, date_to = date(2023, 1, 1), date(2060, 12, 31)
+
+    # ---------------- Timing ----------------
+    small = make_frame(args.legacy_rows)
+    loop_s = timed(classify_operation_by_events_loop, small, date_from, date_to, repeat=1)
+    small_s = timed(classify_operation_by_events_in_range, small, date_from, date_to)
+    print(f"loop       {args.legacy_rows:>10,} rows  {loop_s:8.3f} s")
+    print(f"vectorized {args.legacy_rows:>10,} rows  {small_s:8.3f} s  ({loop_s / small_s:,.0f}x)")
+
+    big = make_frame(args.rows)
+    big_s = timed(classify_operation_by_events_in_range, big, date_from, date_to)
+    print(f"vectorized {args.rows:>10,} rows  {big_s:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark suite for the utils hot paths on synthetic LogAbstract data.
+
+Each case is timed at every size (best of --repeat runs) and the
+results are written as JSON, so two runs can be compared with
+--compare. load_excel is timed cold (empty ingest cache) and warm;
+.xlsx sources above --xlsx-max-rows are skipped because writing them
+dominates the run.
+
+Run from the project root:
+    python -m benchmarks.bench_suite --sizes 10000 100000 1000000 --json bench.json
+    python -m benchmarks.bench_suite --compare bench.json --json bench_new.json
+"""
+import argparse
+import json
+import platform
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_log_abstract, write_source
+from utils import cii_utils, ingest_cache, operations
+from utils.canonical import normalize_log_abstract
+from utils.cii_utils import calculate_cii
+from utils.data_loader import load_excel
+from utils.leg_utils import assign_legs, summarize_voyages
+from utils.scc_utils import calculate_scc_intensity
+from utils.unlocode_utils import map_ports
+
+SIZES = [10_000, 100_000, 1_000_000]
+FORMATS = ["xlsx", "csv", "parquet"]
+XLSX_MAX_ROWS = 100_000
+
+SHIP_TYPE = "Bulk Carrier"
+DWT = 50_000
+CARGO_MT = 30_000
+
+
+# --------------------------------------------------
+# CASES
+# --------------------------------------------------
+def compute_cases(df):
+    """name -> zero-argument callable over the canonical frame df."""
+    date_from = df["DateUTC"].min().date()
+    date_to = df["DateUTC"].max().date()
+    legged = assign_legs(df)
+
+    return {
+        "calculate_cii": lambda: calculate_cii(df, SHIP_TYPE, date_from, date_to, dwt=DWT),
+        "classify_events (cii_utils)": lambda: cii_utils.classify_operation_by_events_in_range(df, date_from, date_to),
+        "classify_elapsed (operations)": lambda: operations.classify_operation_by_events_in_range(df, date_from, date_to),
+        "assign_legs": lambda: assign_legs(df),
+        "summarize_voyages": lambda: summarize_voyages(legged),
+        "map_ports": lambda: map_ports(df),
+        "calculate_scc_intensity": lambda: calculate_scc_intensity(df, SHIP_TYPE, date_from, date_to, CARGO_MT),
+    }
+
+
+def load_cases(raw, workdir, xlsx_max_rows):
+    """name -> callable for load_excel per source format, cold and warm."""
+    cases = {}
+    for fmt in FORMATS:
+        if fmt == "xlsx" and len(raw) > xlsx_max_rows:
+            continue
+        path = write_source(raw, Path(workdir) / f"logabstract_{len(raw)}.{fmt}")
+
+        def load(path=path):
+            with open(path, "rb") as f:
+                return load_excel(f, "LogAbstract")
+
+        def cold(load=load):
+            ingest_cache.clear_cache()
+            return load()
+
+        cases[f"load_excel [{fmt}, cold]"] = cold
+        if fmt != "parquet":                                                 # parquet bypasses the cache
+            cases[f"load_excel [{fmt}, warm]"] = load
+    return cases
+
+
+def timed(fn, repeat):
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return runs
+
+
+# --------------------------------------------------
+# RUN / REPORT
+# --------------------------------------------------
+def run(sizes, repeat, cases=None, xlsx_max_rows=XLSX_MAX_ROWS, seed=0):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # Keep the user's ingest cache out of the measurements
+        ingest_cache.CACHE_DIR = Path(workdir) / "ingest"
+
+        for rows in sizes:
+            raw = make_log_abstract(rows, years=2, seed=seed)
+            df = normalize_log_abstract(raw)
+
+            suite = {**load_cases(raw, workdir, xlsx_max_rows), **compute_cases(df)}
+            for name, fn in suite.items():
+                if cases and not any(c in name for c in cases):
+                    continue
+                if "warm" in name:
+                    fn()                                                     # prime the cache
+                runs = timed(fn, repeat)
+                best = min(runs)
+                results.append({
+                    "case": name,
+                    "rows": rows,
+                    "best_s": best,
+                    "mean_s": float(np.mean(runs)),
+                    "repeat": repeat,
+                    "rows_per_s": rows / best if best else None,
+                })
+                print(f"{name:<32}{rows:>12,}{best * 1000:>12.1f} ms")
+    return results
+
+
+def metadata():
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["case"], r["rows"]): r["best_s"] for r in json.load(f)["results"]}
+
+    print(f"\n{'case':<32}{'rows':>12}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for r in results:
+        before = baseline.get((r["case"], r["rows"]))
+        if before is None:
+            continue
+        print(
+            f"{r['case']:<32}{r['rows']:>12,}{before * 1000:>12.1f}"
+            f"{r['best_s'] * 1000:>12.1f}{before / r['best_s']:>9.2f}x"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cases", nargs="+", help="only cases whose name contains one of these")
+    parser.add_argument("--xlsx-max-rows", type=int, default=XLSX_MAX_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this path")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<32}{'rows':>12}{'best':>12}")
+    results = run(args.sizes, args.repeat, args.cases, args.xlsx_max_rows, args.seed)
+
+    if args.compare:
+        compare(results, args.compare)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"meta": {**metadata(), "seed": args.seed}, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
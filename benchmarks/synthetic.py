@@ -0,0 +1,181 @@
+"""
+Deterministic synthetic LogAbstract exports.
+
+Each vessel runs voyage cycles (Departure, sea reports, Arrival, port
+reports) at a fixed report frequency. Every cycle sails to a new port,
+so VoyageNumber / VoyageFrom / VoyageTo chain the way real exports do.
+The same arguments and seed always give the same frame.
+
+Run from the project root to write a file:
+    python -m benchmarks.synthetic --rows 100000 --out logabstract.parquet
+"""
+import argparse
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# UN/LOCODEs known to unlocode_utils plus EU / EEA ports for ETS scopes
+PORTS = [
+    "SGSIN", "CNSHA", "NLRTM", "AEJEA", "INNSA", "INMUN", "USLAX", "USNYC",
+    "DEHAM", "BEANR", "ESALG", "GRPIR", "NOOSL", "FRLEH", "ITGOA",
+]
+
+SEA_EVENTS = ["Noon (Sea)", "BOSP", "Drifting", "Awaiting Orders", "Stopping Engine"]
+SEA_WEIGHTS = [0.86, 0.04, 0.04, 0.04, 0.02]
+
+PORT_EVENTS = ["Idle In Port", "Loading", "Discharging", "Shifting to Berth"]
+PORT_WEIGHTS = [0.4, 0.25, 0.25, 0.1]
+
+CONSUMERS = ["ME", "AE", "Boiler"]
+
+# Row kinds within a cycle
+DEP, SEA, ARR, PORT = 0, 1, 2, 3
+
+# Sea leg / port stay length in days
+SEA_DAYS = (2, 18)
+PORT_DAYS = (1, 5)
+
+# Daily consumption in tonnes by consumer: (at sea, in port)
+DAILY_FUEL = {"ME": (32.0, 0.0), "AE": (3.0, 3.5), "Boiler": (0.4, 1.2)}
+
+
+def _vessel(rng, n, freq_hours):
+    """Row kinds, event types, cycle numbers and per-cycle ports for one vessel."""
+    per_day = 24 / freq_hours
+    mean_cycle = 2 + per_day * (sum(SEA_DAYS) + sum(PORT_DAYS)) / 2
+    cycles = int(n / mean_cycle * 1.5) + 4
+
+    sea = np.maximum(1, (rng.uniform(*SEA_DAYS, cycles) * per_day).astype(int))
+    port = np.maximum(1, (rng.uniform(*PORT_DAYS, cycles) * per_day).astype(int))
+    lengths = np.column_stack([np.ones(cycles, int), sea, np.ones(cycles, int), port]).ravel()
+    kinds = np.tile([DEP, SEA, ARR, PORT], cycles)
+
+    # Cycles are drawn with margin; extend in the rare case they fall short
+    while lengths.sum() < n:
+        lengths = np.concatenate([lengths, lengths])
+        kinds = np.concatenate([kinds, kinds])
+
+    kind = np.repeat(kinds, lengths)[:n]
+    cycle = np.repeat(np.arange(len(lengths)) // 4, lengths)[:n]
+
+    events = np.empty(n, dtype=object)
+    events[kind == DEP] = "Departure"
+    events[kind == ARR] = "Arrival"
+    at_sea, in_port = kind == SEA, kind == PORT
+    events[at_sea] = rng.choice(SEA_EVENTS, at_sea.sum(), p=SEA_WEIGHTS)
+    events[in_port] = rng.choice(PORT_EVENTS, in_port.sum(), p=PORT_WEIGHTS)
+
+    # Next port always differs from the current one
+    n_cycles = cycle.max() + 2
+    steps = rng.integers(1, len(PORTS), n_cycles)
+    port_idx = (rng.integers(len(PORTS)) + np.cumsum(steps)) % len(PORTS)
+    return kind, events, cycle, port_idx
+
+
+def make_log_abstract(rows=None, vessels=1, years=1.0, freq_hours=6.0,
+                      start="2023-01-01", seed=0, gaps=0.0):
+    """
+    Synthetic LogAbstract frame, vessel by vessel in time order.
+
+    rows: total rows; when given, enough vessels of `years` length are
+    generated and the result is cut to exactly rows.
+    gaps: share of reports with a missing MEConsumptionHFO cell.
+    """
+    per_vessel = max(1, int(years * 365 * 24 / freq_hours))
+    if rows is not None:
+        vessels = max(1, math.ceil(rows / per_vessel))
+
+    rng = np.random.default_rng(seed)
+    step = pd.Timedelta(hours=freq_hours)
+    frames = []
+
+    for v in range(vessels):
+        n = per_vessel if rows is None else min(per_vessel, rows - v * per_vessel)
+        kind, events, cycle, port_idx = _vessel(rng, n, freq_hours)
+
+        at_sea = kind != PORT
+        drifting = np.isin(events, ["Drifting", "Awaiting Orders", "Stopping Engine"])
+        sailing = at_sea & ~drifting
+        hours = np.full(n, freq_hours)
+        days = hours / 24
+
+        speed = np.where(sailing, rng.normal(12.5, 1.5, n).clip(6, 18), np.where(drifting, 0.5, 0.0))
+        speed = np.where((kind == DEP) | (kind == ARR), speed / 2, speed)
+
+        ts = pd.date_range(start, periods=n, freq=step)
+        dwt = rng.uniform(30_000, 80_000)
+        laden = (cycle % 2 == 0)
+
+        frame = {
+            "IMO": np.full(n, 9_000_000 + v),
+            "VesselName": np.full(n, f"SYNTH {v + 1:03d}", dtype=object),
+            "DateUTC": ts.normalize(),
+            "DateTimeInUTC": ts,
+            "EventType": events,
+            "VoyageNumber": np.char.add(f"V{v + 1:03d}-", (cycle + 1).astype(str)).astype(object),
+            "VoyageFrom": np.array(PORTS, dtype=object)[port_idx[cycle]],
+            "VoyageTo": np.array(PORTS, dtype=object)[port_idx[cycle + 1]],
+            "TimeSincePreviousReport": hours,
+            "TimeElapsedSailing": np.where(sailing, hours, 0.0),
+            "TimeElapsedDrifting": np.where(drifting, hours, 0.0),
+            "TimeElapsedLoadingUnloading": np.where(np.isin(events, ["Loading", "Discharging"]), hours, 0.0),
+            "TimeElapsedWaiting": np.where(events == "Idle In Port", hours, 0.0),
+            "TimeElapsedAnchoring": np.where(events == "Shifting to Berth", hours, 0.0),
+            "Distance": (speed * hours).round(1),
+            "DraftDisplacementActual": np.where(laden, dwt * 1.25, dwt * 0.55).round(0),
+        }
+
+        # Low-sulphur share per vessel; ME burn scales with speed cubed
+        mgo_share = rng.uniform(0.05, 0.25)
+        load = np.where(sailing, (speed / 12.5) ** 3, np.where(drifting, 0.05, 0.0))
+        for consumer in CONSUMERS:
+            sea_rate, port_rate = DAILY_FUEL[consumer]
+            rate = np.where(at_sea, sea_rate, port_rate)
+            if consumer == "ME":
+                rate = sea_rate * load
+            burn = rate * days * rng.uniform(0.9, 1.1, n)
+            frame[f"{consumer}ConsumptionHFO"] = (burn * (1 - mgo_share)).round(3)
+            frame[f"{consumer}ConsumptionMGO"] = (burn * mgo_share).round(3)
+
+        frames.append(pd.DataFrame(frame))
+
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    if gaps:
+        holes = rng.choice(len(df), int(len(df) * gaps), replace=False)
+        df.loc[holes, "MEConsumptionHFO"] = np.nan
+    return df
+
+
+def write_source(df, path, sheet="LogAbstract"):
+    """Writes df as .xlsx (sheet), .csv or .parquet, by suffix."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        df.to_csv(path, index=False)
+    elif suffix in (".parquet", ".pq"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_excel(path, sheet_name=sheet, index=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int)
+    parser.add_argument("--vessels", type=int, default=1)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--freq-hours", type=float, default=6.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help=".xlsx, .csv or .parquet")
+    args = parser.parse_args(argv)
+
+    df = make_log_abstract(args.rows, args.vessels, args.years, args.freq_hours, seed=args.seed)
+    write_source(df, args.out)
+    print(f"{len(df):,} rows, {df['IMO'].nunique()} vessels -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
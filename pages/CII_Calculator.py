@@ -1,9 +1,32 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 
-from utils.cii_utils import calculate_cii, classify_operation_by_events_in_range
+from utils.cii_utils import (
+    calculate_cii,
+    classify_operation_by_events_in_range,
+    running_cii_series,
+    RATING_BOUNDARIES,
+    CII_COLUMNS,
+    CII_OPERATIONS_COLUMNS,
+)
+from utils.background import submit, supersede
+from utils.charts import downsample, pie_chart, points_for, render
+from utils.cii_scenarios import (
+    DEFAULT_YEARS,
+    period_baseline,
+    scenario_grid,
+    scenario_heatmap,
+)
 from utils.data_loader import load_excel
+from utils.profiling import begin_page, show_panel
+from utils.range_index import build_range_index
+from utils.result_cache import (
+    cached_result,
+    result_cache_stats,
+    result_key,
+    upload_digest,
+)
+from utils.validation import exclude_rows, validate_reports, VALIDATION_COLUMNS
 
 # ==================================================
 # PAGE CONFIG
@@ -12,12 +35,14 @@ st.set_page_config(page_title="CII Calculator", layout="wide")
 
 st.markdown("<h2>📘 CII CALCULATOR</h2>", unsafe_allow_html=True)
 
+profiler = begin_page("CII Calculator")
+
 # ==================================================
 # FILE UPLOAD
 # ==================================================
 uploaded = st.file_uploader(
     "Upload Noon Report Excel (LogAbstract Sheet)",
-    type=["xlsx"]
+    type=["xlsx", "csv", "parquet"]
 )
 
 ship_type = st.selectbox(
@@ -41,17 +66,166 @@ def safe(v):
     return 0.0 if v is None or pd.isna(v) else float(v)
 
 
-def autopct_with_values(values, unit=""):
-    """Show value + percentage on pie chart"""
-    total = sum(values)
+def draw_running_cii(fig, ax, series):
+    band_colors = ["#2e7d32", "#9ccc65", "#fdd835", "#fb8c00", "#e53935"]
+    lower = 0
+    for (band, bound), color in zip(RATING_BOUNDARIES + [("E", None)], band_colors):
+        upper = (
+            series["Required AER"] * bound if bound is not None
+            else series["Required AER"] * 1.5
+        )
+        ax.fill_between(series["Date"], lower, upper, color=color, alpha=0.15, label=band)
+        lower = upper
+
+    ax.plot(series["Date"], series["Attained AER"], color="black", label="Attained AER")
+    ax.plot(series["Date"], series["Required AER"], color="grey", linestyle=":", label="Required AER")
+    ax.plot(series["Date"], series["Projected AER"], color="tab:blue", linestyle="--", label="Year-end projection")
+    ax.set_ylabel("gCO2 / dwt-nm")
+    ax.legend(loc="upper right", fontsize=8, ncol=4)
+
+
+def draw_heatmap(fig, ax, heat, switch):
+    im = ax.imshow(heat.to_numpy(), aspect="auto", cmap="RdYlGn_r", vmin=0.6, vmax=1.3)
+    ax.set_xticks(range(len(heat.columns)), [f"{c:.0f}%" for c in heat.columns], fontsize=8)
+    ax.set_yticks(range(len(heat.index)), heat.index, fontsize=8)
+    ax.set_title(f"Attained / Required AER – {switch}", fontsize=10)
+    fig.colorbar(im, ax=ax)
+
+
+def digest_for(upload):
+    """Content hash of the upload, computed once per file"""
+    file_id = getattr(upload, "file_id", upload.name)
+    cached = st.session_state.get("cii_upload_digest")
+    if cached is None or cached[0] != file_id:
+        cached = (file_id, upload_digest(upload))
+        st.session_state["cii_upload_digest"] = cached
+    return cached[1]
+
+
+CII_STAGES = ["load", "normalize", "aggregate", "classify"]
+
+
+def cii_task(job, upload, digest, ship_type, dwt, date_from, date_to, exclude, index=None):
+    """Background calculation: everything the results section renders"""
+    with job.stage("load"):
+        try:
+            df = load_excel(
+                upload, "LogAbstract",
+                columns=CII_COLUMNS + CII_OPERATIONS_COLUMNS + VALIDATION_COLUMNS
+            )
+        except Exception as e:
+            raise ValueError(f"Error loading sheet LogAbstract: {e}") from e
+        if df.empty:
+            raise ValueError("❌ No data found in LogAbstract sheet.")
+
+    with job.stage("normalize"):
+        issues, quality = cached_result(
+            result_key("cii_validation", digest),
+            validate_reports,
+            df
+        )
+        if exclude:
+            df = exclude_rows(df, issues)
+        if index is None:
+            index = build_range_index(df)
+
+    with job.stage("aggregate"):
+        filtered, result = cached_result(
+            result_key("cii", digest, exclude, ship_type, dwt, date_from, date_to),
+            calculate_cii,
+            df, ship_type, date_from, date_to, dwt=dwt, index=index
+        )
+        job.check()
+        series = cached_result(
+            result_key("running_cii", digest, exclude, ship_type, result["DWT Used"]),
+            running_cii_series,
+            df, ship_type, result["DWT Used"]
+        )
+        job.check()
+        grid = scenario_grid(
+            period_baseline(df, date_from, date_to, index=index),
+            ship_type,
+            dwts=[result["DWT Used"]],
+            years=DEFAULT_YEARS,
+            switch_to=("MGO", "LNG", "Methanol"),
+        )
 
-    def _autopct(pct):
-        val = pct * total / 100.0
-        if val <= 0:
-            return ""
-        return f"{val:.1f}{unit}\n({pct:.1f}%)"
+    with job.stage("classify"):
+        ops = cached_result(
+            result_key("cii_ops", digest, exclude, date_from, date_to),
+            classify_operation_by_events_in_range,
+            df, date_from, date_to
+        )
 
-    return _autopct
+    return {
+        "data_key": (digest, exclude),
+        "index": index,
+        "issues": issues,
+        "quality": quality,
+        "filtered": filtered,
+        "result": result,
+        "series": series,
+        "grid": grid,
+        "ops": ops,
+    }
+
+
+def reusable_index(job, digest, exclude):
+    """Range index of the last finished run on the same rows, if any"""
+    if job is None or not job.done() or job.is_cancelled() or job.error() is not None:
+        return None
+    run = job.result()
+    return run["index"] if run["data_key"] == (digest, exclude) else None
+
+
+@st.fragment(run_every=0.5)
+def show_progress(job):
+    """Polls the running job; a full rerun renders the result once it is done"""
+    if job.done():
+        st.rerun()
+    fraction, label = job.progress()
+    st.progress(fraction, text=label)
+    if st.button("✖ Cancel calculation", key="cii_cancel"):
+        job.cancel()
+        st.rerun()
+
+
+def job_result(job, key):
+    """The job's result when it ran for key and finished; progress / errors otherwise"""
+    if job is None or job.key != key:
+        return None
+    if not job.done():
+        show_progress(job)
+        return None
+    if job.is_cancelled():
+        st.info("Calculation cancelled.")
+        return None
+    if job.error() is not None:
+        st.error(str(job.error()))
+        return None
+    recorder, job.recorder = job.recorder, None       # job timings show once
+    if profiler is not None and recorder is not None:
+        profiler.merge(recorder)
+    return job.result()
+
+
+def show_data_quality(issues, summary):
+    n_errors = int((issues["Severity"] == "error").sum())
+    n_warnings = len(issues) - n_errors
+    label = f"🩺 Data Quality – {n_errors} error rows, {n_warnings} warning rows"
+    with st.expander(label, expanded=n_errors > 0):
+        st.dataframe(summary[summary["Checked"]], hide_index=True, use_container_width=True)
+        if not issues.empty:
+            st.dataframe(issues.drop(columns="Code"), hide_index=True, use_container_width=True)
+
+
+def show_result_cache_stats():
+    stats = result_cache_stats()
+    st.sidebar.caption(
+        f"Result cache: {stats['hits']} hits / {stats['misses']} misses "
+        f"({stats['hit_rate']:.0%}), {stats['entries']} entries, "
+        f"{stats['bytes'] / 1e6:.1f} MB"
+    )
 
 
 # ==================================================
@@ -59,11 +233,11 @@ def autopct_with_values(values, unit=""):
 # ==================================================
 if uploaded:
 
-    df = load_excel(uploaded, "LogAbstract")
-
-    if df.empty:
-        st.error("❌ No data found in LogAbstract sheet.")
-        st.stop()
+    exclude = st.checkbox(
+        "Exclude rows with data errors from the calculation",
+        value=False,
+        key="cii_exclude_errors"
+    )
 
     # ---------------- DWT ----------------
     dwt = st.number_input(
@@ -81,14 +255,31 @@ if uploaded:
         date_to = st.date_input("To Date", key="date_to")
 
     # ==================================================
-    # CALCULATE
+    # CALCULATE (background job, cancelled once its inputs change)
     # ==================================================
-    if st.button("🚀 Calculate CII", key="calc_btn"):
+    digest = digest_for(uploaded)
+    run_key = result_key("cii_run", digest, exclude, ship_type, dwt, date_from, date_to)
+    job = supersede(st.session_state.get("cii_job"), run_key)
 
-        # ---------------- CII ----------------
-        filtered, result = calculate_cii(
-            df, ship_type, date_from, date_to, dwt=dwt
+    if st.button("🚀 Calculate CII", key="calc_btn"):
+        index = reusable_index(job, digest, exclude)
+        if job is not None:
+            job.cancel()
+        job = submit(
+            run_key, cii_task,
+            uploaded, digest, ship_type, dwt, date_from, date_to, exclude,
+            index=index, stages=CII_STAGES
         )
+        st.session_state["cii_job"] = job
+
+    run = job_result(job, run_key)
+
+    if run is not None:
+
+        filtered, result = run["filtered"], run["result"]
+        series, grid, ops = run["series"], run["grid"], run["ops"]
+
+        show_data_quality(run["issues"], run["quality"])
 
         st.success("✅ Calculation Complete")
 
@@ -98,13 +289,51 @@ if uploaded:
         st.subheader("📊 Final CII Results")
         st.json(result)
 
-        # ---------------- OPERATIONS ----------------
-        st.subheader("⚓ Operational Breakdown")
+        # ---------------- RUNNING CII ----------------
+        st.subheader("📈 Running CII (Year to Date)")
+
+        series = series[
+            (series["Date"].dt.date >= date_from) &
+            (series["Date"].dt.date <= date_to)
+        ]
+
+        if series.empty:
+            st.warning("No daily data in the selected period.")
+        else:
+            size = (9, 3.5)
+            plotted = downsample(
+                series, "Date",
+                ["Attained AER", "Required AER", "Projected AER"],
+                points_for(size)
+            )
+            st.image(
+                render("running_cii", lambda fig, ax: draw_running_cii(fig, ax, plotted),
+                       plotted, figsize=size),
+                use_container_width=True
+            )
+
+            last = series.iloc[-1]
+            st.caption(
+                f"As of {last['Date'].date()}: attained {last['Attained AER']:.3f} "
+                f"({last['CII Rating']}), projected year-end "
+                f"{last['Projected AER']:.3f} ({last['Projected Rating']})"
+            )
+
+        # ---------------- SCENARIOS ----------------
+        with st.expander("🧪 Scenario What-ifs (Year × Fuel Switch)"):
+            for switch in grid["Switch"].unique():
+                heat = scenario_heatmap(grid, Switch=switch)
+                st.image(
+                    render("scenario_heatmap",
+                           lambda fig, ax: draw_heatmap(fig, ax, heat, switch),
+                           heat, switch, figsize=(8, 2.8)),
+                    use_container_width=True
+                )
 
-        ops = classify_operation_by_events_in_range(
-            df, date_from, date_to
-        )
+            st.dataframe(grid, use_container_width=True)
 
+        # ---------------- OPERATIONS ----------------
+        st.subheader("⚓ Operational Breakdown")
         st.json(ops)
 
         # ==================================================
@@ -151,16 +380,10 @@ if uploaded:
             if sum(values_hours) == 0:
                 st.warning("No hours data available.")
             else:
-                fig1, ax1 = plt.subplots(figsize=(3.8, 3.8))
-                ax1.pie(
-                    values_hours,
-                    labels=labels_hours,
-                    autopct=autopct_with_values(values_hours, " h"),
-                    startangle=90,
-                    textprops={"fontsize": 9}
-                )
-                ax1.set_title("Sea / Port / Drifting", fontsize=11)
-                st.pyplot(fig1, use_container_width=True)
+                st.image(pie_chart(
+                    values_hours, labels_hours, "Sea / Port / Drifting", " h",
+                    figsize=(3.8, 3.8), textprops={"fontsize": 9}, title_size=11
+                ), use_container_width=True)
 
         # ---------- FUEL PIE ----------
         with c2:
@@ -172,16 +395,13 @@ if uploaded:
             if sum(fuel_values) == 0:
                 st.warning("No fuel data available.")
             else:
-                fig2, ax2 = plt.subplots(figsize=(3.8, 3.8))
-                ax2.pie(
-                    fuel_values,
-                    labels=fuel_labels,
-                    autopct=autopct_with_values(fuel_values, " MT"),
-                    startangle=90,
-                    textprops={"fontsize": 9}
-                )
-                ax2.set_title("Fuel Split", fontsize=11)
-                st.pyplot(fig2, use_container_width=True)
+                st.image(pie_chart(
+                    fuel_values, fuel_labels, "Fuel Split", " MT",
+                    figsize=(3.8, 3.8), textprops={"fontsize": 9}, title_size=11
+                ), use_container_width=True)
 
 else:
     st.info("⬆️ Upload an Excel file to begin.")
+
+show_result_cache_stats()
+show_panel(profiler)
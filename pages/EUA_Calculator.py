@@ -1,8 +1,127 @@
 import streamlit as st
-from utils.style_utils import load_bootstrap
 
-st.set_page_config(page_title="EUA Calculator")
-st.markdown(load_bootstrap(), unsafe_allow_html=True)
+from utils.charts import render
+from utils.data_loader import load_excel
+from utils.eua_utils import calculate_eua, eua_by_vessel, EUA_COLUMNS, EU_ETS_PHASE_IN
+from utils.profiling import begin_page, show_panel
+from utils.result_cache import cached_result, result_key, upload_digest
 
-st.title("📙 EUA Calculator")
-st.info("Feature coming soon.")
+# ==================================================
+# PAGE CONFIG
+# ==================================================
+st.set_page_config(page_title="EUA Calculator", layout="wide")
+
+st.markdown("<h2>📙 EU ETS – EUA CALCULATOR</h2>", unsafe_allow_html=True)
+
+profiler = begin_page("EUA Calculator")
+
+# ==================================================
+# FILE UPLOAD
+# ==================================================
+uploaded = st.file_uploader(
+    "Upload Noon Report Excel (LogAbstract Sheet)",
+    type=["xlsx", "csv", "parquet"]
+)
+
+st.caption(
+    "Coverage: intra-EU voyages and EU port stays 100 %, voyages to or from "
+    "an EU / EEA port 50 %. Phase-in: "
+    + ", ".join(f"{y} {p:.0%}" for y, p in EU_ETS_PHASE_IN.items())
+    + ", 2026 onwards 100 %."
+)
+
+# ==================================================
+# HELPERS
+# ==================================================
+def draw_monthly_eua(fig, ax, monthly):
+    pivot = monthly.pivot_table(index="Month", columns="Vessel", values="EUA", aggfunc="sum").fillna(0)
+    bottom = None
+    for vessel in pivot.columns:
+        ax.bar(pivot.index, pivot[vessel], width=20, bottom=bottom, label=str(vessel))
+        bottom = pivot[vessel] if bottom is None else bottom + pivot[vessel]
+    ax.set_ylabel("EUA")
+    if len(pivot.columns) <= 10:
+        ax.legend(fontsize=8)
+
+
+# ==================================================
+# MAIN APP
+# ==================================================
+if not uploaded:
+    st.info("⬆️ Upload an Excel file to calculate EU ETS allowances.")
+    st.stop()
+
+try:
+    df = load_excel(uploaded, "LogAbstract", columns=EUA_COLUMNS)
+except Exception as e:
+    st.error(f"Error loading sheet LogAbstract: {e}")
+    st.stop()
+
+if df.empty:
+    st.error("❌ No data found in LogAbstract sheet.")
+    st.stop()
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    date_from = st.date_input("From Date", key="eua_from")
+with col2:
+    date_to = st.date_input("To Date", key="eua_to")
+with col3:
+    eua_price = st.number_input("EUA Price (EUR / t)", min_value=0.0, value=70.0, step=1.0)
+
+if st.button("🚀 Calculate EUAs"):
+
+    rows, segments, monthly, summary = cached_result(
+        result_key("eua", upload_digest(uploaded), date_from, date_to, eua_price),
+        calculate_eua,
+        df, date_from, date_to, eua_price=eua_price
+    )
+
+    if rows.empty:
+        st.warning("No data found in selected date range.")
+        st.stop()
+
+    st.success("✅ EUA Calculation Complete")
+
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Total CO2", f"{summary['Total CO2 (t)']:,.1f} t")
+    k2.metric("Covered CO2", f"{summary['Covered CO2 (t)']:,.1f} t")
+    k3.metric("EUAs to surrender", f"{summary['EUA Required']:,.1f}")
+    k4.metric("Cost", f"€ {summary['EUA Cost (EUR)']:,.0f}")
+
+    # ==================================================
+    # PER VESSEL / PER MONTH
+    # ==================================================
+    st.subheader("🚢 By Vessel")
+    st.dataframe(eua_by_vessel(rows), hide_index=True, use_container_width=True)
+
+    st.subheader("📅 By Month")
+    st.image(
+        render("eua_monthly", lambda fig, ax: draw_monthly_eua(fig, ax, monthly),
+               monthly, figsize=(9, 3)),
+        use_container_width=True
+    )
+    st.dataframe(monthly, hide_index=True, use_container_width=True)
+
+    # ==================================================
+    # VOYAGES & PORT STAYS
+    # ==================================================
+    st.subheader("🧭 Voyages & Port Stays")
+    scope_totals = (
+        segments.groupby(["Type", "Scope"], sort=False)[["CO2 (t)", "EUA"]]
+        .sum()
+        .reset_index()
+    )
+    st.dataframe(scope_totals, hide_index=True, use_container_width=True)
+    st.dataframe(segments, hide_index=True, use_container_width=True)
+
+    st.download_button(
+        "⬇️ Download segments CSV",
+        segments.to_csv(index=False).encode("utf-8"),
+        file_name="eua_segments.csv",
+        mime="text/csv"
+    )
+
+    st.json(summary)
+
+show_panel(profiler)
@@ -1,8 +1,178 @@
 import streamlit as st
-from utils.style_utils import load_bootstrap
+import pandas as pd
 
-st.set_page_config(page_title="FuelEU Calculator")
-st.markdown(load_bootstrap(), unsafe_allow_html=True)
+from utils.charts import render
+from utils.data_loader import load_excel
+from utils.fueleu_utils import fueleu_balances, FUELEU_COLUMNS, FUELEU_FUELS
+from utils.fueleu_pooling import optimize_pools, EXACT_LIMIT
+from utils.profiling import begin_page, show_panel
+from utils.result_cache import cached_result, result_key, upload_digest
 
-st.title("📕 FuelEU Calculator")
-st.info("Feature under development.")
+# ==================================================
+# PAGE CONFIG
+# ==================================================
+st.set_page_config(page_title="FuelEU Calculator", layout="wide")
+
+st.markdown("<h2>📕 FUELEU MARITIME CALCULATOR</h2>", unsafe_allow_html=True)
+
+profiler = begin_page("FuelEU Calculator")
+
+# ==================================================
+# FILE UPLOAD
+# ==================================================
+uploaded = st.file_uploader(
+    "Upload Noon Report Excel (LogAbstract Sheet)",
+    type=["xlsx", "csv", "parquet"]
+)
+
+with st.expander("Fuel library (Annex II defaults)"):
+    st.dataframe(
+        pd.DataFrame(FUELEU_FUELS).T.rename_axis("Fuel").reset_index(),
+        hide_index=True,
+        use_container_width=True
+    )
+
+# ==================================================
+# HELPERS
+# ==================================================
+def draw_intensity(fig, ax, balances):
+    labels = balances["Vessel"].astype(str) + " " + balances["Year"].astype(str)
+    colors = ["tab:green" if b >= 0 else "tab:red" for b in balances["Compliance Balance (tCO2e)"]]
+    ax.bar(labels, balances["GHG Intensity (gCO2e/MJ)"], color=colors)
+    ax.plot(labels, balances["Target (gCO2e/MJ)"], color="black", linestyle="--", marker="_", label="Target")
+    ax.set_ylabel("gCO2e / MJ")
+    ax.set_ylim(bottom=min(balances["GHG Intensity (gCO2e/MJ)"].min(), balances["Target (gCO2e/MJ)"].min()) * 0.95)
+    ax.tick_params(axis="x", labelrotation=90, labelsize=7)
+    ax.legend(fontsize=8)
+
+
+# ==================================================
+# MAIN APP
+# ==================================================
+if not uploaded:
+    st.info("⬆️ Upload an Excel file to calculate FuelEU compliance.")
+    st.stop()
+
+try:
+    df = load_excel(uploaded, "LogAbstract", columns=FUELEU_COLUMNS)
+except Exception as e:
+    st.error(f"Error loading sheet LogAbstract: {e}")
+    st.stop()
+
+if df.empty:
+    st.error("❌ No data found in LogAbstract sheet.")
+    st.stop()
+
+col1, col2 = st.columns(2)
+with col1:
+    date_from = st.date_input("From Date", key="fueleu_from")
+with col2:
+    date_to = st.date_input("To Date", key="fueleu_to")
+
+run_key = result_key("fueleu", upload_digest(uploaded), date_from, date_to)
+
+if st.button("🚀 Calculate FuelEU Balance"):
+    st.session_state["fueleu_run"] = {
+        "key": run_key,
+        "balances": cached_result(run_key, fueleu_balances, df, date_from, date_to),
+    }
+
+run = st.session_state.get("fueleu_run")
+if run is None or run["key"] != run_key:
+    st.stop()
+
+balances = run["balances"]
+if balances.empty:
+    st.warning("No data found in selected date range.")
+    st.stop()
+
+st.success("✅ FuelEU Calculation Complete")
+
+# ==================================================
+# FLEET SUMMARY
+# ==================================================
+k1, k2, k3 = st.columns(3)
+k1.metric("Energy in scope", f"{balances['Energy (MJ)'].sum() / 1e6:,.1f} TJ")
+k2.metric("Net compliance balance", f"{balances['Compliance Balance (tCO2e)'].sum():,.1f} tCO2e")
+k3.metric("Penalty exposure", f"€ {balances['Penalty (EUR)'].sum():,.0f}")
+
+st.subheader("📊 GHG Intensity vs Target")
+st.image(
+    render("fueleu_intensity", lambda fig, ax: draw_intensity(fig, ax, balances),
+           balances, figsize=(9, 3.5)),
+    use_container_width=True
+)
+
+st.subheader("🚢 Compliance by Vessel & Period")
+st.dataframe(balances, hide_index=True, use_container_width=True)
+
+st.download_button(
+    "⬇️ Download CSV",
+    balances.to_csv(index=False).encode("utf-8"),
+    file_name="fueleu_balances.csv",
+    mime="text/csv"
+)
+
+# ==================================================
+# POOLING OPTIMISER
+# ==================================================
+st.subheader("🤝 Pooling Optimiser")
+st.caption(
+    "Pools per reporting year with a non-negative total balance; surplus ships "
+    f"cover whole deficits. Up to {EXACT_LIMIT} deficit ships per group are solved "
+    "exactly, larger groups or size-capped pools heuristically."
+)
+
+vessels = sorted(balances["Vessel"].astype(str).unique())
+
+p1, p2 = st.columns(2)
+with p1:
+    excluded = st.multiselect("Exclude from pooling", vessels, key="fueleu_pool_excluded")
+with p2:
+    max_pool_size = st.number_input(
+        "Max ships per pool (0 = no limit)", min_value=0, value=0, step=1, key="fueleu_pool_size"
+    )
+
+with st.expander("Pool groups (ships pool only within their group)"):
+    group_table = st.data_editor(
+        pd.DataFrame({"Vessel": vessels, "Group": "Fleet"}),
+        disabled=["Vessel"],
+        hide_index=True,
+        use_container_width=True,
+        key="fueleu_pool_groups"
+    )
+
+allocation, pool_summary, pool_stats = optimize_pools(
+    balances,
+    groups=dict(zip(group_table["Vessel"], group_table["Group"].fillna("Fleet").astype(str))),
+    excluded=excluded,
+    max_pool_size=int(max_pool_size) or None,
+)
+
+m1, m2, m3 = st.columns(3)
+m1.metric("Penalty before pooling", f"€ {pool_summary['Penalty Before (EUR)'].sum():,.0f}")
+m2.metric("Penalty after pooling", f"€ {pool_summary['Penalty After (EUR)'].sum():,.0f}")
+m3.metric("Saving", f"€ {pool_summary['Saving (EUR)'].sum():,.0f}")
+
+st.dataframe(pool_summary, hide_index=True, use_container_width=True)
+st.dataframe(
+    allocation[[
+        "Vessel", "Year", "Pool", "Compliance Balance (tCO2e)", "Transfer (tCO2e)",
+        "Balance After Pooling (tCO2e)", "Penalty (EUR)", "Penalty After Pooling (EUR)",
+    ]],
+    hide_index=True,
+    use_container_width=True
+)
+st.caption(
+    f"Solver: {pool_stats['method']} · {pool_stats['vessel_periods']} vessel-years · "
+    f"{pool_stats['candidates_evaluated']:,} candidates · {pool_stats['seconds'] * 1000:,.1f} ms"
+)
+
+st.download_button(
+    "⬇️ Download pooling CSV",
+    allocation.to_csv(index=False).encode("utf-8"),
+    file_name="fueleu_pooling.csv",
+    mime="text/csv"
+)
+
+show_panel(profiler)
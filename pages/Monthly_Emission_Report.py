@@ -1,8 +1,206 @@
 import streamlit as st
-from utils.style_utils import load_bootstrap
+import pandas as pd
 
-st.set_page_config(page_title="Monthly Emission Report")
-st.markdown(load_bootstrap(), unsafe_allow_html=True)
+from utils.charts import render
+from utils.data_loader import load_excel
+from utils.monthly_report import (
+    MonthlyStore,
+    monthly_report,
+    store_path,
+    vessel_imo,
+    HOUR_COLUMNS,
+    FUEL_TYPE_COLUMNS,
+    MONTHLY_COLUMNS,
+)
+from utils.profiling import begin_page, show_panel
+from utils.result_cache import upload_digest
 
-st.title("📗 Monthly Emission Report")
-st.info("Feature under development.")
+# ==================================================
+# PAGE CONFIG
+# ==================================================
+st.set_page_config(page_title="Monthly Emission Report", layout="wide")
+
+st.markdown("<h2>📗 MONTHLY EMISSION REPORT</h2>", unsafe_allow_html=True)
+
+profiler = begin_page("Monthly Emission Report")
+
+# ==================================================
+# FILE UPLOAD
+# ==================================================
+uploaded = st.file_uploader(
+    "Upload Noon Report Excel (LogAbstract Sheet)",
+    type=["xlsx", "csv", "parquet"]
+)
+
+ship_type = st.selectbox(
+    "Select Ship Type",
+    [
+        "Bulk Carrier",
+        "Tanker",
+        "Container",
+        "RoRo",
+        "General Cargo",
+        "Cable Layer"
+    ],
+    key="mer_ship_type"
+)
+
+# ==================================================
+# HELPERS
+# ==================================================
+def store_for(imo, reload=False):
+    """Month buckets for the vessel (by IMO), read from disk once per session or on reload"""
+    cached = st.session_state.get("mer_store")
+    if reload or cached is None or cached[0] != imo:
+        path = store_path(imo)
+        store = MonthlyStore.load(path) if path.exists() else MonthlyStore(imo=imo)
+        cached = (imo, store)
+        st.session_state["mer_store"] = cached
+    return cached[1]
+
+
+def digest_for(upload):
+    """Content hash of the upload, computed once per file"""
+    file_id = getattr(upload, "file_id", upload.name)
+    cached = st.session_state.get("mer_upload_digest")
+    if cached is None or cached[0] != file_id:
+        cached = (file_id, upload_digest(upload))
+        st.session_state["mer_upload_digest"] = cached
+    return cached[1]
+
+
+def draw_monthly_co2(fig, ax, report):
+    ax.bar(report["Month"].dt.strftime("%Y-%m"), report["CO2 (MT)"], color="tab:green")
+    ax.set_ylabel("CO2 (MT)")
+    ax.tick_params(axis="x", labelrotation=90, labelsize=7)
+
+
+def draw_running_aer(fig, ax, report):
+    ax.plot(report["Month"], report["Running AER"], marker="o", color="black", label="Running AER (YTD)")
+    ax.step(report["Month"], report["Required AER"], where="post", color="grey", linestyle=":", label="Required AER")
+    ax.set_ylabel("gCO2 / dwt-nm")
+    ax.legend(loc="upper right", fontsize=8)
+
+
+# ==================================================
+# MAIN APP
+# ==================================================
+if not uploaded:
+    st.info("⬆️ Upload an Excel file to build the monthly report.")
+    st.stop()
+
+dwt = st.number_input(
+    "Enter Deadweight (DWT in tonnes)",
+    min_value=1000.0,
+    value=50000.0,
+    step=100.0,
+    key="mer_dwt"
+)
+
+# --------------------------------------------------
+# SYNC BUCKETS (only months whose reports changed)
+# --------------------------------------------------
+# Stores are shared on disk and keyed by the IMO in the data, never by
+# the file name, so another vessel's export cannot merge into them
+digest = digest_for(uploaded)
+synced = st.session_state.get("mer_synced")
+if synced is None or synced[0] != digest:
+    try:
+        df = load_excel(uploaded, "LogAbstract", columns=MONTHLY_COLUMNS)
+    except Exception as e:
+        st.error(f"Error loading sheet LogAbstract: {e}")
+        st.stop()
+
+    if df.empty:
+        st.error("❌ No data found in LogAbstract sheet.")
+        st.stop()
+
+    try:
+        imo = vessel_imo(df)
+        store = store_for(imo, reload=True)               # other sessions may have synced
+        changed = store.refresh(df)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        st.stop()
+
+    if changed:
+        store.save(store_path(imo))
+
+    st.session_state["mer_synced"] = (digest, imo)
+    st.session_state["mer_changed"] = len(changed)
+else:
+    imo = synced[1]
+    store = store_for(imo)
+
+st.caption(
+    f"{len(store)} months materialised for IMO {imo}; "
+    f"{st.session_state.get('mer_changed', 0)} recomputed from this upload."
+)
+
+report = monthly_report(store.buckets, ship_type, dwt)
+if report.empty:
+    st.warning("No dated reports found.")
+    st.stop()
+
+# ==================================================
+# MONTH SUMMARY
+# ==================================================
+months = report["Month"].dt.strftime("%Y-%m").tolist()
+picked = st.selectbox("Month", months, index=len(months) - 1)
+row = report.iloc[months.index(picked)]
+
+k1, k2, k3, k4 = st.columns(4)
+k1.metric("CO2", f"{row['CO2 (MT)']:.2f} MT")
+k2.metric("Fuel", f"{row['Total Fuel (MT)']:.2f} MT")
+k3.metric("Distance", f"{row['Distance (NM)']:.1f} NM")
+k4.metric(
+    "Running AER",
+    "–" if pd.isna(row["Running AER"]) else f"{row['Running AER']:.3f}",
+    help=f"Required {row['Required AER']:.3f}, rating {row['Running Rating'] or '–'}"
+)
+
+h = st.columns(len(HOUR_COLUMNS))
+for col, name in zip(h, HOUR_COLUMNS):
+    col.metric(name, f"{row[name]:.1f} h")
+
+fuel_cols = [c for c in report.columns if c not in set(FUEL_TYPE_COLUMNS) and "Consumption" in c]
+st.markdown("#### ⛽ Fuel by Consumer")
+st.dataframe(
+    row[fuel_cols].rename("MT").to_frame().T,
+    hide_index=True,
+    use_container_width=True
+)
+
+# ==================================================
+# TRENDS
+# ==================================================
+st.subheader("📈 Monthly Trends")
+
+t1, t2 = st.columns(2)
+with t1:
+    st.image(
+        render("mer_co2", lambda fig, ax: draw_monthly_co2(fig, ax, report),
+               report[["Month", "CO2 (MT)"]], figsize=(6, 3)),
+        use_container_width=True
+    )
+with t2:
+    st.image(
+        render("mer_aer", lambda fig, ax: draw_running_aer(fig, ax, report),
+               report[["Month", "Running AER", "Required AER"]], figsize=(6, 3)),
+        use_container_width=True
+    )
+
+# ==================================================
+# REPORT TABLE
+# ==================================================
+st.subheader("📄 Monthly Report")
+st.dataframe(report, hide_index=True, use_container_width=True)
+
+st.download_button(
+    "⬇️ Download CSV",
+    report.to_csv(index=False).encode("utf-8"),
+    file_name=f"IMO{imo}_monthly_emissions.csv",
+    mime="text/csv"
+)
+
+show_panel(profiler)
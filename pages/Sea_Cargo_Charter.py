@@ -1,15 +1,34 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 
 # ==================================================
 # IMPORTS
 # ==================================================
+from utils.background import submit, supersede
+from utils.charts import pie_chart
 from utils.data_loader import load_excel
+from utils.profiling import begin_page, show_panel
+from utils.range_index import build_range_index
+from utils.result_cache import (
+    cached_result,
+    result_cache_stats,
+    result_key,
+    upload_digest,
+)
+from utils import port_master
 from utils.unlocode_utils import map_ports
-from utils.leg_utils import assign_legs, summarize_voyages
-from utils.scc_utils import calculate_scc_intensity
-from utils.operations import classify_operation_by_events_in_range
+from utils.leg_utils import (
+    assign_legs,
+    summarize_voyages,
+    voyage_row_index,
+    LEG_COLUMNS,
+)
+from utils.scc_utils import calculate_scc_intensity, SCC_COLUMNS
+from utils.operations import (
+    classify_operation_by_events_in_range,
+    OPERATIONS_COLUMNS,
+)
+from utils.validation import exclude_rows, validate_reports, VALIDATION_COLUMNS
 
 # ==================================================
 # PAGE CONFIG
@@ -20,12 +39,14 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+profiler = begin_page("SCC Calculator")
+
 # ==================================================
 # FILE UPLOAD
 # ==================================================
 uploaded = st.file_uploader(
     "Upload Noon Report Excel (LogAbstract Sheet)",
-    type=["xlsx"]
+    type=["xlsx", "csv", "parquet"]
 )
 
 ship_type = st.selectbox(
@@ -47,36 +68,192 @@ def safe(v):
     return 0.0 if v is None or pd.isna(v) else float(v)
 
 
-def autopct_with_values(values, unit=""):
-    total = sum(values)
+def digest_for(upload):
+    """Content hash of the upload, computed once per file"""
+    file_id = getattr(upload, "file_id", upload.name)
+    cached = st.session_state.get("scc_upload_digest")
+    if cached is None or cached[0] != file_id:
+        cached = (file_id, upload_digest(upload))
+        st.session_state["scc_upload_digest"] = cached
+    return cached[1]
+
 
-    def _autopct(pct):
-        val = pct * total / 100.0
-        return "" if val <= 0 else f"{val:.1f}{unit}\n({pct:.1f}%)"
+SCC_STAGES = ["load", "normalize", "aggregate", "legs", "classify"]
 
-    return _autopct
 
+def scc_task(job, upload, digest, ship_type, cargo_mt, date_from, date_to, exclude, index=None):
+    """Background calculation: everything the results section renders"""
+    with job.stage("load"):
+        try:
+            df = load_excel(
+                upload, "LogAbstract",
+                columns=SCC_COLUMNS + LEG_COLUMNS + OPERATIONS_COLUMNS + VALIDATION_COLUMNS
+            )
+        except Exception as e:
+            raise ValueError(f"Error loading sheet LogAbstract: {e}") from e
+
+    with job.stage("normalize"):
+        df = map_ports(df)
+        if df.empty:
+            raise ValueError("❌ No data found in LogAbstract sheet.")
+        issues, quality = cached_result(
+            result_key("scc_validation", digest),
+            validate_reports,
+            df
+        )
+        if exclude:
+            df = exclude_rows(df, issues)
+        if index is None:
+            index = build_range_index(df)
+
+    run = {"data_key": (digest, exclude), "index": index, "issues": issues, "quality": quality}
+
+    with job.stage("aggregate"):
+        filtered, result = cached_result(
+            result_key("scc", digest, exclude, ship_type, cargo_mt, date_from, date_to),
+            calculate_scc_intensity,
+            df=df,
+            ship_type=ship_type,
+            date_from=date_from,
+            date_to=date_to,
+            cargo_mt=cargo_mt,
+            index=index
+        )
+        if filtered.empty:
+            return {**run, "result": None}
+
+    with job.stage("legs"):
+        legged_df = assign_legs(filtered)
+        voyage_df, voyage_rows = voyage_row_index(legged_df)
+        job.check()
+        voyage_summary = summarize_voyages(legged_df)
+
+    with job.stage("classify"):
+        ops = cached_result(
+            result_key("scc_ops", digest, exclude, date_from, date_to),
+            classify_operation_by_events_in_range,
+            filtered, date_from, date_to, index=index
+        )
+
+    return {
+        **run,
+        "result": result,
+        "ops": ops,
+        "voyage_summary": voyage_summary,
+        "voyage_df": voyage_df,
+        "voyage_rows": voyage_rows,
+    }
+
+
+def reusable_index(job, digest, exclude):
+    """Range index of the last finished run on the same rows, if any"""
+    if job is None or not job.done() or job.is_cancelled() or job.error() is not None:
+        return None
+    run = job.result()
+    return run["index"] if run["data_key"] == (digest, exclude) else None
+
+
+@st.fragment(run_every=0.5)
+def show_progress(job):
+    """Polls the running job; a full rerun renders the result once it is done"""
+    if job.done():
+        st.rerun()
+    fraction, label = job.progress()
+    st.progress(fraction, text=label)
+    if st.button("✖ Cancel calculation", key="scc_cancel"):
+        job.cancel()
+        st.rerun()
+
+
+def job_result(job, key):
+    """The job's result when it ran for key and finished; progress / errors otherwise"""
+    if job is None or job.key != key:
+        return None
+    if not job.done():
+        show_progress(job)
+        return None
+    if job.is_cancelled():
+        st.info("Calculation cancelled.")
+        return None
+    if job.error() is not None:
+        st.error(str(job.error()))
+        return None
+    recorder, job.recorder = job.recorder, None       # job timings show once
+    if profiler is not None and recorder is not None:
+        profiler.merge(recorder)
+    return job.result()
+
+
+def show_data_quality(issues, summary):
+    n_errors = int((issues["Severity"] == "error").sum())
+    n_warnings = len(issues) - n_errors
+    label = f"🩺 Data Quality – {n_errors} error rows, {n_warnings} warning rows"
+    with st.expander(label, expanded=n_errors > 0):
+        st.dataframe(summary[summary["Checked"]], hide_index=True, use_container_width=True)
+        if not issues.empty:
+            st.dataframe(issues.drop(columns="Code"), hide_index=True, use_container_width=True)
+
+
+def show_result_cache_stats():
+    stats = result_cache_stats()
+    st.sidebar.caption(
+        f"Result cache: {stats['hits']} hits / {stats['misses']} misses "
+        f"({stats['hit_rate']:.0%}), {stats['entries']} entries, "
+        f"{stats['bytes'] / 1e6:.1f} MB"
+    )
+
+
+DETAIL_PAGE_SIZES = [50, 100, 250, 500]
+DETAIL_DEFAULT_COLUMNS = [
+    "DateTimeInUTC", "EventType", "Leg_ID", "VoyageFrom", "VoyageTo",
+    "Distance", "TimeSincePreviousReport", "CO2Tonnes",
+]
+
+
+def detail_page(frame, rows, columns, page, page_size):
+    """One page of one voyage: row slice first, then column projection"""
+    start = rows.start + page * page_size
+    stop = min(rows.stop, start + page_size)
+    return frame.iloc[start:stop, frame.columns.get_indexer(columns)]
+
+
+# ==================================================
+# PORT LOOKUP (sidebar autocomplete)
+# ==================================================
+with st.sidebar:
+    port_query = st.text_input("🔎 Port lookup (UN/LOCODE or name)")
+    if port_query:
+        if not port_master.is_available():
+            st.caption("Port master not built: python -m utils.port_master build <UN/LOCODE CSVs>")
+        else:
+            hits = port_master.search(port_query, limit=15)
+            if hits:
+                st.dataframe(
+                    pd.DataFrame(hits)[["code", "name", "country", "eu_eea", "lat", "lon"]],
+                    hide_index=True,
+                    use_container_width=True
+                )
+            else:
+                st.caption("No matching ports.")
 
 # ==================================================
 # MAIN APP
 # ==================================================
 if not uploaded:
     st.info("⬆️ Upload an Excel file to begin SCC analysis.")
-    st.stop()
-
-# --------------------------------------------------
-# LOAD & PREPARE DATA
-# --------------------------------------------------
-df = load_excel(uploaded, "LogAbstract")
-df = map_ports(df)
-
-if df.empty:
-    st.error("❌ No data found in LogAbstract sheet.")
+    show_result_cache_stats()
+    show_panel(profiler)
     st.stop()
 
 # --------------------------------------------------
 # USER INPUTS
 # --------------------------------------------------
+exclude = st.checkbox(
+    "Exclude rows with data errors from the calculation",
+    value=False,
+    key="scc_exclude_errors"
+)
+
 cargo_mt = st.number_input(
     "Enter Average Cargo Onboard (MT)",
     min_value=0.0,
@@ -91,131 +268,154 @@ with col2:
     date_to = st.date_input("To Date")
 
 # ==================================================
-# CALCULATE BUTTON
+# CALCULATE BUTTON (background job, cancelled once its inputs change)
 # ==================================================
-if st.button("🚀 Calculate SCC Intensity"):
+digest = digest_for(uploaded)
+run_key = result_key("scc_run", digest, exclude, ship_type, cargo_mt, date_from, date_to)
+job = supersede(st.session_state.get("scc_job"), run_key)
 
-    # --------------------------------------------------
-    # SCC CALCULATION
-    # --------------------------------------------------
-    filtered, result = calculate_scc_intensity(
-        df=df,
-        ship_type=ship_type,
-        date_from=date_from,
-        date_to=date_to,
-        cargo_mt=cargo_mt
+if st.button("🚀 Calculate SCC Intensity"):
+    index = reusable_index(job, digest, exclude)
+    if job is not None:
+        job.cancel()
+    # Kept across reruns so selecting a voyage does not recompute
+    job = submit(
+        run_key, scc_task,
+        uploaded, digest, ship_type, cargo_mt, date_from, date_to, exclude,
+        index=index, stages=SCC_STAGES
     )
+    st.session_state["scc_job"] = job
+
+run = job_result(job, run_key)
+
+show_result_cache_stats()
 
-    if filtered.empty:
-        st.warning("No data found in selected date range.")
-        st.stop()
+if run is None:
+    show_panel(profiler)
+    st.stop()
+
+show_data_quality(run["issues"], run["quality"])
 
-    st.success("✅ SCC Calculation Complete")
+if run["result"] is None:
+    st.warning("No data found in selected date range.")
+    show_panel(profiler)
+    st.stop()
 
-    # ==================================================
-    # VOYAGE-BASED OPERATIONAL DATA
-    # ==================================================
-    st.subheader("📄 Filtered Operational Data (By Voyage)")
+result = run["result"]
+ops = run["ops"]
+voyage_summary = run["voyage_summary"]
+voyage_df = run["voyage_df"]
+voyage_rows = run["voyage_rows"]
 
-    legged_df = assign_legs(filtered)
-    voyage_summary = summarize_voyages(legged_df)
+st.success("✅ SCC Calculation Complete")
 
-    if voyage_summary.empty:
-        st.warning("No voyages detected.")
+# ==================================================
+# VOYAGE-BASED OPERATIONAL DATA
+# ==================================================
+st.subheader("📄 Filtered Operational Data (By Voyage)")
+
+if voyage_summary.empty:
+    st.warning("No voyages detected.")
+else:
+    # Grid is virtualised client-side; details load only for the selection
+    selection = st.dataframe(
+        voyage_summary,
+        hide_index=True,
+        use_container_width=True,
+        height=min(400, 38 + 35 * len(voyage_summary)),
+        on_select="rerun",
+        selection_mode="single-row",
+        key="scc_voyage_table"
+    )
+    picked = selection.selection.rows
+
+    if not picked:
+        st.caption("Select a voyage above to see its reports.")
     else:
-        for _, row in voyage_summary.iterrows():
-
-            title = (
-                f"🛳 Voyage {row['VoyageNumber']} | "
-                f"{row['From']} ➜ {row['To']} | "
-                f"{row['Total_Distance_NM']:.1f} NM | "
-                f"{row['Total_Fuel_MT']:.2f} MT | "
-                f"Legs: {row['Total_Legs']}"
+        row = voyage_summary.iloc[picked[0]]
+        rows = voyage_rows.get(row["VoyageNumber"], slice(0, 0))
+        n_rows = rows.stop - rows.start
+
+        st.markdown(
+            f"""
+            **🛳 Voyage {row['VoyageNumber']}** | {row['From']} ➜ {row['To']}  
+            **Start:** {row['Start']}  
+            **End:** {row['End']}  
+            **Total Records:** {row['Total_Records']}
+            """
+        )
+
+        d1, d2, d3 = st.columns([4, 1, 1])
+        with d1:
+            columns = st.multiselect(
+                "Columns",
+                list(voyage_df.columns),
+                default=[c for c in DETAIL_DEFAULT_COLUMNS if c in voyage_df.columns],
+                key="scc_detail_columns"
+            )
+        with d2:
+            page_size = st.selectbox(
+                "Rows per page", DETAIL_PAGE_SIZES, key="scc_detail_page_size"
+            )
+        n_pages = max(1, -(-n_rows // page_size))
+        with d3:
+            page = st.number_input(
+                f"Page (of {n_pages})", min_value=1, max_value=n_pages,
+                value=1, step=1, key=f"scc_detail_page_{row['VoyageNumber']}"
             )
 
-            with st.expander(title):
-                st.markdown(
-                    f"""
-                    **Start:** {row['Start']}  
-                    **End:** {row['End']}  
-                    **Total Records:** {row['Total_Records']}
-                    """
-                )
+        st.dataframe(
+            detail_page(voyage_df, rows, columns, int(page) - 1, page_size),
+            use_container_width=True
+        )
 
-                st.dataframe(
-                    legged_df[
-                        legged_df["VoyageNumber"] == row["VoyageNumber"]
-                    ],
-                    use_container_width=True
-                )
+# ==================================================
+# SCC RESULTS (PORTFOLIO LEVEL)
+# ==================================================
+st.subheader("📊 SCC Results")
+st.json(result)
 
-    # ==================================================
-    # SCC RESULTS (PORTFOLIO LEVEL)
-    # ==================================================
-    st.subheader("📊 SCC Results")
-    st.json(result)
-
-    # ==================================================
-    # OPERATIONAL BREAKDOWN
-    # ==================================================
-    st.subheader("⚓ Operational Breakdown")
-
-    ops = classify_operation_by_events_in_range(
-        filtered,
-        date_from,
-        date_to
-    )
+# ==================================================
+# OPERATIONAL BREAKDOWN
+# ==================================================
+st.subheader("⚓ Operational Breakdown")
+st.json(ops)
+
+# ==================================================
+# HOURS & FUEL
+# ==================================================
+sea_h = safe(ops.get("Sea Hours"))
+port_h = safe(ops.get("Port Hours"))
+drift_h = safe(ops.get("Drifting Hours"))
+
+total_hfo = (
+    safe(ops.get("Sea HFO")) +
+    safe(ops.get("Port HFO")) +
+    safe(ops.get("Drifting HFO"))
+)
 
-    st.json(ops)
+total_mgo = (
+    safe(ops.get("Sea MGO")) +
+    safe(ops.get("Port MGO")) +
+    safe(ops.get("Drifting MGO"))
+)
 
-    # ==================================================
-    # HOURS & FUEL
-    # ==================================================
-    sea_h = safe(ops.get("Sea Hours"))
-    port_h = safe(ops.get("Port Hours"))
-    drift_h = safe(ops.get("Drifting Hours"))
+# ==================================================
+# CHARTS
+# ==================================================
+st.subheader("📈 SCC Operational Distribution")
 
-    total_hfo = (
-        safe(ops.get("Sea HFO")) +
-        safe(ops.get("Port HFO")) +
-        safe(ops.get("Drifting HFO"))
-    )
+c1, c2 = st.columns(2)
 
-    total_mgo = (
-        safe(ops.get("Sea MGO")) +
-        safe(ops.get("Port MGO")) +
-        safe(ops.get("Drifting MGO"))
-    )
+with c1:
+    st.image(pie_chart(
+        [sea_h, port_h, drift_h], ["Sea", "Port", "Drifting"],
+        "Hours Distribution", " h"
+    ))
 
-    # ==================================================
-    # CHARTS
-    # ==================================================
-    st.subheader("📈 SCC Operational Distribution")
-
-    c1, c2 = st.columns(2)
-
-    with c1:
-        fig1, ax1 = plt.subplots(figsize=(4, 4))
-        ax1.pie(
-            [sea_h, port_h, drift_h],
-            labels=["Sea", "Port", "Drifting"],
-            autopct=autopct_with_values(
-                [sea_h, port_h, drift_h], " h"
-            ),
-            startangle=90
-        )
-        ax1.set_title("Hours Distribution")
-        st.pyplot(fig1)
-
-    with c2:
-        fig2, ax2 = plt.subplots(figsize=(4, 4))
-        ax2.pie(
-            [total_hfo, total_mgo],
-            labels=["HFO", "MGO"],
-            autopct=autopct_with_values(
-                [total_hfo, total_mgo], " MT"
-            ),
-            startangle=90
-        )
-        ax2.set_title("Fuel Split")
-        st.pyplot(fig2)
+with c2:
+    st.image(pie_chart(
+        [total_hfo, total_mgo], ["HFO", "MGO"], "Fuel Split", " MT"
+    ))
+
+show_panel(profiler)
@@ -1,8 +1,9 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 
+from utils.charts import downsample, points_for, render
 from utils.data_loader import load_excel
+from utils.profiling import begin_page, show_panel
 
 # ==================================================
 # PAGE CONFIG
@@ -14,12 +15,14 @@ st.set_page_config(
 
 st.markdown("<h2>🚢 Vessel Performance Dashboard</h2>", unsafe_allow_html=True)
 
+profiler = begin_page("Vessel Performance")
+
 # ==================================================
 # FILE UPLOAD
 # ==================================================
 uploaded = st.file_uploader(
     "Upload Noon Report Excel (LogAbstract Sheet)",
-    type=["xlsx"]
+    type=["xlsx", "csv", "parquet"]
 )
 
 # ==================================================
@@ -38,7 +41,11 @@ def col_exists(df, col):
 # ==================================================
 if uploaded:
 
-    df = load_excel(uploaded, "LogAbstract")
+    try:
+        df = load_excel(uploaded, "LogAbstract")
+    except Exception as e:
+        st.error(f"Error loading sheet LogAbstract: {e}")
+        st.stop()
 
     if df.empty:
         st.error("❌ LogAbstract sheet is empty.")
@@ -143,15 +150,19 @@ if uploaded:
     if total_fuel == 0:
         st.warning("No fuel consumption data.")
     else:
-        fig, ax = plt.subplots(figsize=(4, 4))
-        ax.pie(
-            [total_hfo, total_mgo],
-            labels=["HFO", "MGO"],
-            autopct=lambda p: f"{p:.1f}%\n({p*total_fuel/100:.1f} MT)",
-            startangle=90
+        def draw_fuel_split(fig, ax):
+            ax.pie(
+                [total_hfo, total_mgo],
+                labels=["HFO", "MGO"],
+                autopct=lambda p: f"{p:.1f}%\n({p*total_fuel/100:.1f} MT)",
+                startangle=90
+            )
+            ax.set_title("HFO vs MGO")
+
+        st.image(
+            render("vp_fuel_split", draw_fuel_split, total_hfo, total_mgo, figsize=(4, 4)),
+            use_container_width=True
         )
-        ax.set_title("HFO vs MGO")
-        st.pyplot(fig, use_container_width=True)
 
     # ==================================================
     # TREND CHARTS
@@ -159,18 +170,31 @@ if uploaded:
     st.subheader("📈 Performance Trends")
 
     if "Date" in df.columns:
-        fig2, ax2 = plt.subplots(figsize=(6, 3))
-        speed_series = (
-            df["Distance"] / df["TimeSincePreviousReport"]
-        ).replace([float("inf")], 0)
-
-        ax2.plot(df["Date"], speed_series, marker="o")
-        ax2.set_title("Speed Trend")
-        ax2.set_ylabel("Knots")
-        ax2.set_xlabel("Date")
-        st.pyplot(fig2, use_container_width=True)
+        size = (6, 3)
+        speed = pd.DataFrame({
+            "Date": df["Date"],
+            "Speed": (
+                df["Distance"] / df["TimeSincePreviousReport"]
+            ).replace([float("inf")], 0)
+        }).dropna(subset=["Date"]).sort_values("Date", kind="stable")
+
+        # One point per horizontal pixel is all the figure can show
+        speed = downsample(speed, "Date", "Speed", points_for(size))
+
+        def draw_speed(fig, ax):
+            ax.plot(speed["Date"], speed["Speed"], marker="o", markersize=3)
+            ax.set_title("Speed Trend")
+            ax.set_ylabel("Knots")
+            ax.set_xlabel("Date")
+
+        st.image(
+            render("vp_speed_trend", draw_speed, speed, figsize=size),
+            use_container_width=True
+        )
     else:
         st.info("Date-based trend not available (no Date column).")
 
 else:
     st.info("⬆️ Upload an Excel file to view vessel performance.")
+
+show_panel(profiler)
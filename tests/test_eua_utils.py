@@ -0,0 +1,91 @@
+"""
+EU ETS scope, coverage share and phase-in of utils.eua_utils.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.canonical import CO2_COLUMN, normalize_log_abstract
+from utils.eua_utils import calculate_eua, eu_coverage, phase_in
+
+# (EventType, VoyageNumber, VoyageFrom, VoyageTo)
+REPORTS = [
+    ("Departure", "V1", "NLRTM", "DEHAM"),     # Rotterdam -> Hamburg: intra-EU
+    ("Noon (Sea)", "V1", "NLRTM", "DEHAM"),
+    ("Arrival", "V1", "NLRTM", "DEHAM"),
+    ("Idle In Port", "V1", "NLRTM", "DEHAM"),  # at Hamburg
+    ("Departure", "V2", "DEHAM", "SGSIN"),     # leaving the EU
+    ("Noon (Sea)", "V2", "DEHAM", "SGSIN"),
+    ("Arrival", "V2", "DEHAM", "SGSIN"),
+    ("Idle In Port", "V2", "DEHAM", "SGSIN"),  # at Singapore
+    ("Departure", "V3", "SGSIN", "NLRTM"),     # entering the EU
+    ("Noon (Sea)", "V3", "SGSIN", "NLRTM"),
+    ("Arrival", "V3", "SGSIN", "NLRTM"),
+    ("Loading", "V3", "SGSIN", "NLRTM"),       # at Rotterdam
+    ("Departure", "V4", "SGSIN", "USLAX"),     # never touches the EU
+    ("Noon (Sea)", "V4", "SGSIN", "USLAX"),
+    ("Arrival", "V4", "SGSIN", "USLAX"),
+]
+
+SCOPES = (
+    ["Intra-EU"] * 3 + ["EU port"]
+    + ["EU outbound"] * 3 + ["Non-EU port"]
+    + ["EU inbound"] * 3 + ["EU port"]
+    + ["Non-EU"] * 3
+)
+COVERAGE = [1.0] * 4 + [0.5] * 3 + [0.0] + [0.5] * 3 + [1.0] + [0.0] * 3
+
+
+def log_abstract(start):
+    """One vessel burning 1 t HFO per report, every 12 h from start."""
+    df = pd.DataFrame(REPORTS, columns=["EventType", "VoyageNumber", "VoyageFrom", "VoyageTo"])
+    ts = pd.date_range(start, periods=len(df), freq="12h")
+    df.insert(0, "IMO", 9_000_001)
+    df.insert(1, "DateTimeInUTC", ts)
+    df["DateUTC"] = ts.normalize()
+    df["MEConsumptionHFO"] = 1.0
+    return normalize_log_abstract(df)
+
+
+def test_phase_in():
+    assert phase_in([2023, 2024, 2025, 2026, 2030]).tolist() == [0.0, 0.4, 0.7, 1.0, 1.0]
+
+
+def test_scope_and_coverage():
+    rows = eu_coverage(log_abstract("2026-03-01"))
+    assert rows["Scope"].tolist() == SCOPES
+    assert rows["Coverage"].tolist() == COVERAGE
+    assert np.allclose(rows["Covered CO2 (t)"], rows[CO2_COLUMN] * COVERAGE)
+    # Full surrender from 2026: one EUA per covered tonne
+    assert np.allclose(rows["EUA"], rows["Covered CO2 (t)"])
+
+
+@pytest.mark.parametrize("start, share", [
+    ("2023-06-01", 0.0),                       # before the ETS covered shipping
+    ("2024-06-01", 0.4),
+    ("2025-06-01", 0.7),
+    ("2026-06-01", 1.0),
+])
+def test_calculate_eua_applies_phase_in(start, share):
+    df = log_abstract(start)
+    day = pd.Timestamp(start).date()
+    rows, _, _, summary = calculate_eua(df, day, day + pd.Timedelta(days=30), eua_price=80.0)
+
+    # 1 t HFO x 3.114 t CO2/t per report; 5 fully and 6 half covered
+    co2 = 3.114 * len(REPORTS)
+    covered = 3.114 * 8
+    assert rows["EUA"].sum() == pytest.approx(covered * share)
+    assert summary["Total CO2 (t)"] == round(co2, 3)
+    assert summary["Covered CO2 (t)"] == round(covered, 3)
+    assert summary["EUA Required"] == round(covered * share, 3)
+    assert summary["EUA Cost (EUR)"] == round(covered * share * 80.0, 2)
+    assert (rows["Phase-in"] == share).all()
+
+
+def test_period_edges_keep_the_leg_scope():
+    df = log_abstract("2026-03-01")
+    # Only the Noon report of the outbound leg is inside the period
+    noon = df["DateTimeInUTC"].iloc[5]
+    rows, _, _, summary = calculate_eua(df, noon.date(), noon.date())
+    assert rows["Scope"].unique().tolist() == ["EU outbound"]
+    assert rows["Coverage"].eq(0.5).all()
@@ -0,0 +1,108 @@
+"""
+Pool invariants of utils.fueleu_pooling.optimize_pools.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.fueleu_pooling import BALANCE, PENALTY, optimize_pools
+
+EUR_PER_T = 2400.0
+
+
+def balances(values, year=2025, vessels=None):
+    values = np.asarray(values, dtype=float)
+    return pd.DataFrame({
+        "Vessel": vessels if vessels is not None else 9_000_001 + np.arange(len(values)),
+        "Year": year,
+        BALANCE: values,
+        PENALTY: np.where(values < 0, -values * EUR_PER_T, 0.0),
+    })
+
+
+def random_fleet(n, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.concat(
+        [balances(rng.normal(0, 300, n).round(1), year=y) for y in (2025, 2026)],
+        ignore_index=True,
+    )
+    df["Vessel"] = np.tile(9_000_001 + np.arange(n), 2)
+    return df
+
+
+def assert_pool_rules(allocation, max_pool_size=None):
+    pooled = allocation[allocation["Pool"].notna()]
+    after = allocation["Balance After Pooling (tCO2e)"]
+
+    # Every pool total is non-negative
+    assert (pooled.groupby("Pool")[BALANCE].sum() >= -1e-6).all()
+    assert (pooled.groupby("Pool")["Balance After Pooling (tCO2e)"].sum() >= -1e-6).all()
+
+    # No surplus ship ends in deficit, no deficit ship ends worse off
+    surplus = allocation[BALANCE] > 0
+    assert (after[surplus] >= -1e-6).all()
+    assert (after[~surplus] >= allocation.loc[~surplus, BALANCE] - 1e-6).all()
+    assert (allocation["Penalty After Pooling (EUR)"] <= allocation[PENALTY] + 1e-6).all()
+
+    # A pooled deficit ship is covered whole
+    pooled_deficit = pooled[pooled[BALANCE] < 0]
+    assert np.allclose(pooled_deficit["Balance After Pooling (tCO2e)"], 0.0)
+
+    # Transfers net to zero per pool, and pools stay within one year
+    assert np.allclose(pooled.groupby("Pool")["Transfer (tCO2e)"].sum(), 0.0)
+    assert (pooled.groupby("Pool")["Year"].nunique() == 1).all()
+
+    if max_pool_size:
+        assert (pooled.groupby("Pool").size() <= max_pool_size).all()
+
+
+def test_partly_coverable_deficit_stays_out():
+    allocation, summary, _ = optimize_pools(balances([100, -80, -50]))
+    assert_pool_rules(allocation)
+    assert allocation["Pool"].notna().tolist() == [True, True, False]
+    assert summary["Penalty After (EUR)"].iloc[0] == pytest.approx(50 * EUR_PER_T)
+
+
+def test_covers_the_most_valuable_whole_deficits():
+    # 100 t covers -60 and -40 exactly; greedy by size alone would take -70
+    allocation, summary, _ = optimize_pools(balances([100, -70, -60, -40]))
+    assert_pool_rules(allocation)
+    assert summary["Penalty After (EUR)"].iloc[0] == pytest.approx(70 * EUR_PER_T)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("max_pool_size", [None, 2, 3, 5])
+def test_random_fleets_respect_pool_rules(seed, max_pool_size):
+    allocation, summary, _ = optimize_pools(random_fleet(40, seed), max_pool_size=max_pool_size)
+    assert_pool_rules(allocation, max_pool_size)
+    assert (summary["Penalty After (EUR)"] <= summary["Penalty Before (EUR)"] + 1e-6).all()
+
+
+def test_capped_pools_use_remaining_surplus():
+    allocation, _, _ = optimize_pools(balances([100, 60, -130, -10, -55]), max_pool_size=2)
+    assert_pool_rules(allocation, 2)
+    # -130 fits no two-ship pool; -10 and -55 each get one
+    assert allocation["Pool"].notna().tolist() == [True, True, False, True, True]
+
+
+def test_excluded_vessels_stay_out_of_pools():
+    df = balances([100, -60, -30])
+    # Widgets hand vessel ids back as text
+    allocation, summary, _ = optimize_pools(df, excluded=[str(df["Vessel"].iloc[1])])
+    assert_pool_rules(allocation)
+    assert pd.isna(allocation["Pool"].iloc[1])
+    assert allocation["Penalty After Pooling (EUR)"].iloc[1] == allocation[PENALTY].iloc[1]
+    assert summary["Penalty After (EUR)"].iloc[0] == pytest.approx(60 * EUR_PER_T)
+
+
+def test_groups_pool_only_within_their_label():
+    df = balances([100, -60, 50, -40], vessels=["A", "B", "C", "D"])
+    allocation, _, _ = optimize_pools(df, groups={"A": "North", "B": "North", "C": "South", "D": "South"})
+    assert_pool_rules(allocation)
+    pools = dict(zip(allocation["Vessel"], allocation["Pool"]))
+    assert pools["A"] == pools["B"] != pools["C"] == pools["D"]
+
+    # A deficit alone in its group cannot be covered by another group's surplus
+    allocation, _, _ = optimize_pools(df, groups={"A": "North", "C": "North", "B": "South", "D": "South"})
+    assert_pool_rules(allocation)
+    assert allocation.set_index("Vessel")["Pool"][["B", "D"]].isna().all()
@@ -0,0 +1,90 @@
+"""
+FuelEU target intensity, compliance balance / penalty and the
+consecutive-deficit multiplier against hand-computed values.
+"""
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_log_abstract
+from utils.canonical import normalize_log_abstract
+from utils.fueleu_utils import (
+    compliance_balance,
+    consecutive_deficits,
+    fueleu_balances,
+    target_intensity,
+)
+
+
+@pytest.mark.parametrize("year, target", [
+    (2024, 91.16),                 # before the first period: reference, no reduction
+    (2025, 89.3368),               # 91.16 x (1 - 2 %)
+    (2029, 89.3368),
+    (2030, 85.6904),               # 91.16 x (1 - 6 %)
+    (2035, 77.9418),               # 91.16 x (1 - 14.5 %)
+    (2040, 62.9004),               # 91.16 x (1 - 31 %)
+    (2045, 34.6408),               # 91.16 x (1 - 62 %)
+    (2050, 18.232),                # 91.16 x (1 - 80 %)
+])
+def test_target_intensity(year, target):
+    assert target_intensity([year])[0] == pytest.approx(target)
+
+
+def test_deficit_penalty():
+    # 1e9 MJ at 90 gCO2e/MJ in 2025: (89.3368 - 90) x 1e9 g = -663.2 t CO2e
+    # penalty = 663.2e6 g / (90 g/MJ x 41 000 MJ/t) x 2400 EUR/t = EUR 431 349.59
+    intensity, target, balance, penalty = compliance_balance([1e9], [10e9], [80e9], [2025])
+    assert intensity[0] == pytest.approx(90.0)
+    assert target[0] == pytest.approx(89.3368)
+    assert balance[0] == pytest.approx(-663.2)
+    assert penalty[0] == pytest.approx(431_349.59, abs=0.01)
+
+
+def test_surplus_has_no_penalty():
+    # 85 gCO2e/MJ in 2025: (89.3368 - 85) x 1e9 g = +4336.8 t CO2e
+    _, _, balance, penalty = compliance_balance([1e9], [5e9], [80e9], [2025])
+    assert balance[0] == pytest.approx(4336.8)
+    assert penalty[0] == 0.0
+
+
+def test_no_penalty_before_the_first_period():
+    # 2024 deficit against the unreduced reference: 91.16 - 92 = -0.84 g/MJ
+    _, _, balance, penalty = compliance_balance([1e9], [12e9], [80e9], [2024])
+    assert balance[0] == pytest.approx(-840.0)
+    assert penalty[0] == 0.0
+
+
+def test_no_energy_no_balance():
+    intensity, _, balance, penalty = compliance_balance([0.0], [0.0], [0.0], [2025])
+    assert np.isnan(intensity[0])
+    assert balance[0] == 0.0
+    assert penalty[0] == 0.0
+
+
+@pytest.mark.parametrize("streak, factor", [(0, 1.0), (1, 1.1), (2, 1.2), (5, 1.5)])
+def test_consecutive_deficit_multiplier(streak, factor):
+    # Penalty x (1 + streak / 10) on top of the single-year penalty above
+    penalty = compliance_balance([1e9], [10e9], [80e9], [2025], consecutive_deficits=[streak])[3]
+    assert penalty[0] == pytest.approx(431_349.59 * factor, abs=0.01)
+
+
+def test_consecutive_deficits_count():
+    vessel = ["A", "A", "A", "A", "A", "B", "B", "B"]
+    year = [2025, 2026, 2027, 2028, 2030, 2025, 2026, 2027]
+    deficit = [True, True, False, True, True, True, True, True]
+    # A: 2027 is a surplus (resets), 2030 follows a gap year; B starts over
+    assert consecutive_deficits(vessel, year, deficit).tolist() == [0, 1, 2, 0, 0, 0, 1, 2]
+
+
+def test_fueleu_balances_applies_multiplier_per_vessel():
+    # Conventional fuel only: every vessel is in deficit every year
+    df = normalize_log_abstract(make_log_abstract(vessels=2, years=3, start="2025-01-01", seed=1))
+    out = fueleu_balances(df)
+    out = out[out["Year"] <= 2027]
+    assert (out["Compliance Balance (tCO2e)"] < 0).all()
+
+    single_year = (
+        -out["Compliance Balance (tCO2e)"] * 1e6
+        / (out["GHG Intensity (gCO2e/MJ)"] * 41_000) * 2400
+    )
+    factor = (out["Penalty (EUR)"] / single_year).round(6)
+    assert factor.tolist() == [1.0, 1.1, 1.2] * 2
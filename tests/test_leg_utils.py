@@ -0,0 +1,134 @@
+"""
+Parity of the vectorised leg_utils.assign_legs with the previous
+row-by-row state machine, for a single vessel and per vessel key, and
+the voyage slices of voyage_row_index.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_log_abstract
+from utils.canonical import normalize_log_abstract
+from utils.leg_utils import assign_legs, voyage_row_index
+
+
+# --------------------------------------------------
+# REFERENCE (previous row-by-row implementation)
+# --------------------------------------------------
+def assign_legs_loop(df):
+    df = df.copy()
+    df["DateTimeInUTC"] = pd.to_datetime(df["DateTimeInUTC"], errors="coerce")
+    df = df.sort_values("DateTimeInUTC")
+
+    leg_id = 0
+    active_leg = False
+    leg_ids = []
+
+    for _, row in df.iterrows():
+        event = str(row.get("EventType", "")).lower()
+
+        if "departure" in event:
+            leg_id += 1
+            active_leg = True
+
+        leg_ids.append(f"LEG-{leg_id}" if active_leg else None)
+
+        if "arrival" in event and active_leg:
+            active_leg = False
+
+    df["Leg_ID"] = leg_ids
+    return df
+
+
+def assign_legs_loop_per_vessel(df, vessel_col):
+    # The loop numbered legs over the whole frame; run it vessel by vessel
+    return pd.concat(
+        [assign_legs_loop(group) for _, group in df.groupby(vessel_col, sort=True)]
+    )
+
+
+def edge_frame():
+    """Event sequences the state machine has to get right."""
+    events = [
+        "Noon (Sea)",          # before the first departure: no leg
+        "Arrival",             # arrival with no open leg
+        "Departure",
+        "Noon (Sea)",
+        "DEPARTURE",           # second departure without arrival opens a new leg
+        None,                  # missing event inside a leg
+        "Arrival",             # closes the leg, inclusive
+        "Arrival",             # a second arrival stays outside
+        "Idle In Port",
+        "Departure / Arrival", # opens and closes on the same report
+        "Noon (Sea)",
+        " departure ",         # padded lower-case spelling
+        "Drifting",
+    ]
+    df = pd.DataFrame({
+        "DateTimeInUTC": pd.date_range("2023-03-01", periods=len(events), freq="6h"),
+        "EventType": events,
+    })
+    df.loc[8, "DateTimeInUTC"] = pd.NaT    # unparseable timestamp sorts last
+    # Shuffled, so both have to order the reports themselves
+    return df.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def assert_parity(actual, expected):
+    assert sorted(actual.index) == sorted(expected.index)
+    actual = actual["Leg_ID"].sort_index()
+    expected = expected["Leg_ID"].sort_index()
+    assert actual.isna().equals(expected.isna())
+    assert (actual.dropna() == expected.dropna()).all()
+
+
+def test_edge_cases_match_loop():
+    df = edge_frame()
+    assert_parity(assign_legs(df), assign_legs_loop(df))
+
+
+def test_synthetic_frame_matches_loop():
+    df = normalize_log_abstract(make_log_abstract(2_000, freq_hours=2, seed=4))
+    df = df.sample(frac=1, random_state=4)
+    legged = assign_legs(df)
+    assert legged["Leg_ID"].notna().any()
+    assert_parity(legged, assign_legs_loop(df))
+
+
+@pytest.mark.parametrize("vessel_col", ["IMO", "VesselName"])
+def test_fleet_frame_matches_loop_per_vessel(vessel_col):
+    df = normalize_log_abstract(make_log_abstract(vessels=4, years=0.25, seed=5))
+    # Vessels interleaved in time, as in a merged fleet export
+    df = df.sample(frac=1, random_state=5)
+
+    legged = assign_legs(df, vessel_col=vessel_col)
+    assert_parity(legged, assign_legs_loop_per_vessel(df, vessel_col))
+
+    # Legs restart at LEG-1 for every vessel
+    first = legged.dropna(subset=["Leg_ID"]).groupby(vessel_col)["Leg_ID"].first()
+    assert (first == "LEG-1").all()
+    # Rows come back grouped by vessel, each in time order
+    assert legged[vessel_col].is_monotonic_increasing
+    assert legged.groupby(vessel_col)["DateTimeInUTC"].apply(lambda s: s.is_monotonic_increasing).all()
+
+
+def test_vessel_key_is_found_without_vessel_col():
+    df = normalize_log_abstract(make_log_abstract(vessels=3, years=0.25, seed=6))
+    df = df.sample(frac=1, random_state=6)
+    assert_parity(assign_legs(df), assign_legs_loop_per_vessel(df, "IMO"))
+
+
+def test_voyage_row_index_with_mixed_voyage_numbers():
+    df = pd.DataFrame({
+        "DateTimeInUTC": pd.date_range("2023-03-01", periods=7, freq="6h"),
+        "VoyageNumber": [101, 101, "V102", None, "V102", 103, 101],
+    }).sample(frac=1, random_state=0)
+
+    frame, rows = voyage_row_index(df)
+    # Voyages in order of first report, each contiguous in time order
+    assert list(rows) == [101, "V102", 103]
+    for voyage, where in rows.items():
+        part = frame.iloc[where]
+        assert (part["VoyageNumber"] == voyage).all()
+        assert part["DateTimeInUTC"].is_monotonic_increasing
+    assert len(frame) == 7 and pd.isna(frame["VoyageNumber"].iloc[-1])
+    assert sum(len(frame.iloc[w]) for w in rows.values()) == 6
@@ -0,0 +1,113 @@
+"""
+MonthlyStore.refresh / append against a full recompute, and vessel identity.
+"""
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+from benchmarks.synthetic import make_log_abstract
+from utils.canonical import normalize_log_abstract
+from utils.monthly_report import MonthlyStore, aggregate_months, store_path, vessel_imo
+
+
+@pytest.fixture(scope="module")
+def export():
+    return normalize_log_abstract(make_log_abstract(years=1, freq_hours=12, seed=3))
+
+
+def months(df, first, last):
+    return df[(df["DateUTC"] >= first) & (df["DateUTC"] < last)]
+
+
+def assert_matches_full(store, df):
+    expected = aggregate_months(df)
+    actual = store.buckets.reindex(columns=expected.columns)
+    tm.assert_frame_equal(actual, expected, check_freq=False, check_names=False, check_dtype=False)
+
+
+def test_refresh_matches_full_recompute(export):
+    store = MonthlyStore()
+    assert len(store.refresh(export)) == 12
+    assert_matches_full(store, export)
+    assert store.refresh(export) == []
+
+
+def test_refresh_recomputes_only_changed_months(export):
+    store = MonthlyStore()
+    store.refresh(export)
+
+    edited = export.copy()
+    edited.loc[edited["DateUTC"].dt.month == 5, "Distance"] += 1.0
+    assert store.refresh(edited) == [pd.Timestamp("2023-05-01")]
+    assert_matches_full(store, edited)
+
+
+def test_partial_upload_keeps_stored_months(export):
+    store = MonthlyStore()
+    store.refresh(months(export, "2023-01-01", "2023-07-01"))
+    store.refresh(months(export, "2023-07-01", "2024-01-01"))
+    assert_matches_full(store, export)
+
+    # Re-uploading only the last month changes nothing else
+    assert store.refresh(months(export, "2023-12-01", "2024-01-01")) == []
+    assert_matches_full(store, export)
+
+
+def test_append_matches_full_recompute(export):
+    # Split inside a month, so two appends add into the same bucket
+    cut = export["DateTimeInUTC"].iloc[len(export) // 2]
+    store = MonthlyStore()
+    store.append(export[export["DateTimeInUTC"] < cut])
+    store.append(export[export["DateTimeInUTC"] >= cut])
+    assert_matches_full(store, export)
+
+    # Appended fingerprints add up to the full export's
+    full = MonthlyStore()
+    full.refresh(export)
+    tm.assert_series_equal(store.fingerprints, full.fingerprints, check_names=False, check_index_type=False, check_freq=False)
+
+
+def test_save_load_round_trip(export, tmp_path):
+    store = MonthlyStore()
+    store.refresh(export)
+    store.save(tmp_path / "store.parquet")
+
+    loaded = MonthlyStore.load(tmp_path / "store.parquet")
+    assert loaded.imo == store.imo == "9000000"
+    assert loaded.refresh(export) == []
+    assert_matches_full(loaded, export)
+
+
+def test_store_refuses_another_vessel(export):
+    store = MonthlyStore()
+    store.refresh(export)
+
+    other = export.assign(IMO=9_123_456)
+    with pytest.raises(ValueError, match="9123456"):
+        store.refresh(other)
+    with pytest.raises(ValueError, match="9123456"):
+        store.append(other)
+    assert_matches_full(store, export)
+
+
+def test_vessel_imo(export):
+    assert vessel_imo(export) == "9000000"
+    assert vessel_imo(export.assign(IMO=export["IMO"].astype(float))) == "9000000"
+    assert vessel_imo(export.assign(IMO=export["IMO"].astype(str))) == "9000000"
+
+    mixed = export.copy()
+    mixed.loc[mixed.index[:3], "IMO"] = 9_123_456
+    with pytest.raises(ValueError, match="mixes 2 vessels"):
+        vessel_imo(mixed)
+    with pytest.raises(ValueError, match="No IMO column"):
+        vessel_imo(export.drop(columns="IMO"))
+    with pytest.raises(ValueError, match="No IMO number"):
+        vessel_imo(export.assign(IMO=np.nan))
+
+
+def test_store_path_is_keyed_by_imo():
+    assert store_path(9000001) == store_path("9000001") == store_path(9000001.0)
+    assert store_path(9000001).name == "IMO9000001.parquet"
+    with pytest.raises(ValueError):
+        store_path("../")
@@ -0,0 +1,84 @@
+"""
+Parity of the vectorised cii_utils.classify_operation_by_events_in_range
+with the previous row-by-row implementation (benchmarks.bench_operations).
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_operations import FUEL_COLS, classify_operation_by_events_loop, make_frame
+from utils.cii_utils import classify_operation_by_events_in_range
+
+DATE_FROM, DATE_TO = date(2023, 3, 1), date(2023, 3, 2)
+
+
+def edge_frame():
+    """Reports around the range boundaries and every event spelling the classifier meets."""
+    rows = [
+        # (DateTimeInUTC, EventType, TimeSincePreviousReport)
+        ("2023-02-28 23:59:59", "Noon (Sea)", 6.0),          # just before the range
+        ("2023-03-01 00:00:00", "Departure", 1.5),           # first instant of the range
+        ("2023-03-01 06:00:00", " Noon (Sea) ", 6.0),        # padded spelling
+        ("2023-03-01 08:00:00", "BOSP", 2.0),
+        ("2023-03-01 09:00:00", "Drifting", 1.0),
+        ("2023-03-01 10:00:00", "Awaiting Orders", np.nan),  # missing interval
+        ("2023-03-01 12:00:00", "Stopping Engine", 2.0),
+        ("2023-03-01 13:00:00", "Arrival", 1.0),
+        ("2023-03-01 18:00:00", "IDLE IN PORT", 5.0),        # upper-case variant
+        ("2023-03-01 20:00:00", "Loading", 2.0),
+        ("2023-03-01 22:00:00", "LOADING", 2.0),
+        ("2023-03-02 01:00:00", "Bunkering", 3.0),           # not classified
+        ("2023-03-02 02:00:00", None, 1.0),                  # missing event
+        ("2023-03-02 04:00:00", "Shifting to Berth", 2.0),
+        ("2023-03-02 10:00:00", "Discharging", 6.0),
+        ("2023-03-02 23:59:59", "Idle In Port", 13.98),      # last second of the range
+        ("2023-03-03 00:00:00", "Idle In Port", 0.01),       # just after the range
+        (None, "Noon (Sea)", 6.0),                           # unparseable timestamp
+    ]
+    df = pd.DataFrame(rows, columns=["DateTimeInUTC", "EventType", "TimeSincePreviousReport"])
+    df["DateTimeInUTC"] = pd.to_datetime(df["DateTimeInUTC"])
+
+    rng = np.random.default_rng(0)
+    for col in FUEL_COLS:
+        df[col] = rng.uniform(0, 2, len(df)).round(3)
+    df.loc[3, "MEConsumptionHFO"] = np.nan                   # consumption gap
+    # Shuffled, so the classifier has to order the reports itself
+    return df.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def assert_parity(df, date_from, date_to):
+    expected = classify_operation_by_events_loop(df, date_from, date_to)
+    actual = classify_operation_by_events_in_range(df, date_from, date_to)
+
+    assert list(actual) == list(expected)
+    for key, value in expected.items():
+        if pd.isna(value):
+            assert pd.isna(actual[key]), key
+        else:
+            assert actual[key] == value, key
+
+
+@pytest.mark.parametrize("date_from, date_to", [
+    (DATE_FROM, DATE_TO),
+    (DATE_FROM, DATE_FROM),
+    (date(2023, 3, 2), date(2023, 3, 2)),
+    (date(1990, 1, 1), date(1990, 1, 2)),                     # empty range
+])
+def test_edge_cases_match_loop(date_from, date_to):
+    assert_parity(edge_frame(), date_from, date_to)
+
+
+@pytest.mark.parametrize("date_from, date_to", [
+    (date(2023, 1, 1), date(2060, 12, 31)),
+    (date(2023, 2, 1), date(2023, 2, 3)),
+])
+def test_synthetic_frame_matches_loop(date_from, date_to):
+    assert_parity(make_frame(5_000), date_from, date_to)
+
+
+def test_missing_intervals_match_loop():
+    df = make_frame(5_000)
+    df.loc[df.index[:5], "TimeSincePreviousReport"] = np.nan
+    assert_parity(df, date(2023, 1, 1), date(2060, 12, 31))
@@ -0,0 +1,124 @@
+"""
+One case per utils.validation rule (its Code bit) and exclude_rows.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.canonical import normalize_log_abstract
+from utils.validation import ERROR_RULES, RULES, exclude_rows, validate_reports
+
+ROWS = 12
+TARGET = 105   # index label of the report each case breaks
+
+
+def reports(vessels=1):
+    """Clean 6-hourly noon reports at 12 kn and 1 t HFO each, indexed from 100."""
+    ts = pd.date_range("2025-01-01", periods=ROWS, freq="6h")
+    df = pd.DataFrame({
+        "IMO": np.repeat(9_000_001 + np.arange(vessels), ROWS),
+        "DateTimeInUTC": np.tile(ts, vessels),
+        "EventType": "Noon (Sea)",
+        "TimeSincePreviousReport": 6.0,
+        "Distance": 72.0,
+        "MEConsumptionHFO": 1.0,
+    })
+    df["DateUTC"] = df["DateTimeInUTC"].dt.normalize()
+    df.index = 100 + np.arange(len(df))
+    return normalize_log_abstract(df)
+
+
+def bit(rule):
+    return 1 << list(RULES).index(rule)
+
+
+def codes(issues):
+    return dict(zip(issues["Row"], issues["Code"]))
+
+
+CASES = {
+    "missing_timestamp": ("DateTimeInUTC", pd.NaT),
+    "duplicate_timestamp": ("DateTimeInUTC", pd.Timestamp("2025-01-01 18:00")),  # = row 104
+    "negative_distance": ("Distance", -1.0),
+    "absurd_distance": ("Distance", 900.0),
+    "negative_fuel": ("MEConsumptionHFO", -0.5),
+    "interval_mismatch": ("TimeSincePreviousReport", 12.0),
+    "missing_interval": ("TimeSincePreviousReport", np.nan),
+    "fuel_spike": ("MEConsumptionHFO", 20.0),
+    "unknown_event": ("EventType", "Bunkering"),
+}
+
+
+def test_clean_reports_pass():
+    issues, summary = validate_reports(reports())
+    assert issues.empty
+    assert summary["Checked"].all()
+    assert (summary["Rows"] == 0).all()
+
+
+def test_every_rule_has_a_case():
+    assert set(CASES) == set(RULES)
+
+
+@pytest.mark.parametrize("rule", list(RULES))
+def test_rule_sets_its_bit(rule):
+    column, value = CASES[rule]
+    df = reports()
+    df.loc[TARGET, column] = value
+
+    issues, summary = validate_reports(df)
+    flagged = {row for row, code in codes(issues).items() if code & bit(rule)}
+    assert flagged == {TARGET}
+    assert summary.set_index("Rule").loc[rule, "Rows"] == 1
+
+    severity = issues.set_index("Row").loc[TARGET, "Severity"]
+    assert severity == ("error" if rule in ERROR_RULES else "warning")
+    assert rule in issues.set_index("Row").loc[TARGET, "Issues"].split(", ")
+
+
+def test_implied_speed_is_absurd():
+    # 300 NM in 6 h is 50 kn, though under the distance cap
+    df = reports()
+    df.loc[TARGET, "Distance"] = 300.0
+    issues, _ = validate_reports(df)
+    assert codes(issues) == {TARGET: bit("absurd_distance")}
+
+
+def test_same_timestamp_on_another_vessel_is_not_a_duplicate():
+    issues, _ = validate_reports(reports(vessels=2))
+    assert issues.empty
+
+
+def test_rules_without_columns_are_skipped():
+    _, summary = validate_reports(reports().drop(columns=["Distance", "TimeSincePreviousReport"]))
+    checked = summary.set_index("Rule")["Checked"]
+    assert not checked[["negative_distance", "absurd_distance", "interval_mismatch", "missing_interval"]].any()
+    assert checked[["missing_timestamp", "negative_fuel", "unknown_event"]].all()
+
+
+def test_exclude_rows_drops_exactly_the_flagged_rows():
+    df = reports()
+    df.loc[102, "Distance"] = -1.0                  # error
+    df.loc[104, "MEConsumptionHFO"] = -0.5          # error
+    df.loc[107, "EventType"] = "Bunkering"          # warning only
+    df.loc[109, "TimeSincePreviousReport"] = np.nan  # warning only
+
+    issues, _ = validate_reports(df)
+    assert set(issues["Row"]) == {102, 104, 107, 109}
+
+    kept = exclude_rows(df, issues)
+    assert list(kept.index) == [i for i in df.index if i not in (102, 104)]
+    assert kept.attrs["canonical"]
+
+    kept = exclude_rows(df, issues, rules=["unknown_event"])
+    assert list(kept.index) == [i for i in df.index if i != 107]
+
+    kept = exclude_rows(df, issues, rules=list(RULES))
+    assert list(kept.index) == [i for i in df.index if i not in (102, 104, 107, 109)]
+
+
+def test_exclude_rows_without_errors_returns_the_frame():
+    df = reports()
+    df.loc[TARGET, "EventType"] = "Bunkering"
+    issues, _ = validate_reports(df)
+    assert exclude_rows(df, issues) is df
@@ -0,0 +1,155 @@
+"""
+Background calculations for the pages.
+
+Page calculations are submitted to a process-wide thread pool and run
+as a Job: a fixed list of named stages the task walks through with
+`with job.stage(name):`. The script thread only polls the job's
+progress, so the UI stays responsive while it runs.
+
+Cancellation is cooperative: Job.cancel() sets a flag that the task
+sees at the next stage boundary (or job.check() call) and the task
+then ends with Cancelled, leaving no partial result. Pages cancel a
+running job as soon as its inputs are superseded.
+
+Threads rather than processes: results (frames, range indexes) are
+handed back to the session without pickling, and the heavy pandas /
+numpy work releases the GIL.
+"""
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from utils import profiling
+
+MAX_WORKERS = int(os.environ.get("EMISSIONS_WORKERS", min(4, os.cpu_count() or 1)))
+
+_lock = threading.Lock()
+_pool = None
+
+
+class Cancelled(Exception):
+    """Raised inside a task whose job was cancelled."""
+
+
+def _executor():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="emissions-job")
+        return _pool
+
+
+# --------------------------------------------------
+# JOB
+# --------------------------------------------------
+class Job:
+    """
+    One submitted calculation. `key` identifies its inputs; `stages`
+    are the stage names in the order the task enters them.
+    """
+
+    def __init__(self, key, stages):
+        self.key = key
+        self.stages = list(stages)
+        self.current = None
+        self.completed = 0
+        self.timings = {}                    # stage -> seconds
+        self.recorder = None
+        self.submitted = time.perf_counter()
+        self.finished = None
+        self._cancel = threading.Event()
+        self._future = None
+
+    # ---------------- task side ----------------
+    def check(self):
+        """Raises Cancelled if the job was cancelled."""
+        if self._cancel.is_set():
+            raise Cancelled(self.key)
+
+    @contextmanager
+    def stage(self, name):
+        self.check()
+        self.current = name
+        t0 = time.perf_counter()
+        with profiling.stage(name):
+            yield
+        self.timings[name] = time.perf_counter() - t0
+        self.completed += 1
+        self.check()
+
+    # ---------------- page side ----------------
+    def cancel(self):
+        self._cancel.set()
+        if self._future is not None:
+            self._future.cancel()            # drops it if still queued
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def done(self):
+        return self._future is not None and self._future.done()
+
+    def error(self):
+        """Exception the task ended with (None on success or cancellation)."""
+        if not self.done() or self._future.cancelled():
+            return None
+        exc = self._future.exception()
+        return None if isinstance(exc, Cancelled) else exc
+
+    def result(self):
+        return self._future.result()
+
+    def progress(self):
+        """(fraction 0..1, label) for a progress bar."""
+        total = len(self.stages) or 1
+        if self.done():
+            return 1.0, "Done"
+        if self.current is None:
+            return 0.0, "Queued"
+        step = min(self.completed + 1, total)
+        elapsed = time.perf_counter() - self.submitted
+        return self.completed / total, f"Stage {step}/{total}: {self.current} ({elapsed:.1f} s)"
+
+
+def _run(job, fn, args, kwargs):
+    job.check()
+    try:
+        if job.recorder is None:
+            return fn(job, *args, **kwargs)
+        with profiling.recording(job.recorder):
+            return fn(job, *args, **kwargs)
+    finally:
+        job.finished = time.perf_counter()
+
+
+def submit(key, fn, *args, stages=(), **kwargs):
+    """
+    Runs fn(job, *args, **kwargs) on the worker pool and returns the
+    Job. When profiling is active for the caller, the job records into
+    its own Recorder (job.recorder) that the page can merge on completion.
+    That recorder holds its own tracemalloc reference until the job
+    ends, so memory figures survive the page run that submitted it.
+    """
+    job = Job(key, stages)
+    parent = profiling.current()
+    if parent is not None:
+        job.recorder = profiling.Recorder(memory=parent.memory, label=f"{parent.label} (background)")
+
+    # Worker threads start from an empty context; run in a copy of ours
+    ctx = contextvars.copy_context()
+    job._future = _executor().submit(ctx.run, _run, job, fn, args, kwargs)
+    if job.recorder is not None:
+        # Also fires when the job is cancelled before it starts
+        recorder = job.recorder
+        job._future.add_done_callback(lambda _: recorder.close())
+    return job
+
+
+def supersede(job, key):
+    """Cancels job if it is still running for inputs other than key. Returns job."""
+    if job is not None and job.key != key and not job.done():
+        job.cancel()
+    return job
@@ -0,0 +1,62 @@
+from fnmatch import fnmatchcase
+
+import pandas as pd
+
+from utils.fuel_registry import row_co2
+from utils.profiling import profiled
+
+# --------------------------------------------------
+# CANONICAL NOON-REPORT FRAME
+# --------------------------------------------------
+TIMESTAMP_COLUMNS = ["DateUTC", "DateTimeInUTC"]
+
+# Coerced to float, NaN -> 0
+FILLED_COLUMNS = ["Distance", "TimeElapsed*", "*Consumption*"]
+
+# Coerced to float, NaN kept (a missing interval is not a zero interval)
+NUMERIC_COLUMNS = ["TimeSincePreviousReport", "DraftDisplacementActual"]
+
+# Per-row CO2 in tonnes, from every *Consumption<fuel> column
+CO2_COLUMN = "CO2Tonnes"
+
+
+def _matching(columns, patterns):
+    return [c for c in columns if any(fnmatchcase(c, p) for p in patterns)]
+
+
+@profiled
+def normalize_log_abstract(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Builds the canonical frame every calculator in utils/ consumes:
+    stripped headers, parsed timestamps, numeric fuel / distance
+    columns with NaN filled and a precomputed CO2Tonnes column.
+
+    The result is flagged in df.attrs and is treated as read-only;
+    utils derive new frames from it instead of writing into it.
+    """
+    columns = {}
+    names = [str(c).strip() for c in df.columns]
+
+    for name, col in zip(names, df.columns):
+        s = df[col]
+        if name in TIMESTAMP_COLUMNS:
+            s = pd.to_datetime(s, errors="coerce")
+        elif _matching([name], FILLED_COLUMNS):
+            s = pd.to_numeric(s, errors="coerce").fillna(0).astype(float)
+        elif name in NUMERIC_COLUMNS:
+            s = pd.to_numeric(s, errors="coerce")
+        columns[name] = s
+
+    out = pd.DataFrame(columns, index=df.index)
+    out[CO2_COLUMN] = row_co2(out)
+    out.attrs["canonical"] = True
+    return out
+
+
+def is_canonical(df: pd.DataFrame) -> bool:
+    return bool(df.attrs.get("canonical"))
+
+
+def ensure_canonical(df: pd.DataFrame) -> pd.DataFrame:
+    """No-op for frames that are already canonical."""
+    return df if is_canonical(df) else normalize_log_abstract(df)
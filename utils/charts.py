@@ -0,0 +1,234 @@
+"""
+Shared chart layer for the pages.
+
+Charts are drawn by a callback onto a fresh figure, rendered to PNG,
+and the figure is closed before returning. The PNG is kept in a
+process-wide LRU cache keyed by a fingerprint of the chart inputs, so
+reruns with unchanged inputs skip matplotlib entirely. Long series are
+downsampled (LTTB) to about one point per horizontal pixel first.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from utils.profiling import profiled
+
+DPI = 100
+MAX_CHART_CACHE_BYTES = int(os.environ.get("EMISSIONS_CHART_CACHE_MB", 64)) * 1024 * 1024
+
+_lock = threading.Lock()
+_cache = OrderedDict()                       # fingerprint -> PNG bytes
+_size = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+# --------------------------------------------------
+# FINGERPRINT
+# --------------------------------------------------
+def _feed(h, obj):
+    if isinstance(obj, pd.DataFrame):
+        h.update(b"df")
+        h.update("\x1f".join(map(str, obj.columns)).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(b"s")
+        h.update(str(obj.name).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(b"a")
+        h.update(str(obj.dtype).encode("ascii"))
+        h.update(np.ascontiguousarray(obj).tobytes() if obj.dtype != object else repr(obj.tolist()).encode("utf-8"))
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"(")
+        for item in obj:
+            _feed(h, item)
+        h.update(b")")
+    elif isinstance(obj, dict):
+        h.update(b"{")
+        for k in sorted(obj, key=str):
+            _feed(h, k)
+            _feed(h, obj[k])
+        h.update(b"}")
+    else:
+        h.update(repr(obj).encode("utf-8"))
+    h.update(b"\0")
+
+
+def fingerprint(*inputs) -> str:
+    h = hashlib.sha256()
+    for obj in inputs:
+        _feed(h, obj)
+    return h.hexdigest()
+
+
+# --------------------------------------------------
+# DOWNSAMPLING
+# --------------------------------------------------
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that
+    keep the visual shape of (x, y). x must be sorted and numeric.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket edges for the n - 2 interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    out = np.empty(threshold, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (last point for the final bucket)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+
+    return out
+
+
+def downsample(df, x, ys, max_points):
+    """
+    Rows of df to plot for x against each of ys: the union of the LTTB
+    picks per y column, NaN x / y values dropped. Numeric and datetime x
+    are supported, text x is parsed as dates; df is returned unchanged
+    when x is neither.
+    """
+    if len(df) <= max_points:
+        return df
+
+    xs = df[x]
+    if not pd.api.types.is_numeric_dtype(xs) or pd.api.types.is_bool_dtype(xs):
+        if not pd.api.types.is_datetime64_any_dtype(xs):
+            xs = pd.to_datetime(xs, errors="coerce")
+            if xs.isna().all():
+                return df
+        valid = xs.notna().to_numpy()
+        xv = np.where(valid, xs.to_numpy(dtype="datetime64[ns]").view("int64"), 0).astype(float)
+    else:
+        xv = xs.to_numpy(dtype=float, na_value=np.nan)
+        valid = ~np.isnan(xv)
+
+    keep = np.zeros(len(df), dtype=bool)
+    for col in [ys] if isinstance(ys, str) else ys:
+        yv = df[col].to_numpy(dtype=float, na_value=np.nan)
+        ok = np.flatnonzero(valid & ~np.isnan(yv))
+        if len(ok):
+            keep[ok[lttb(xv[ok], yv[ok], max_points)]] = True
+
+    return df[keep]
+
+
+def points_for(figsize, dpi=DPI):
+    """About one point per horizontal pixel of the figure."""
+    return int(figsize[0] * dpi)
+
+
+# --------------------------------------------------
+# FIGURE LIFECYCLE & CACHE
+# --------------------------------------------------
+@contextmanager
+def figure(figsize, **subplot_kw):
+    """(fig, ax) that is always closed on exit."""
+    fig, ax = plt.subplots(figsize=figsize, **subplot_kw)
+    try:
+        yield fig, ax
+    finally:
+        plt.close(fig)
+
+
+def _evict():
+    global _size
+    while _size > MAX_CHART_CACHE_BYTES and len(_cache) > 1:
+        _, png = _cache.popitem(last=False)
+        _size -= len(png)
+        _stats["evictions"] += 1
+
+
+@profiled
+def render(name, draw, *inputs, figsize=(6, 3), dpi=DPI):
+    """
+    PNG bytes of the chart draw(fig, ax) produces. `name` and `inputs`
+    must fully determine the chart; they form the cache key.
+    """
+    global _size
+    key = fingerprint(name, figsize, dpi, *inputs)
+
+    with _lock:
+        png = _cache.get(key)
+        if png is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return png
+        _stats["misses"] += 1
+
+    with figure(figsize) as (fig, ax):
+        draw(fig, ax)
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+    png = buf.getvalue()
+
+    with _lock:
+        if key not in _cache:
+            _cache[key] = png
+            _size += len(png)
+            _evict()
+    return png
+
+
+def chart_stats():
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "entries": len(_cache),
+            "bytes": _size,
+            "hit_rate": round(_stats["hits"] / total, 3) if total else 0.0,
+        }
+
+
+def clear_charts():
+    global _size
+    with _lock:
+        _cache.clear()
+        _size = 0
+
+
+# --------------------------------------------------
+# COMMON CHARTS
+# --------------------------------------------------
+def pie_chart(values, labels, title, unit="", figsize=(4, 4), textprops=None, title_size=None):
+    """Pie with "value unit (pct%)" labels; zero slices unlabelled."""
+    values = [float(v) for v in values]
+    total = sum(values)
+
+    def _autopct(pct):
+        val = pct * total / 100.0
+        return "" if val <= 0 else f"{val:.1f}{unit}\n({pct:.1f}%)"
+
+    def draw(fig, ax):
+        ax.pie(values, labels=labels, autopct=_autopct, startangle=90, textprops=textprops)
+        ax.set_title(title, fontsize=title_size)
+
+    return render("pie", draw, values, labels, title, unit, textprops, title_size, figsize=figsize)
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+from utils.cii_utils import REDUCTION_FACTORS, cii_ratings, reference_params
+from utils.fuel_registry import CO2_FACTORS, LCV_MJ_PER_KG, fuel_totals_by_type
+from utils.profiling import profiled
+from utils.range_index import build_range_index
+
+DEFAULT_YEARS = sorted(REDUCTION_FACTORS)
+DEFAULT_SWITCH_PCTS = (0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100)
+
+
+# --------------------------------------------------
+# BASELINE (aggregated once per period)
+# --------------------------------------------------
+@profiled
+def period_baseline(df, date_from, date_to, index=None):
+    """
+    Distance and fuel-by-type totals for the period, the only
+    inputs the scenario grid needs.
+    """
+    if index is None:
+        index = build_range_index(df)
+
+    lo, hi = index.span(date_from, date_to, whole_days=True)
+
+    return {
+        "distance": index.total("Distance", lo, hi),
+        "fuel": fuel_totals_by_type(index.totals(lo, hi, like="Consumption")),
+    }
+
+
+# --------------------------------------------------
+# SCENARIO GRID
+# --------------------------------------------------
+@profiled
+def scenario_grid(
+    baseline,
+    ship_type,
+    dwts,
+    years=DEFAULT_YEARS,
+    switch_from="HFO",
+    switch_to=("MGO", "LNG"),
+    switch_pcts=DEFAULT_SWITCH_PCTS,
+    distance_factors=(1.0,),
+):
+    """
+    Evaluates every DWT x year x fuel switch x switch % x distance
+    factor combination as one NumPy broadcast.
+
+    A switch replaces pct% of switch_from on an equal-energy basis
+    (LCV ratio); distance factors scale the period distance with the
+    fuel unchanged. Years must have a reduction factor; unknown years
+    raise ValueError. Returns one row per scenario.
+    """
+    dwts = np.asarray(dwts, dtype=float)
+    years = np.asarray(years, dtype=int)
+    unknown = sorted(set(years.tolist()) - set(REDUCTION_FACTORS))
+    if unknown:
+        raise ValueError(f"No CII reduction factor for year(s) {unknown}")
+    targets = list(switch_to)
+    pcts = np.asarray(switch_pcts, dtype=float)
+    dist_f = np.asarray(distance_factors, dtype=float)
+
+    fuel = baseline["fuel"]
+    base_co2 = sum(fuel[f] * CO2_FACTORS[f] for f in fuel)
+    moved = fuel.get(switch_from, 0.0) * pcts / 100                       # (P,)
+
+    # CO2 per target fuel and switch %                                     (F, P)
+    delta = np.array([
+        moved * (LCV_MJ_PER_KG[switch_from] / LCV_MJ_PER_KG[t] * CO2_FACTORS[t]
+                 - CO2_FACTORS[switch_from])
+        for t in targets
+    ]).reshape(len(targets), len(pcts))
+    co2 = base_co2 + delta
+
+    # Reference line a * dwt ** -c and reduction per year                  (D, Y)
+    a, c = reference_params(ship_type)
+    reduction = np.array([REDUCTION_FACTORS[int(y)] for y in years])
+    required = (1 - reduction)[None, :] * (a * dwts ** (-c))[:, None]
+
+    # Attained AER over (D, F, P, K)
+    distance = baseline["distance"] * dist_f
+    with np.errstate(divide="ignore", invalid="ignore"):
+        attained = np.where(
+            distance[None, None, None, :] > 0,
+            co2[None, :, :, None] * 1_000_000
+            / (dwts[:, None, None, None] * distance[None, None, None, :]),
+            np.nan,
+        )
+
+    # Full grid (D, Y, F, P, K)
+    shape = (len(dwts), len(years), len(targets), len(pcts), len(dist_f))
+    attained_g = np.broadcast_to(attained[:, None], shape)
+    required_g = np.broadcast_to(required[:, :, None, None, None], shape)
+    ratings = cii_ratings(attained_g, required_g)
+
+    d_i, y_i, f_i, p_i, k_i = np.indices(shape).reshape(5, -1)
+    labels = np.array([f"{switch_from}→{t}" for t in targets], dtype=object)
+
+    return pd.DataFrame({
+        "DWT": dwts[d_i],
+        "Year": years[y_i],
+        "Switch": labels[f_i],
+        "Switch %": pcts[p_i],
+        "Distance Factor": dist_f[k_i],
+        "CO2 (MT)": co2[f_i, p_i],
+        "Attained AER": attained_g.ravel(),
+        "Required AER": required_g.ravel(),
+        "Attained / Required": (attained_g / required_g).ravel(),
+        "CII Rating": ratings.ravel(),
+    })
+
+
+def scenario_heatmap(grid, index="Year", columns="Switch %", values="Attained / Required", **filters):
+    """
+    Pivot of one slice of the grid for a heat map, e.g.
+    scenario_heatmap(grid, DWT=50000, Switch="HFO→LNG").
+    """
+    sel = grid
+    for col, val in filters.items():
+        sel = sel[sel[col.replace("_", " ")] == val]
+    return sel.pivot_table(index=index, columns=columns, values=values, aggfunc="first")
@@ -1,17 +1,16 @@
-import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
 from datetime import datetime, time as dtime
 
+from utils.canonical import CO2_COLUMN, ensure_canonical
+from utils.fuel_registry import CO2_FACTORS, co2_from_totals, fuel_columns
+from utils.profiling import profiled
+from utils.range_index import build_range_index
+
 # ---------------------------------------------------------
 # CII Utils
 # ---------------------------------------------------------
-CII_FACTORS = {
-    "HFO": 3.114,
-    "MGO": 3.206,
-    "LFO": 3.151,
-    "LNG": 2.75,
-}
+CII_FACTORS = CO2_FACTORS
 
 REFERENCE_PARAMS = {
     "Bulk Carrier": (4745, 0.622),
@@ -30,67 +29,91 @@ REDUCTION_FACTORS = {
     2028: 0.15,
 }
 
+# Columns read by calculate_cii / classify_operation_by_events_in_range
+CII_COLUMNS = [
+    "DateUTC", "Distance", "DraftDisplacementActual", "*Consumption*",
+]
+
+CII_OPERATIONS_COLUMNS = [
+    "DateTimeInUTC", "EventType", "TimeSincePreviousReport", "*Consumption*",
+]
+
+# Upper bound of each rating as a multiple of the required AER
+RATING_BOUNDARIES = [("A", 0.75), ("B", 0.90), ("C", 1.00), ("D", 1.10)]
+
+
+# -----------------------------
+# Reference line & rating
+# -----------------------------
+def reference_params(ship_type):
+    if ship_type == "Cable Layer":
+        return REFERENCE_PARAMS["General Cargo <20k"]
+    return REFERENCE_PARAMS[ship_type]
+
+
+def required_aer(ship_type, dwt, year):
+    a, c = reference_params(ship_type)
+    reduction_factor = REDUCTION_FACTORS.get(year, 0.09)
+    return (1 - reduction_factor) * a * (dwt ** (-c))
+
+
+def cii_rating(attained_aer, required_aer_value):
+    for rating, bound in RATING_BOUNDARIES:
+        if attained_aer <= bound * required_aer_value:
+            return rating
+    return "E"
+
+
+def cii_ratings(attained_aer, required_aer_value):
+    """Vectorised cii_rating over arrays (NaN attained -> None)."""
+    attained_aer = np.asarray(attained_aer, dtype=float)
+    required_aer_value = np.asarray(required_aer_value, dtype=float)
+    ratings = np.select(
+        [attained_aer <= bound * required_aer_value for _, bound in RATING_BOUNDARIES],
+        [rating for rating, _ in RATING_BOUNDARIES],
+        default="E",
+    ).astype(object)
+    ratings[np.isnan(attained_aer)] = None
+    return ratings
+
+
 # -----------------------------
 # CII Calculation
 # -----------------------------
-def calculate_cii(df, ship_type, date_from, date_to, dwt=0):
-    df["DateUTC"] = pd.to_datetime(df["DateUTC"], errors="coerce").dt.date
-    filtered = df[(df["DateUTC"] >= date_from) & (df["DateUTC"] <= date_to)]
+@profiled
+def calculate_cii(df, ship_type, date_from, date_to, dwt=0, index=None):
+    """
+    Attained / required AER and rating for the DateUTC range.
+    Pass a prebuilt TimeRangeIndex (build_range_index(df)) to answer
+    repeated ranges without rescanning the frame.
+    """
+    if index is None:
+        index = build_range_index(df)
 
-    distance = filtered.get("Distance", pd.Series([0])).sum()
+    lo, hi = index.span(date_from, date_to, whole_days=True)
+    filtered = index.rows(lo, hi)
 
-    fuel_cols = [
-        "MEConsumptionHFO", "MEConsumptionMGO",
-        "AEConsumptionHFO", "AEConsumptionMGO",
-        "BoilerConsumptionHFO", "BoilerConsumptionMGO",
-        "IGSConsumptionHFO", "IGSConsumptionMGO"
-    ]
-    for col in fuel_cols:
-        filtered[col] = pd.to_numeric(filtered.get(col, 0), errors='coerce').fillna(0)
-
-    total_fuel = round(filtered[fuel_cols].sum().sum(), 3)
-
-    co2 = (
-        filtered["MEConsumptionHFO"].sum() * CII_FACTORS["HFO"] +
-        filtered["MEConsumptionMGO"].sum() * CII_FACTORS["MGO"] +
-        filtered["AEConsumptionHFO"].sum() * CII_FACTORS["HFO"] +
-        filtered["AEConsumptionMGO"].sum() * CII_FACTORS["MGO"] +
-        filtered["BoilerConsumptionHFO"].sum() * CII_FACTORS["HFO"] +
-        filtered["BoilerConsumptionMGO"].sum() * CII_FACTORS["MGO"] +
-        filtered["IGSConsumptionHFO"].sum() * CII_FACTORS["HFO"] +
-        filtered["IGSConsumptionMGO"].sum() * CII_FACTORS["MGO"]
-    )
+    distance = index.total("Distance", lo, hi)
+
+    # Every consumer x fuel column, CO2 = totals @ CII_FACTORS
+    fuel = index.totals(lo, hi, like="Consumption")
+
+    total_fuel = round(sum(fuel[c] for c in fuel_columns(index.frame)), 3)
+
+    co2 = co2_from_totals(fuel, CII_FACTORS)
 
     if dwt == 0:
         dwt = filtered["DraftDisplacementActual"].iloc[0] if "DraftDisplacementActual" in filtered.columns else 50000
 
     attained_aer = (co2 / (dwt * distance)) * 1_000_000 if distance > 0 else 0
 
-    year = date_to.year
-    reduction_factor = REDUCTION_FACTORS.get(year, 0.09)
-
-    if ship_type == "Cable Layer":
-        a, c = REFERENCE_PARAMS["General Cargo <20k"]
-    else:
-        a, c = REFERENCE_PARAMS[ship_type]
-
-    cii_ref = a * (dwt ** (-c))
-    required_aer_value = (1 - reduction_factor) * cii_ref
-
-    if attained_aer <= 0.75 * required_aer_value:
-        rating = "A"
-    elif attained_aer <= 0.90 * required_aer_value:
-        rating = "B"
-    elif attained_aer <= required_aer_value:
-        rating = "C"
-    elif attained_aer <= 1.10 * required_aer_value:
-        rating = "D"
-    else:
-        rating = "E"
+    required_aer_value = required_aer(ship_type, dwt, date_to.year)
+    rating = cii_rating(attained_aer, required_aer_value)
 
     return filtered, {
         "calculation_period": f"{date_from} to {date_to}",
-        "Distance (NM)": distance,
+        # Prefix-sum differences carry float noise; report like the other totals
+        "Distance (NM)": round(distance, 3),
         "Total Fuel (MT)": total_fuel,
         "Total CO2 (MT)": round(co2, 3),
         "DWT Used": dwt,
@@ -100,123 +123,141 @@ def calculate_cii(df, ship_type, date_from, date_to, dwt=0):
     }
 
 # -----------------------------
-# Operational Classification
+# Running CII (year-to-date series)
 # -----------------------------
-def classify_operation_by_events_in_range(df, date_from, date_to):
-    df = df.copy()
+@profiled
+def running_cii_series(df, ship_type, dwt, projection_window=30):
+    """
+    Daily year-to-date attained AER, required AER and rating.
+
+    One groupby folds the reports into daily CO2 / distance; cumulative
+    sums restart every calendar year. The year-end projection extends
+    both running totals linearly at the trailing projection_window-day
+    rate for the days left in the year.
+    """
+    df = ensure_canonical(df)
+
+    day = df["DateUTC"].dt.normalize()
+    valid = day.notna()
+
+    daily = (
+        pd.DataFrame({"CO2": df[CO2_COLUMN], "Distance": df["Distance"]})[valid]
+        .groupby(day[valid])
+        .sum()
+    )
 
-    # Required columns
-    fuel_cols = [
-        "MEConsumptionHFO","AEConsumptionHFO","BoilerConsumptionHFO",
-        "MEConsumptionMGO","AEConsumptionMGO","BoilerConsumptionMGO"
+    columns = [
+        "Date", "Year", "CO2 YTD (MT)", "Distance YTD (NM)",
+        "Attained AER", "Required AER", "CII Rating",
+        "Projected AER", "Projected Rating",
     ]
-    for c in fuel_cols:
-        df[c] = pd.to_numeric(df.get(c, 0), errors="coerce").fillna(0)
+    if daily.empty:
+        return pd.DataFrame(columns=columns)
 
-    df["DateTimeInUTC"] = pd.to_datetime(df["DateTimeInUTC"], errors="coerce")
-    df = df.sort_values("DateTimeInUTC").reset_index(drop=True)
+    daily = daily.asfreq("D", fill_value=0.0)
+    year = daily.index.year
+
+    ytd = daily.groupby(year).cumsum()
+    rate = daily.rolling(projection_window, min_periods=1).mean()
+
+    year_end = pd.to_datetime(pd.Series(year, index=daily.index).astype(str) + "-12-31")
+    remaining = (year_end - daily.index.to_series()).dt.days.to_numpy()
+
+    def aer(co2, distance):
+        co2, distance = np.asarray(co2), np.asarray(distance)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(distance > 0, co2 / (dwt * distance) * 1_000_000, np.nan)
+
+    attained = aer(ytd["CO2"], ytd["Distance"])
+    projected = aer(
+        ytd["CO2"] + rate["CO2"] * remaining,
+        ytd["Distance"] + rate["Distance"] * remaining,
+    )
+
+    required_by_year = {y: required_aer(ship_type, dwt, y) for y in np.unique(year)}
+    required = np.array([required_by_year[y] for y in year])
+
+    return pd.DataFrame({
+        "Date": daily.index,
+        "Year": year,
+        "CO2 YTD (MT)": ytd["CO2"].to_numpy(),
+        "Distance YTD (NM)": ytd["Distance"].to_numpy(),
+        "Attained AER": attained,
+        "Required AER": required,
+        "CII Rating": cii_ratings(attained, required),
+        "Projected AER": projected,
+        "Projected Rating": cii_ratings(projected, required),
+    }, columns=columns)
+
+
+# -----------------------------
+# Operational Classification
+# -----------------------------
+OPERATION_EVENTS = {
+    "Sea": {"Arrival", "Departure", "BOSP", "Noon (Sea)"},
+    "Port": {"Shifting to Berth", "Idle In Port", "IDLE IN PORT", "Discharging", "Loading", "LOADING"},
+    "Drifting": {"Drifting", "Awaiting Orders", "Stopping Engine"},
+}
+
+# EventType (stripped) -> Sea / Port / Drifting
+EVENT_CATEGORY = {
+    event: category
+    for category, events in OPERATION_EVENTS.items()
+    for event in events
+}
+
+OPERATION_FUELS = {
+    "HFO": ["MEConsumptionHFO", "AEConsumptionHFO", "BoilerConsumptionHFO"],
+    "MGO": ["MEConsumptionMGO", "AEConsumptionMGO", "BoilerConsumptionMGO"],
+}
+
+
+@profiled
+def classify_operation_by_events_in_range(df, date_from, date_to):
+    """
+    Hours and HFO / MGO per Sea / Port / Drifting category.
+    EventType is mapped to its category once and all three
+    metrics are summed in a single groupby.
+    """
+    df = ensure_canonical(df)
+    ts = df["DateTimeInUTC"]
 
     start_dt = datetime.combine(pd.to_datetime(date_from).date(), dtime.min)
     end_dt = datetime.combine(pd.to_datetime(date_to).date(), dtime.max)
-    mask = (df["DateTimeInUTC"] >= start_dt) & (df["DateTimeInUTC"] <= end_dt)
-    filtered = df.loc[mask].reset_index(drop=True)
+    mask = (ts >= start_dt) & (ts <= end_dt)
 
-    if filtered.empty:
+    if not mask.any():
         return {k:0 for k in ["Sea Hours","Port Hours","Drifting Hours","Sea HFO","Port HFO","Drifting HFO","Sea MGO","Port MGO","Drifting MGO"]}
 
-    SEA = {"Arrival", "Departure", "BOSP", "Noon (Sea)"}
-    PORT = {"Shifting to Berth", "Idle In Port", "IDLE IN PORT", "Discharging", "Loading", "LOADING"}
-    DRIFT = {"Drifting", "Awaiting Orders", "Stopping Engine"}
-
-    sea_h = port_h = drift_h = 0
-    sea_hfo = port_hfo = drift_hfo = 0
-    sea_mgo = port_mgo = drift_mgo = 0
-
-    for i, row in filtered.iterrows():
-        if i == 0:
-            interval = row["TimeSincePreviousReport"]
-        else:
-            prev_time = filtered.loc[i-1, "DateTimeInUTC"]
-            interval = row["TimeSincePreviousReport"]
-
-        row_hfo = row["MEConsumptionHFO"] + row["AEConsumptionHFO"] + row["BoilerConsumptionHFO"]
-        row_mgo = row["MEConsumptionMGO"] + row["AEConsumptionMGO"] + row["BoilerConsumptionMGO"]
-
-        event = str(row["EventType"]).strip()
-        if event in SEA:
-            sea_h += interval
-            sea_hfo += row_hfo
-            sea_mgo += row_mgo
-        elif event in PORT:
-            port_h += interval
-            port_hfo += row_hfo
-            port_mgo += row_mgo
-        elif event in DRIFT:
-            drift_h += interval
-            drift_hfo += row_hfo
-            drift_mgo += row_mgo
-
-    return {
-         "Sea Hours": round(sea_h, 2),
-         "Sea HFO": round(sea_hfo, 3),
-         "Sea MGO": round(sea_mgo, 3),
-
-         "Port Hours": round(port_h, 2),
-         "Port HFO": round(port_hfo, 3),
-         "Port MGO": round(port_mgo, 3),
-
-         "Drifting Hours": round(drift_h, 2),
-         "Drifting HFO": round(drift_hfo, 3),
-         "Drifting MGO": round(drift_mgo, 3),
-        }
+    filtered = df.loc[mask]
 
-# -----------------------------
-# Streamlit App
-# -----------------------------
-st.set_page_config(page_title="CII & Operations Dashboard", layout="wide")
-st.title("📘 CII Calculator & Operational Analysis")
-
-uploaded = st.file_uploader("Upload Noon Report Excel", type=["xlsx"])
-ship_type = st.selectbox(
-    "Select Ship Type",
-    ["Bulk Carrier", "Tanker", "Container", "RoRo", "General Cargo", "Cable Layer"]
-)
-dwt = st.number_input("Deadweight (DWT in tonnes)", min_value=1000.0, value=50000.0, step=100.0)
-
-col1, col2 = st.columns(2)
-with col1:
-    date_from = st.date_input("From Date")
-with col2:
-    date_to = st.date_input("To Date")
-
-if uploaded and st.button("Calculate CII & Operations"):
-    df = pd.read_excel(uploaded, sheet_name="LogAbstract")
-    filtered, cii_result = calculate_cii(df, ship_type, date_from, date_to, dwt=dwt)
-    ops_result = classify_operation_by_events_in_range(df, date_from, date_to)
-
-    st.subheader("✅ CII Results")
-    st.json(cii_result)
-
-    st.subheader("⚓ Operational Breakdown (Hours & Consumption)")
-    st.json(ops_result)
-
-    # -----------------------------
-    # Hours Pie Chart
-    # -----------------------------
-    labels = ["Sea", "Port", "Drifting"]
-    sizes = [ops_result["Sea Hours"], ops_result["Port Hours"], ops_result["Drifting Hours"]]
-
-    fig1, ax1 = plt.subplots()
-    ax1.pie(sizes, labels=labels, autopct="%1.1f%%", startangle=90)
-    ax1.set_title("Hours Distribution")
-    st.pyplot(fig1)
-
-    # -----------------------------
-    # Fuel Bar Chart
-    # -----------------------------
-    fuel_data = pd.DataFrame({
-        "HFO": [ops_result["Sea HFO"], ops_result["Port HFO"], ops_result["Drifting HFO"]],
-        "MGO": [ops_result["Sea MGO"], ops_result["Port MGO"], ops_result["Drifting MGO"]]
-    }, index=["Sea","Port","Drifting"])
-    st.subheader("⚡ Fuel Consumption (MT)")
-    st.bar_chart(fuel_data)
+    def fuel(cols):
+        present = [c for c in cols if c in filtered.columns]
+        return filtered[present].sum(axis=1)
+
+    # Map each distinct EventType once, then broadcast by code;
+    # the trailing None catches missing events (code -1)
+    codes, events = pd.factorize(filtered["EventType"])
+    labels = pd.Index(events).astype(str).str.strip().map(EVENT_CATEGORY)
+    labels = np.append(np.asarray(labels, dtype=object), None)
+    category = pd.Series(labels[codes], index=filtered.index)
+
+    frame = pd.DataFrame({
+        "Hours": filtered["TimeSincePreviousReport"],
+        "HFO": fuel(OPERATION_FUELS["HFO"]),
+        "MGO": fuel(OPERATION_FUELS["MGO"]),
+    })
+
+    totals = frame.groupby(category).sum().reindex(list(OPERATION_EVENTS), fill_value=0)
+
+    # A missing interval poisons its category, as a running sum would
+    missing_hours = frame["Hours"].isna().groupby(category).any()
+    totals.loc[missing_hours[missing_hours].index, "Hours"] = float("nan")
+
+    result = {}
+    for cat in OPERATION_EVENTS:
+        result[f"{cat} Hours"] = round(float(totals.at[cat, "Hours"]), 2)
+        result[f"{cat} HFO"] = round(float(totals.at[cat, "HFO"]), 3)
+        result[f"{cat} MGO"] = round(float(totals.at[cat, "MGO"]), 3)
+
+    return result
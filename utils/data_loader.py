@@ -1,11 +1,140 @@
+from fnmatch import fnmatchcase
+from pathlib import Path
+
 import pandas as pd
-import streamlit as st
 
-def load_excel(file, sheet):
+from utils.canonical import normalize_log_abstract
+from utils.ingest_cache import cached_sheet
+from utils.profiling import profiled
+
+# Rows buffered before being materialised into a typed chunk
+STREAM_CHUNK_ROWS = 50_000
+
+
+# --------------------------------------------------
+# COLUMN PROJECTION
+# --------------------------------------------------
+def column_matcher(columns):
+    """
+    Returns a predicate for header names.
+    columns may hold exact names or glob patterns ("*Consumption*").
+    None keeps every column.
+    """
+    if columns is None:
+        return lambda name: True
+
+    patterns = list(dict.fromkeys(columns))
+    return lambda name: any(fnmatchcase(str(name).strip(), p) for p in patterns)
+
+
+def detect_format(source) -> str:
+    name = getattr(source, "name", source)
+    suffix = Path(str(name)).suffix.lower() if isinstance(name, (str, Path)) else ""
+
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".parquet", ".pq"):
+        return "parquet"
+    return "xlsx"
+
+
+# --------------------------------------------------
+# FORMAT READERS
+# --------------------------------------------------
+def _read_xlsx_streaming(file, sheet, keep):
+    """
+    Streams the sheet through openpyxl read-only mode and keeps
+    only the projected columns, materialising typed chunks as it goes.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
     try:
-        df = pd.read_excel(file, sheet_name=sheet)
-        df.columns = df.columns.str.strip()
-        return df
-    except Exception as e:
-        st.error(f"Error loading sheet {sheet}: {e}")
-        return pd.DataFrame()
+        rows = wb[sheet].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+
+        names = [
+            str(h).strip() if h is not None else f"Unnamed: {i}"
+            for i, h in enumerate(header)
+        ]
+        idx = [i for i, n in enumerate(names) if keep(n)]
+        selected = [names[i] for i in idx]
+        width = len(names)
+
+        chunks, buf = [], []
+        for row in rows:
+            if not any(v is not None for v in row):
+                continue
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            buf.append(tuple(row[i] for i in idx))
+
+            if len(buf) >= STREAM_CHUNK_ROWS:
+                chunks.append(pd.DataFrame.from_records(buf, columns=selected))
+                buf = []
+
+        if buf or not chunks:
+            chunks.append(pd.DataFrame.from_records(buf, columns=selected))
+    finally:
+        wb.close()
+
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def _read_csv(file, keep):
+    return pd.read_csv(file, usecols=keep)
+
+
+def _read_parquet(file, keep):
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(file)
+    cols = [c for c in pf.schema_arrow.names if keep(c)]
+    return pf.read(columns=cols).to_pandas()
+
+
+@profiled
+def read_log_abstract(source, sheet="LogAbstract", columns=None, fmt=None):
+    """
+    Reads a LogAbstract export (.xlsx, .csv or .parquet) keeping only
+    the requested columns. Raises on unreadable input.
+    """
+    fmt = fmt or detect_format(source)
+    keep = column_matcher(columns)
+
+    if fmt == "csv":
+        df = _read_csv(source, keep)
+    elif fmt == "parquet":
+        df = _read_parquet(source, keep)
+    else:
+        df = _read_xlsx_streaming(source, sheet, keep)
+
+    df.columns = df.columns.astype(str).str.strip()
+    return df
+
+
+# --------------------------------------------------
+# PAGE LOADER
+# --------------------------------------------------
+@profiled
+def load_excel(file, sheet, columns=None):
+    """
+    Loads a sheet as the canonical noon-report frame.
+    Parsing and normalisation run once per upload; the result is kept
+    in the content-hash keyed Parquet cache so reruns and other pages
+    skip both. columns projects the read to what the calculators need.
+    Raises on unreadable input; pages report the error.
+    """
+    fmt = detect_format(file)
+
+    if fmt == "parquet":
+        return normalize_log_abstract(read_log_abstract(file, sheet, columns, fmt))
+
+    def loader(buf, sheet_name):
+        return normalize_log_abstract(read_log_abstract(buf, sheet_name, columns, fmt))
+
+    df = cached_sheet(file, sheet, loader, columns=columns)
+    df.attrs["canonical"] = True
+    return df
@@ -0,0 +1,240 @@
+"""
+EU ETS (maritime) surrender obligation.
+
+Each report is classified as part of a voyage (inside a leg from
+assign_legs) or a port stay, and gets the EU ETS coverage of that
+segment:
+
+    voyage between two EU / EEA ports       100 %  Intra-EU
+    voyage from or to one EU / EEA port      50 %  EU outbound / inbound
+    stay at berth in an EU / EEA port       100 %  EU port
+    anything else                             0 %
+
+EUAs = CO2 (t) x coverage x phase-in of the emission year.
+Port EU / EEA flags are resolved once per distinct UN/LOCODE and
+joined back by code.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.canonical import CO2_COLUMN
+from utils.leg_utils import assign_legs, event_flags, find_vessel_key, VESSEL_KEYS
+from utils.profiling import profiled
+from utils.unlocode_utils import eu_eea_flags, resolve_port_names
+
+# Share of verified emissions to surrender, by emission year
+EU_ETS_PHASE_IN = {2024: 0.40, 2025: 0.70}
+EU_ETS_START_YEAR = 2024
+EU_ETS_FULL_YEAR = 2026
+
+# Columns read by calculate_eua
+EUA_COLUMNS = [
+    "DateTimeInUTC", "EventType", "VoyageNumber",
+    "VoyageFrom", "VoyageTo", "*Consumption*", *VESSEL_KEYS,
+]
+
+SEGMENT_COLUMNS = [
+    "Vessel", "Segment", "Type", "Scope", "From", "To", "Start", "End",
+    "Reports", "CO2 (t)", "Coverage", "Covered CO2 (t)", "EUA",
+]
+
+
+def phase_in(years):
+    """Vectorised phase-in share for emission years."""
+    years = np.asarray(years)
+    share = np.where(years >= EU_ETS_FULL_YEAR, 1.0, 0.0)
+    for year, pct in EU_ETS_PHASE_IN.items():
+        share = np.where(years == year, pct, share)
+    return share
+
+
+# --------------------------------------------------
+# ROW-LEVEL COVERAGE
+# --------------------------------------------------
+def eu_coverage(df, vessel_col=None):
+    """
+    Legged frame with per-report Segment, Type, Scope, Port,
+    Coverage, Phase-in and EUA columns. Rows are in vessel / time order.
+    """
+    vessel_col = vessel_col or find_vessel_key(df)
+    df = assign_legs(df, vessel_col)
+    n = len(df)
+
+    vessel = df[vessel_col] if vessel_col else pd.Series("", index=df.index)
+    at_sea = df["Leg_ID"].notna().to_numpy()
+
+    def column(name):
+        return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+    voyage_from, voyage_to = column("VoyageFrom"), column("VoyageTo")
+
+    # Port of a stay: destination of the latest arrival, else the
+    # report's own VoyageFrom (stays before the first arrival)
+    _, is_arr = event_flags(df)
+    port = voyage_to.where(is_arr).groupby(vessel, sort=False, dropna=False).ffill()
+    port = port.fillna(voyage_from)
+
+    from_eu = eu_eea_flags(voyage_from)
+    to_eu = eu_eea_flags(voyage_to)
+    port_eu = eu_eea_flags(port)
+
+    coverage = np.where(at_sea, (from_eu.astype(float) + to_eu) / 2, port_eu.astype(float))
+
+    scope = np.select(
+        [
+            at_sea & from_eu & to_eu,
+            at_sea & from_eu,
+            at_sea & to_eu,
+            at_sea,
+            port_eu,
+        ],
+        ["Intra-EU", "EU outbound", "EU inbound", "Non-EU", "EU port"],
+        default="Non-EU port",
+    ).astype(object)
+
+    # A new segment starts when the vessel, the leg or the stay's port changes
+    keys = np.stack([
+        pd.factorize(vessel)[0],
+        pd.factorize(df["Leg_ID"])[0],
+        np.where(at_sea, -2, pd.factorize(port)[0]),
+    ])
+    change = np.ones(n, dtype=bool)
+    if n > 1:
+        change[1:] = (keys[:, 1:] != keys[:, :-1]).any(axis=0)
+    segment = np.cumsum(change)
+
+    years = df["DateTimeInUTC"].dt.year.to_numpy(dtype=float, na_value=np.nan)
+    share = phase_in(years)
+    co2 = df[CO2_COLUMN].to_numpy(dtype=float)
+
+    return df.assign(
+        Vessel=vessel.to_numpy(),
+        Segment=segment,
+        Type=np.where(at_sea, "Voyage", "Port stay"),
+        Scope=scope,
+        Port=np.where(at_sea, None, port.to_numpy(dtype=object)),
+        Coverage=coverage,
+        **{
+            "Phase-in": share,
+            "Covered CO2 (t)": co2 * coverage,
+            "EUA": co2 * coverage * share,
+        },
+    )
+
+
+# --------------------------------------------------
+# AGGREGATES
+# --------------------------------------------------
+def eua_segments(rows):
+    """
+    One row per voyage / port stay. Segments are contiguous runs of
+    rows, so they are reduced positionally instead of grouped.
+    """
+    if rows.empty:
+        return pd.DataFrame(columns=SEGMENT_COLUMNS)
+
+    seg_id = rows["Segment"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, seg_id[1:] != seg_id[:-1]])
+    lasts = np.r_[starts[1:], len(rows)] - 1
+
+    # Take the boundary rows first, convert only those
+    def first(col):
+        return rows[col].take(starts).to_numpy(dtype=object) if col in rows.columns else None
+
+    def last(col):
+        return rows[col].take(lasts).to_numpy(dtype=object) if col in rows.columns else None
+
+    def total(col):
+        return np.add.reduceat(rows[col].to_numpy(dtype=float), starts)
+
+    seg_type = first("Type")
+    is_voyage = seg_type == "Voyage"
+    port = first("Port")
+    ts = rows["DateTimeInUTC"]
+
+    seg = pd.DataFrame({
+        "Vessel": first("Vessel"),
+        "Segment": seg_id[starts],
+        "Type": seg_type,
+        "Scope": first("Scope"),
+        "From": np.where(is_voyage, first("VoyageFrom"), port),
+        "To": np.where(is_voyage, last("VoyageTo"), port),
+        "Start": np.minimum.reduceat(ts.to_numpy(), starts),
+        "End": np.maximum.reduceat(ts.to_numpy(), starts),
+        "Reports": np.diff(np.r_[starts, len(rows)]),
+        "CO2 (t)": total(CO2_COLUMN),
+        "Covered CO2 (t)": total("Covered CO2 (t)"),
+        "EUA": total("EUA"),
+    })
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        seg["Coverage"] = np.where(seg["CO2 (t)"] > 0, seg["Covered CO2 (t)"] / seg["CO2 (t)"], 0.0)
+
+    for col in ("From", "To"):
+        codes = seg[col]
+        seg[col] = np.where(
+            codes.notna(),
+            resolve_port_names(codes).astype(str) + " (" + codes.astype(str) + ")",
+            "",
+        )
+
+    return seg[SEGMENT_COLUMNS]
+
+
+def eua_by_month(rows):
+    """EUAs per vessel and emission month."""
+    month = rows["DateTimeInUTC"].dt.to_period("M").dt.to_timestamp()
+    return (
+        rows.assign(Month=month)
+        .groupby(["Vessel", "Month"], sort=True)
+        .agg(**{
+            "CO2 (t)": (CO2_COLUMN, "sum"),
+            "Covered CO2 (t)": ("Covered CO2 (t)", "sum"),
+            "EUA": ("EUA", "sum"),
+        })
+        .reset_index()
+    )
+
+
+def eua_by_vessel(rows):
+    return (
+        rows.groupby("Vessel", sort=True)
+        .agg(**{
+            "CO2 (t)": (CO2_COLUMN, "sum"),
+            "Covered CO2 (t)": ("Covered CO2 (t)", "sum"),
+            "EUA": ("EUA", "sum"),
+        })
+        .reset_index()
+    )
+
+
+# --------------------------------------------------
+# EUA CALCULATION
+# --------------------------------------------------
+@profiled
+def calculate_eua(df, date_from, date_to, eua_price=0.0, vessel_col=None):
+    """
+    EU ETS surrender for reports dated date_from .. date_to (whole
+    days, DateTimeInUTC). Legs and port stays are classified on the
+    full frame so segments crossing the period edges keep their scope.
+
+    Returns (rows, segments, monthly, summary).
+    """
+    rows = eu_coverage(df, vessel_col)
+
+    ts = rows["DateTimeInUTC"]
+    start = pd.Timestamp(date_from).normalize()
+    end = pd.Timestamp(date_to).normalize() + pd.Timedelta(days=1)
+    rows = rows[(ts >= start) & (ts < end)]
+
+    eua = float(rows["EUA"].sum())
+    summary = {
+        "calculation_period": f"{date_from} to {date_to}",
+        "Total CO2 (t)": round(float(rows[CO2_COLUMN].sum()), 3),
+        "Covered CO2 (t)": round(float(rows["Covered CO2 (t)"].sum()), 3),
+        "EUA Required": round(eua, 3),
+        "EUA Cost (EUR)": round(eua * eua_price, 2),
+        "Vessels": int(rows["Vessel"].nunique()),
+    }
+
+    return rows, eua_segments(rows), eua_by_month(rows), summary
@@ -0,0 +1,272 @@
+"""
+Fleet batch CII runner.
+
+    python -m utils.fleet_batch manifest.csv -o fleet_cii.parquet --workers 8
+
+The manifest (.csv / .xlsx) has one row per vessel-period:
+    workbook, ship_type, dwt, and either period ("2024Q1", "2024-03",
+    "2024") or date_from / date_to. An optional vessel column names
+    the vessel (defaults to the workbook file name).
+"""
+import argparse
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+MANIFEST_REQUIRED = ["workbook", "ship_type", "dwt"]
+
+
+# --------------------------------------------------
+# MANIFEST
+# --------------------------------------------------
+def _period_bounds(period):
+    p = pd.Period(str(period).strip()) if not pd.isna(period) else pd.NaT
+    if p is pd.NaT:
+        raise ValueError(f"invalid period {period!r}")
+    return p.start_time.date(), p.end_time.date()
+
+
+def _row_bounds(period):
+    """(date_from, date_to, error) for one manifest period."""
+    try:
+        return (*_period_bounds(period), "")
+    except Exception as e:
+        return None, None, f"manifest: {e}"
+
+
+def load_manifest(manifest) -> pd.DataFrame:
+    """
+    Reads and normalises the manifest into one row per vessel-period
+    with date_from / date_to as dates. Rows whose period cannot be
+    read keep None dates and say why in the error column.
+    """
+    if isinstance(manifest, pd.DataFrame):
+        df = manifest.copy()
+    elif str(manifest).lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(manifest)
+    else:
+        df = pd.read_csv(manifest)
+
+    df.columns = df.columns.str.strip()
+
+    missing = [c for c in MANIFEST_REQUIRED if c not in df.columns]
+    if missing:
+        raise ValueError(f"Manifest is missing columns: {missing}")
+
+    if "period" in df.columns:
+        bounds = df["period"].map(_row_bounds)
+        df["date_from"] = [b[0] for b in bounds]
+        df["date_to"] = [b[1] for b in bounds]
+        df["error"] = [b[2] for b in bounds]
+    elif {"date_from", "date_to"} <= set(df.columns):
+        raw = df[["date_from", "date_to"]].astype(str)
+        starts = pd.to_datetime(df["date_from"], errors="coerce")
+        ends = pd.to_datetime(df["date_to"], errors="coerce")
+        bad = (starts.isna() | ends.isna()).to_numpy()
+        df["date_from"] = [None if b else d.date() for b, d in zip(bad, starts)]
+        df["date_to"] = [None if b else d.date() for b, d in zip(bad, ends)]
+        df["error"] = [
+            f"manifest: invalid date_from / date_to {f!r} / {t!r}" if b else ""
+            for b, f, t in zip(bad, raw["date_from"], raw["date_to"])
+        ]
+        df["period"] = [
+            f"{f} to {t}" if f is not None else f"{rf} to {rt}"
+            for f, t, rf, rt in zip(df["date_from"], df["date_to"], raw["date_from"], raw["date_to"])
+        ]
+    else:
+        raise ValueError("Manifest needs a period column or date_from / date_to")
+
+    if "vessel" not in df.columns:
+        df["vessel"] = df["workbook"].map(lambda w: Path(str(w)).stem)
+
+    df["dwt"] = pd.to_numeric(df["dwt"], errors="coerce").fillna(0)
+    return df
+
+
+def _failed(job, workbook, error):
+    """Result row for a vessel-period that could not run."""
+    return {
+        "vessel": job["vessel"], "workbook": workbook,
+        "ship_type": job["ship_type"], "dwt": job["dwt"],
+        "period": job["period"], "date_from": job["date_from"],
+        "date_to": job["date_to"], "status": "error",
+        "error": error, "rows": 0, "seconds": 0.0,
+    }
+
+
+# --------------------------------------------------
+# WORKER (one workbook, all of its periods)
+# --------------------------------------------------
+def _run_workbook(workbook, jobs, sheet):
+    from utils.cii_utils import (
+        calculate_cii,
+        classify_operation_by_events_in_range,
+        CII_COLUMNS,
+        CII_OPERATIONS_COLUMNS,
+    )
+    from utils.canonical import normalize_log_abstract
+    from utils.data_loader import read_log_abstract
+    from utils.range_index import build_range_index
+
+    base = [
+        {
+            "vessel": j["vessel"],
+            "workbook": workbook,
+            "ship_type": j["ship_type"],
+            "dwt": j["dwt"],
+            "period": j["period"],
+            "date_from": j["date_from"],
+            "date_to": j["date_to"],
+        }
+        for j in jobs
+    ]
+
+    t0 = time.perf_counter()
+    try:
+        df = normalize_log_abstract(read_log_abstract(
+            workbook, sheet, columns=CII_COLUMNS + CII_OPERATIONS_COLUMNS
+        ))
+        index = build_range_index(df)
+    except Exception as e:
+        return [
+            {**b, "status": "error", "error": f"load: {e!r}", "rows": 0, "seconds": 0.0}
+            for b in base
+        ]
+    load_s = time.perf_counter() - t0
+
+    rows = []
+    for b in base:
+        t1 = time.perf_counter()
+        try:
+            filtered, cii = calculate_cii(
+                df, b["ship_type"], b["date_from"], b["date_to"], dwt=b["dwt"],
+                index=index
+            )
+            ops = classify_operation_by_events_in_range(
+                df, b["date_from"], b["date_to"]
+            )
+            rows.append({
+                **b, "status": "ok", "error": "",
+                **{k: v for k, v in cii.items() if k != "calculation_period"},
+                **ops,
+                "rows": len(filtered),
+                "seconds": round(time.perf_counter() - t1 + load_s / len(base), 4),
+            })
+        except Exception:
+            rows.append({
+                **b, "status": "error",
+                "error": traceback.format_exc(limit=2).strip().splitlines()[-1],
+                "rows": 0,
+                "seconds": round(time.perf_counter() - t1, 4),
+            })
+
+    return rows
+
+
+# --------------------------------------------------
+# BATCH API
+# --------------------------------------------------
+def run_fleet_cii(manifest, max_workers=None, sheet="LogAbstract"):
+    """
+    Runs CII + operational breakdown for every manifest row.
+
+    Workbooks are spread across a process pool and parsed once each;
+    a failing vessel (or manifest row) only marks its own rows as errors.
+    Returns (results DataFrame, throughput stats).
+    """
+    jobs = load_manifest(manifest)
+    invalid = jobs["error"] != ""
+    results = [_failed(j, j["workbook"], j["error"]) for j in jobs[invalid].to_dict("records")]
+
+    groups = {
+        wb: g.drop(columns="error").to_dict("records")
+        for wb, g in jobs[~invalid].groupby("workbook", sort=False)
+    }
+
+    workers = max_workers if max_workers is not None else os.cpu_count() or 1
+    workers = max(1, min(workers, len(groups) or 1))
+
+    t0 = time.perf_counter()
+
+    if workers == 1:
+        for wb, g in groups.items():
+            results.extend(_run_workbook(wb, g, sheet))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_run_workbook, wb, g, sheet): (wb, g)
+                for wb, g in groups.items()
+            }
+            for fut in as_completed(futures):
+                wb, g = futures[fut]
+                try:
+                    results.extend(fut.result())
+                except Exception as e:
+                    results.extend(_failed(j, wb, f"worker: {e!r}") for j in g)
+
+    elapsed = time.perf_counter() - t0
+
+    out = pd.DataFrame(results)
+    if not out.empty:
+        out = out.sort_values(["vessel", "date_from"], kind="stable").reset_index(drop=True)
+
+    n_ok = int((out["status"] == "ok").sum()) if not out.empty else 0
+    n_rows = int(out["rows"].sum()) if not out.empty else 0
+
+    stats = {
+        "vessels": jobs["workbook"].nunique(),
+        "vessel_periods": len(out),
+        "failed": len(out) - n_ok,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "vessel_periods_per_s": round(len(out) / elapsed, 2) if elapsed > 0 else 0.0,
+        "report_rows_per_s": round(n_rows / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    return out, stats
+
+
+def save_results(df, path):
+    path = str(path)
+    if path.lower().endswith(".csv"):
+        df.to_csv(path, index=False)
+    else:
+        df.to_parquet(path, index=False)
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fleet batch CII calculation")
+    parser.add_argument("manifest", help="CSV / XLSX manifest of vessel-periods")
+    parser.add_argument("-o", "--output", default="fleet_cii.parquet",
+                        help=".parquet or .csv output path")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="process pool size (default: CPU count, 1 = in-process)")
+    parser.add_argument("--sheet", default="LogAbstract")
+    args = parser.parse_args(argv)
+
+    df, stats = run_fleet_cii(args.manifest, max_workers=args.workers, sheet=args.sheet)
+    save_results(df, args.output)
+
+    print(
+        f"{stats['vessel_periods']} vessel-periods from {stats['vessels']} workbooks "
+        f"in {stats['seconds']} s on {stats['workers']} workers "
+        f"({stats['vessel_periods_per_s']} vessel-periods/s, "
+        f"{stats['report_rows_per_s']:,.0f} report rows/s); "
+        f"{stats['failed']} failed -> {args.output}"
+    )
+
+    if not df.empty:
+        for _, r in df[df["status"] != "ok"].iterrows():
+            print(f"  FAILED {r['vessel']} {r['period']}: {r['error']}")
+
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,109 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# CO2 CONVERSION FACTORS Cf (t CO2 / t fuel)
+# Single source for CII (t) and SCC / EEOI (kg)
+# --------------------------------------------------
+CO2_FACTORS = {
+    "HFO": 3.114,
+    "MGO": 3.206,
+    "MDO": 3.206,
+    "LFO": 3.151,
+    "LNG": 2.75,
+    "Methanol": 1.375,
+}
+
+# Lower calorific values (MJ / kg), MEPC.364(79) default values
+LCV_MJ_PER_KG = {
+    "HFO": 40.2,
+    "MGO": 42.7,
+    "MDO": 42.7,
+    "LFO": 41.2,
+    "LNG": 48.0,
+    "Methanol": 19.9,
+}
+
+FUELS = tuple(CO2_FACTORS)
+CONSUMERS = ("ME", "AE", "Boiler", "IGS")
+
+# <Consumer>Consumption<Fuel>, e.g. MEConsumptionHFO, BoilerConsumptionLNG
+CONSUMPTION_RE = re.compile(
+    r"^(?P<consumer>.+?)Consumption(?P<fuel>" + "|".join(FUELS) + r")$"
+)
+
+
+# --------------------------------------------------
+# HEADER PARSING
+# --------------------------------------------------
+@lru_cache(maxsize=64)
+def _parse(columns):
+    parsed = []
+    for col in columns:
+        m = CONSUMPTION_RE.match(col)
+        if m:
+            parsed.append((col, m.group("consumer"), m.group("fuel")))
+    return tuple(parsed)
+
+
+def parse_fuel_columns(columns):
+    """
+    [(column, consumer, fuel), ...] for every consumer x fuel
+    consumption column in the header. Parsed once per header.
+    """
+    return list(_parse(tuple(str(c) for c in columns)))
+
+
+def fuel_columns(df, fuel=None, consumer=None):
+    return [
+        col for col, cons, f in parse_fuel_columns(df.columns)
+        if (fuel is None or f == fuel) and (consumer is None or cons == consumer)
+    ]
+
+
+# --------------------------------------------------
+# MATRIX FORM
+# --------------------------------------------------
+def factor_vector(df, factors=CO2_FACTORS):
+    """Per-column factor aligned with fuel_columns(df)."""
+    return np.array(
+        [factors.get(f, 0.0) for _, _, f in parse_fuel_columns(df.columns)],
+        dtype=float,
+    )
+
+
+def consumption_matrix(df):
+    """Rows x (consumer, fuel) consumption matrix, NaN as 0."""
+    cols = fuel_columns(df)
+    if not cols:
+        return np.zeros((len(df), 0))
+    return df[cols].to_numpy(dtype=float, na_value=0.0)
+
+
+def row_co2(df, factors=CO2_FACTORS) -> pd.Series:
+    """Tonnes CO2 per report: consumption matrix @ factor vector."""
+    return pd.Series(consumption_matrix(df) @ factor_vector(df, factors), index=df.index)
+
+
+def co2_from_totals(totals, factors=CO2_FACTORS):
+    """
+    Aggregated form: {column: consumption} (e.g. range totals) ->
+    tonnes CO2, using the same column parsing as the row form.
+    """
+    parsed = parse_fuel_columns(totals.keys())
+    if not parsed:
+        return 0.0
+    amounts = np.array([totals[col] for col, _, _ in parsed], dtype=float)
+    weights = np.array([factors.get(f, 0.0) for _, _, f in parsed], dtype=float)
+    return float(amounts @ weights)
+
+
+def fuel_totals_by_type(totals):
+    """{column: consumption} -> {fuel: consumption} over all consumers."""
+    out = dict.fromkeys(FUELS, 0.0)
+    for col, _, fuel in parse_fuel_columns(totals.keys()):
+        out[fuel] += totals[col]
+    return out
@@ -0,0 +1,270 @@
+"""
+FuelEU pooling optimiser.
+
+Within a pool the summed compliance balance must be >= 0, no surplus
+ship may leave with a deficit and no deficit ship may leave worse off.
+Penalties are charged per ship, so the best allocation inside a pool
+fully covers every pooled deficit. Choosing pools is then a knapsack
+per reporting year (and pool group): deficit ships are the items
+(weight = deficit, value = avoided penalty) and the summed surplus is
+the capacity.
+
+    exact      all subsets of the deficit ships, vectorised (<= exact_limit)
+    heuristic  knapsack DP on a capacity grid (weights rounded up, so
+               always feasible) against greedy by value density, then
+               add / 1-swap repair on the unrounded weights
+"""
+import time
+
+import numpy as np
+
+from utils.profiling import profiled
+
+BALANCE = "Compliance Balance (tCO2e)"
+PENALTY = "Penalty (EUR)"
+
+# Deficit ships per group solved exactly (2 ** n subsets)
+EXACT_LIMIT = 20
+
+# Capacity buckets of the heuristic DP (keep matrix is ships x buckets)
+DP_BUCKETS = 2000
+
+
+# --------------------------------------------------
+# KNAPSACK SOLVERS (deficit selection)
+# --------------------------------------------------
+def _exact(weights, values, capacity):
+    """
+    Best subset by enumeration. Subset sums are built by doubling
+    (bit k of the subset index = item k), so memory is 2 ** n floats.
+    """
+    w = np.zeros(1)
+    v = np.zeros(1)
+    for wi, vi in zip(weights, values):
+        w = np.concatenate([w, w + wi])
+        v = np.concatenate([v, v + vi])
+    v = np.where(w <= capacity + 1e-9, v, -np.inf)
+    # Ties: prefer the larger covered deficit
+    best = np.lexsort((w, v))[-1]
+    chosen = (best >> np.arange(len(weights))) & 1
+    return chosen.astype(bool), len(w)
+
+
+def _grid_dp(weights, values, capacity, buckets=DP_BUCKETS):
+    """0/1 knapsack DP over capacity quantised into buckets, one numpy row per item."""
+    n = len(weights)
+    if capacity <= 0:
+        return np.zeros(n, dtype=bool)
+    cost = np.ceil(weights / capacity * buckets).astype(int)
+    best = np.zeros(buckets + 1)
+    keep = np.zeros((n, buckets + 1), dtype=bool)
+    for i in range(n):
+        c = cost[i]
+        if c > buckets:
+            continue
+        take = np.full(buckets + 1, -np.inf)
+        take[c:] = best[:buckets + 1 - c] + values[i]
+        keep[i] = take > best
+        best = np.maximum(best, take)
+
+    chosen = np.zeros(n, dtype=bool)
+    b = buckets
+    for i in range(n - 1, -1, -1):
+        if keep[i, b]:
+            chosen[i] = True
+            b -= cost[i]
+    return chosen
+
+
+def _greedy(weights, values, capacity):
+    """Greedy by value / weight, or the best single item if that is worth more."""
+    chosen = np.zeros(len(weights), dtype=bool)
+    used = 0.0
+    for i in np.argsort(-(values / np.maximum(weights, 1e-12)), kind="stable"):
+        if used + weights[i] <= capacity + 1e-9:
+            chosen[i] = True
+            used += weights[i]
+
+    fits = weights <= capacity + 1e-9
+    if fits.any():
+        single = np.argmax(np.where(fits, values, -np.inf))
+        if values[single] > values[chosen].sum():
+            chosen[:] = False
+            chosen[single] = True
+    return chosen
+
+
+def _repair(chosen, weights, values, capacity):
+    """Adds items that still fit, then applies improving 1-swaps until none is left."""
+    used = weights[chosen].sum()
+    evaluated = 0
+    while True:
+        inside, outside = np.flatnonzero(chosen), np.flatnonzero(~chosen)
+        if not len(outside):
+            break
+        slack = capacity - used
+        add = outside[weights[outside] <= slack + 1e-9]
+        if len(add):
+            j = add[np.argmax(values[add])]
+            chosen[j] = True
+            used += weights[j]
+            continue
+        if not len(inside):
+            break
+        gain = values[outside][None, :] - values[inside][:, None]          # (in, out)
+        room = weights[outside][None, :] - weights[inside][:, None] <= slack + 1e-9
+        gain = np.where(room, gain, -np.inf)
+        evaluated += gain.size
+        a, b = np.unravel_index(np.argmax(gain), gain.shape)
+        if gain[a, b] <= 1e-9:
+            break
+        i, j = inside[a], outside[b]
+        chosen[i], chosen[j] = False, True
+        used += weights[j] - weights[i]
+    return chosen, evaluated
+
+
+def _heuristic(weights, values, capacity):
+    """Better of grid DP and greedy, each repaired on the exact weights."""
+    evaluated = len(weights) * (DP_BUCKETS + 1)
+    best = None
+    for start in (_grid_dp(weights, values, capacity), _greedy(weights, values, capacity)):
+        chosen, n_eval = _repair(start, weights, values, capacity)
+        evaluated += n_eval
+        if best is None or values[chosen].sum() > values[best].sum():
+            best = chosen
+    return best, evaluated
+
+
+# --------------------------------------------------
+# POOL FORMATION
+# --------------------------------------------------
+def _split_pools(surplus_idx, deficit_idx, balance, max_pool_size, spare_idx=()):
+    """
+    Packs one group's ships into pools of at most max_pool_size, each
+    with a non-negative sum: largest surplus opens a pool, largest
+    deficits that still fit join it, then spare (unselected) deficits
+    that still fit. Deficits are only ever covered whole; a ship that
+    fits no pool stays out. Returns [(members, covered)].
+    """
+    if not max_pool_size:
+        return [(list(surplus_idx) + list(deficit_idx), list(deficit_idx))]
+
+    surplus = sorted(surplus_idx, key=lambda i: -balance[i])
+    pending = sorted(deficit_idx, key=lambda i: balance[i]) + list(spare_idx)  # most negative first
+    pools = []
+    for s in surplus:
+        if not pending:
+            break
+        members, room = [s], balance[s]
+        for d in list(pending):
+            if len(members) >= max_pool_size:
+                break
+            if -balance[d] <= room + 1e-9:
+                members.append(d)
+                room += balance[d]
+                pending.remove(d)
+        if len(members) > 1:
+            pools.append((members, members[1:]))
+    return pools
+
+
+@profiled
+def optimize_pools(balances, groups=None, excluded=(), max_pool_size=None, exact_limit=EXACT_LIMIT):
+    """
+    Pools per reporting year that minimise the fleet penalty.
+
+    balances: fueleu_balances() output (Vessel, Year, balance, penalty).
+    groups: {vessel: label}; ships pool only within their label.
+    excluded: vessels kept out of every pool.
+    Vessels in groups / excluded match the Vessel column as strings.
+    max_pool_size: ships per pool (None = unlimited).
+
+    Returns (allocation per vessel-year, summary per year, stats).
+    """
+    t0 = time.perf_counter()
+    df = balances.reset_index(drop=True).copy()
+    # Vessel keys compare as text: widgets hand back str, frames hold IMO ints
+    groups = {str(v): label for v, label in (groups or {}).items()}
+    excluded = {str(v) for v in excluded}
+
+    balance = df[BALANCE].to_numpy(dtype=float)
+    penalty = df[PENALTY].to_numpy(dtype=float)
+
+    pool_id = np.full(len(df), None, dtype=object)
+    covered = np.zeros(len(df), dtype=bool)
+    transfer = np.zeros(len(df))
+    methods, evaluated = set(), 0
+
+    vessel = df["Vessel"].astype(str)
+    df["_group"] = vessel.map(lambda v: groups.get(v, "Fleet"))
+    eligible = ~vessel.isin(excluded).to_numpy()
+
+    for (year, group), idx in df[eligible].groupby(["Year", "_group"], sort=True).groups.items():
+        idx = np.asarray(idx)
+        surplus_idx = idx[balance[idx] > 0]
+        deficit_idx = idx[balance[idx] < 0]
+        if not len(surplus_idx) or not len(deficit_idx):
+            continue
+
+        weights = -balance[deficit_idx]
+        values = penalty[deficit_idx]
+        capacity = balance[surplus_idx].sum()
+
+        # Without a penalty at stake (e.g. indicative years) cover the most deficit
+        if not values.any():
+            values = weights.copy()
+
+        if len(deficit_idx) <= exact_limit and not max_pool_size:
+            chosen, n_eval = _exact(weights, values, capacity)
+            methods.add("exact")
+        else:
+            chosen, n_eval = _heuristic(weights, values, capacity)
+            methods.add("heuristic")
+        evaluated += n_eval
+
+        # Capped pools may not seat every selected deficit; offer the rest by value density
+        spare = deficit_idx[~chosen][np.argsort(-(values[~chosen] / weights[~chosen]), kind="stable")]
+        pools = _split_pools(surplus_idx, deficit_idx[chosen], balance, max_pool_size, spare)
+        for k, (members, pooled_deficits) in enumerate(pools, start=1):
+            members = np.asarray(members)
+            name = f"{year}-{group}-P{k}"
+            pool_id[members] = name
+
+            need = -balance[pooled_deficits].sum()
+            donors = members[balance[members] > 0]
+            share = balance[donors] / balance[donors].sum()
+            transfer[donors] -= need * share
+            transfer[pooled_deficits] = -balance[pooled_deficits]
+            covered[pooled_deficits] = True
+
+    after = balance + transfer
+    penalty_after = np.where(covered, 0.0, penalty)
+
+    allocation = df.drop(columns="_group").assign(**{
+        "Pool": pool_id,
+        "Transfer (tCO2e)": transfer,
+        "Balance After Pooling (tCO2e)": after,
+        "Penalty After Pooling (EUR)": penalty_after,
+    })
+
+    summary = (
+        allocation.groupby("Year", sort=True)
+        .agg(**{
+            "Vessels": ("Vessel", "size"),
+            "Pools": ("Pool", "nunique"),
+            "Balance (tCO2e)": (BALANCE, "sum"),
+            "Penalty Before (EUR)": (PENALTY, "sum"),
+            "Penalty After (EUR)": ("Penalty After Pooling (EUR)", "sum"),
+        })
+        .reset_index()
+    )
+    summary["Saving (EUR)"] = summary["Penalty Before (EUR)"] - summary["Penalty After (EUR)"]
+
+    stats = {
+        "method": "+".join(sorted(methods)) or "none",
+        "vessel_periods": len(df),
+        "candidates_evaluated": int(evaluated),
+        "seconds": round(time.perf_counter() - t0, 4),
+    }
+    return allocation, summary, stats
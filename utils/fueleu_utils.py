@@ -0,0 +1,209 @@
+"""
+FuelEU Maritime: well-to-wake GHG intensity, compliance balance and
+penalty (Regulation (EU) 2023/1805, Annex I / II default factors).
+
+Per report, the consumer x fuel consumption matrix is multiplied by a
+factor tensor (columns x [energy, WtT, TtW]) in one matrix product;
+the EU energy scope (100 % intra-EU / EU port, 50 % to or from the EU)
+comes from eua_utils.eu_coverage. Results are grouped per vessel and
+reporting year, so a whole fleet frame is evaluated in one batch.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.eua_utils import eu_coverage, EUA_COLUMNS
+from utils.fuel_registry import CO2_FACTORS, parse_fuel_columns
+from utils.profiling import profiled
+
+# --------------------------------------------------
+# FUEL LIBRARY (Annex II defaults)
+# LCV MJ/g; WtT gCO2e/MJ; Cf gGHG/g fuel; slip % of fuel mass
+# --------------------------------------------------
+FUELEU_FUELS = {
+    "HFO":      {"lcv": 0.0405, "wtt": 13.5, "cf_ch4": 0.00005, "cf_n2o": 0.00018, "slip": 0.0},
+    "LFO":      {"lcv": 0.0410, "wtt": 13.2, "cf_ch4": 0.00005, "cf_n2o": 0.00018, "slip": 0.0},
+    "MDO":      {"lcv": 0.0427, "wtt": 14.4, "cf_ch4": 0.00005, "cf_n2o": 0.00018, "slip": 0.0},
+    "MGO":      {"lcv": 0.0427, "wtt": 14.4, "cf_ch4": 0.00005, "cf_n2o": 0.00018, "slip": 0.0},
+    "LNG":      {"lcv": 0.0491, "wtt": 18.5, "cf_ch4": 0.0,     "cf_n2o": 0.00011, "slip": 3.1},
+    "Methanol": {"lcv": 0.0199, "wtt": 31.3, "cf_ch4": 0.00005, "cf_n2o": 0.00018, "slip": 0.0},
+}
+
+# TtW CO2 factors are the registry's Cf (same IMO defaults)
+for _fuel, _f in FUELEU_FUELS.items():
+    _f["cf_co2"] = CO2_FACTORS[_fuel]
+
+# Methane slip by consumer where it differs from the fuel default
+# (LNG Otto medium-speed default above; boilers burn it almost fully)
+CONSUMER_SLIP = {("Boiler", "LNG"): 0.01}
+
+GWP = {"CO2": 1, "CH4": 25, "N2O": 298}
+
+REFERENCE_INTENSITY = 91.16   # gCO2e / MJ (2020 fleet reference)
+
+# First reporting period; earlier years are shown as indicative only
+FUELEU_START_YEAR = 2025
+
+# Reduction of the reference intensity, from year
+INTENSITY_REDUCTION = [
+    (2025, 0.02), (2030, 0.06), (2035, 0.145),
+    (2040, 0.31), (2045, 0.62), (2050, 0.80),
+]
+
+PENALTY_EUR_PER_T_VLSFO = 2400
+VLSFO_MJ_PER_T = 41_000
+
+# Columns read by fueleu_balances
+FUELEU_COLUMNS = EUA_COLUMNS
+
+TENSOR_AXES = ("Energy (MJ)", "WtT (gCO2e)", "TtW (gCO2e)")
+
+
+# --------------------------------------------------
+# FACTOR TENSOR
+# --------------------------------------------------
+def ttw_per_gram(fuel, consumer=None):
+    """TtW gCO2e per g of fuel, methane slip included."""
+    f = FUELEU_FUELS[fuel]
+    slip = CONSUMER_SLIP.get((consumer, fuel), f["slip"]) / 100
+    combusted = f["cf_co2"] * GWP["CO2"] + f["cf_ch4"] * GWP["CH4"] + f["cf_n2o"] * GWP["N2O"]
+    return (1 - slip) * combusted + slip * GWP["CH4"]
+
+
+def factor_tensor(columns):
+    """
+    (fuel columns, tensor) with one row per consumer x fuel column and
+    TENSOR_AXES as columns, per tonne of fuel.
+    """
+    parsed = [(col, cons, fuel) for col, cons, fuel in parse_fuel_columns(columns) if fuel in FUELEU_FUELS]
+    tensor = np.array([
+        [
+            FUELEU_FUELS[fuel]["lcv"] * 1e6,
+            FUELEU_FUELS[fuel]["lcv"] * 1e6 * FUELEU_FUELS[fuel]["wtt"],
+            ttw_per_gram(fuel, cons) * 1e6,
+        ]
+        for _, cons, fuel in parsed
+    ], dtype=float).reshape(len(parsed), len(TENSOR_AXES))
+    return [col for col, _, _ in parsed], tensor
+
+
+def target_intensity(years):
+    """Vectorised GHG intensity limit (gCO2e / MJ) per reporting year."""
+    years = np.asarray(years)
+    reduction = np.zeros(years.shape, dtype=float)
+    for year, r in INTENSITY_REDUCTION:
+        reduction = np.where(years >= year, r, reduction)
+    return REFERENCE_INTENSITY * (1 - reduction)
+
+
+# --------------------------------------------------
+# PER-REPORT ENERGY & EMISSIONS IN SCOPE
+# --------------------------------------------------
+def scoped_energy(df, vessel_col=None):
+    """
+    Per-report Vessel, Year, EU scope and in-scope energy / WtT / TtW:
+    consumption matrix @ factor tensor, scaled by the scope share.
+    """
+    rows = eu_coverage(df, vessel_col)
+    cols, tensor = factor_tensor(rows.columns)
+
+    matrix = rows[cols].to_numpy(dtype=float, na_value=0.0) if cols else np.zeros((len(rows), 0))
+    scope = rows["Coverage"].to_numpy(dtype=float)
+    totals = (matrix @ tensor) * scope[:, None]                          # (n, 3)
+
+    out = pd.DataFrame(totals, columns=list(TENSOR_AXES), index=rows.index)
+    out.insert(0, "Vessel", rows["Vessel"].to_numpy())
+    out.insert(1, "DateTimeInUTC", rows["DateTimeInUTC"].to_numpy())
+    out.insert(2, "Year", rows["DateTimeInUTC"].dt.year.astype("Int64").to_numpy())
+    out.insert(3, "Scope", rows["Scope"].to_numpy())
+    out.insert(4, "Coverage", scope)
+    return out
+
+
+# --------------------------------------------------
+# COMPLIANCE BALANCE
+# --------------------------------------------------
+def compliance_balance(energy, wtt, ttw, years, consecutive_deficits=0):
+    """
+    Vectorised intensity, compliance balance (t CO2e) and penalty (EUR)
+    from in-scope energy (MJ) and WtT / TtW emissions (g CO2e).
+    """
+    energy = np.asarray(energy, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        intensity = np.where(energy > 0, (np.asarray(wtt) + np.asarray(ttw)) / energy, np.nan)
+
+    target = target_intensity(years)
+    balance_g = np.where(energy > 0, (target - intensity) * energy, 0.0)
+
+    multiplier = 1 + np.maximum(np.asarray(consecutive_deficits), 0) / 10
+    in_force = np.asarray(years) >= FUELEU_START_YEAR
+    with np.errstate(divide="ignore", invalid="ignore"):
+        penalty = np.where(
+            (balance_g < 0) & in_force,
+            -balance_g / (intensity * VLSFO_MJ_PER_T) * PENALTY_EUR_PER_T_VLSFO * multiplier,
+            0.0,
+        )
+
+    return intensity, target, balance_g / 1e6, penalty
+
+
+def consecutive_deficits(vessel, year, deficit):
+    """
+    Deficit years immediately before each row, per vessel. Rows must be
+    sorted by vessel and year; a gap year or a non-deficit year resets
+    the count.
+    """
+    vessel = pd.Series(np.asarray(vessel))
+    year = np.asarray(year, dtype=int)
+    deficit = np.asarray(deficit, dtype=bool)
+
+    follows = np.zeros(len(year), dtype=bool)
+    follows[1:] = (
+        (vessel.to_numpy()[1:] == vessel.to_numpy()[:-1])
+        & (year[1:] == year[:-1] + 1)
+        & deficit[:-1]
+    )
+    return vessel.groupby((~follows).cumsum()).cumcount().to_numpy()
+
+
+@profiled
+def fueleu_balances(df, date_from=None, date_to=None, vessel_col=None):
+    """
+    One row per vessel and reporting year: in-scope energy, WtT / TtW
+    emissions, GHG intensity, target, compliance balance and penalty.
+    The penalty multiplier counts the vessel's consecutive deficit
+    years before each year, as far as the period covers them.
+    """
+    rows = scoped_energy(df, vessel_col)
+
+    ts = rows["DateTimeInUTC"]
+    mask = ts.notna()
+    if date_from is not None:
+        mask &= ts >= pd.Timestamp(date_from).normalize()
+    if date_to is not None:
+        mask &= ts < pd.Timestamp(date_to).normalize() + pd.Timedelta(days=1)
+    rows = rows[mask]
+
+    grouped = (
+        rows.groupby(["Vessel", "Year"], sort=True)[list(TENSOR_AXES)]
+        .sum()
+        .reset_index()
+    )
+
+    years = grouped["Year"].to_numpy(dtype=int)
+    inputs = (grouped["Energy (MJ)"], grouped["WtT (gCO2e)"], grouped["TtW (gCO2e)"], years)
+    intensity, target, balance, penalty = compliance_balance(*inputs)
+
+    streak = consecutive_deficits(grouped["Vessel"], years, (balance < 0) & (years >= FUELEU_START_YEAR))
+    if streak.any():
+        penalty = compliance_balance(*inputs, consecutive_deficits=streak)[3]
+
+    grouped["GHG Intensity (gCO2e/MJ)"] = intensity
+    grouped["Target (gCO2e/MJ)"] = target
+    grouped["Compliance Balance (tCO2e)"] = balance
+    grouped["Penalty (EUR)"] = penalty
+    grouped["Status"] = np.select(
+        [grouped["Year"].to_numpy(dtype=int) < FUELEU_START_YEAR, balance >= 0],
+        ["Indicative", "Surplus"],
+        default="Deficit",
+    )
+    return grouped
@@ -0,0 +1,216 @@
+import hashlib
+import io
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+# --------------------------------------------------
+# CACHE LOCATION & SIZE LIMIT
+# --------------------------------------------------
+CACHE_DIR = Path(
+    os.environ.get(
+        "EMISSIONS_CACHE_DIR",
+        Path.home() / ".cache" / "emissions_apps" / "ingest"
+    )
+)
+
+MAX_CACHE_BYTES = int(os.environ.get("EMISSIONS_CACHE_MAX_MB", 512)) * 1024 * 1024
+
+# Bump when the cached frame layout changes (v2: canonical frames)
+CACHE_FORMAT = 2
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_pyarrow = None
+
+
+def _arrow():
+    """
+    (pyarrow, pyarrow.parquet), imported on first use so importing
+    the loader stays cheap. None without pyarrow: the cache is
+    disabled and loads fall through to the parser.
+    """
+    global _pyarrow
+    if _pyarrow is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+            _pyarrow = (pyarrow, pyarrow.parquet)
+        except ImportError:
+            _pyarrow = False
+    return _pyarrow or None
+
+
+# --------------------------------------------------
+# KEYING
+# --------------------------------------------------
+def read_upload_bytes(file) -> bytes:
+    """
+    Returns the raw bytes of a Streamlit upload, file object or path.
+    """
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+
+    if hasattr(file, "read"):
+        pos = file.tell()
+        data = file.read()
+        file.seek(pos)
+        return data
+
+    return Path(file).read_bytes()
+
+
+def content_key(data: bytes, sheet: str, columns=None) -> str:
+    """
+    SHA-256 of the uploaded bytes plus the sheet name
+    (and the column projection, when one is given).
+    """
+    h = hashlib.sha256(data)
+    h.update(f"\0v{CACHE_FORMAT}\0".encode("ascii"))
+    h.update(str(sheet).encode("utf-8"))
+    if columns is not None:
+        h.update(b"\0")
+        h.update("\x1f".join(sorted(set(columns))).encode("utf-8"))
+    return h.hexdigest()
+
+
+# --------------------------------------------------
+# PARQUET I/O
+# --------------------------------------------------
+def _to_arrow_table(df: pd.DataFrame):
+    """
+    Converts a parsed sheet to an Arrow table.
+    Object columns Arrow cannot type (mixed str / number / date)
+    are stored as strings.
+    """
+    pa, _ = _arrow()
+    df = df.copy()
+    df.columns = [str(c) for c in df.columns]
+
+    for col in df.columns[df.dtypes == object]:
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _write(df: pd.DataFrame, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    _, pq = _arrow()
+    pq.write_table(_to_arrow_table(df), tmp)
+    os.replace(tmp, path)
+
+
+def _read(path: Path) -> pd.DataFrame:
+    _, pq = _arrow()
+    return pq.read_table(path, memory_map=True).to_pandas()
+
+
+# --------------------------------------------------
+# LRU EVICTION (by file mtime, touched on every hit)
+# --------------------------------------------------
+def _evict(keep: Path):
+    entries = []
+    for p in CACHE_DIR.glob("*.parquet"):
+        try:
+            info = p.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((info.st_mtime, info.st_size, p))
+
+    total = sum(size for _, size, _ in entries)
+
+    for _, size, p in sorted(entries, key=lambda e: e[0]):
+        if total <= MAX_CACHE_BYTES:
+            break
+        if p == keep:
+            continue
+        try:
+            p.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
+        _stats["evictions"] += 1
+
+
+# --------------------------------------------------
+# PUBLIC API
+# --------------------------------------------------
+def cached_sheet(file, sheet, loader, columns=None):
+    """
+    Returns the sheet as a DataFrame, parsing it with
+    loader(file_like, sheet) only on a cache miss.
+    """
+    data = read_upload_bytes(file)
+
+    arrow = _arrow()
+    if arrow is None:
+        with _lock:
+            _stats["misses"] += 1
+        return loader(io.BytesIO(data), sheet)
+    pa = arrow[0]
+
+    path = CACHE_DIR / f"{content_key(data, sheet, columns)}.parquet"
+
+    # The lock covers the lookup and the LRU touch; reads and writes run
+    # outside it (writes land via os.replace, so readers never see a
+    # partial file). An entry evicted in between is just a miss.
+    with _lock:
+        try:
+            os.utime(path)
+            hit = True
+        except FileNotFoundError:
+            hit = False
+
+    if hit:
+        try:
+            df = _read(path)
+            with _lock:
+                _stats["hits"] += 1
+            return df
+        except FileNotFoundError:
+            pass
+        except (OSError, pa.ArrowException):
+            path.unlink(missing_ok=True)
+
+    with _lock:
+        _stats["misses"] += 1
+
+    df = loader(io.BytesIO(data), sheet)
+
+    try:
+        _write(df, path)
+        with _lock:
+            _evict(keep=path)
+    except (OSError, pa.ArrowException):
+        pass
+
+    return df
+
+
+def cache_stats() -> dict:
+    """
+    Hit / miss / eviction counters plus current on-disk usage.
+    """
+    files = list(CACHE_DIR.glob("*.parquet")) if CACHE_DIR.exists() else []
+    with _lock:
+        stats = dict(_stats)
+    stats["entries"] = len(files)
+    stats["bytes"] = sum(p.stat().st_size for p in files if p.exists())
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    return stats
+
+
+def clear_cache():
+    if CACHE_DIR.exists():
+        for p in CACHE_DIR.glob("*.parquet"):
+            p.unlink(missing_ok=True)
+    with _lock:
+        for k in _stats:
+            _stats[k] = 0
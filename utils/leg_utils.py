@@ -1,60 +1,166 @@
+import numpy as np
 import pandas as pd
-from utils.unlocode_utils import resolve_port_name
+from utils.canonical import ensure_canonical
+from utils.profiling import profiled
+from utils.unlocode_utils import resolve_port_names
 
+# Columns read by assign_legs / summarize_voyages
+LEG_COLUMNS = [
+    "DateTimeInUTC", "EventType", "VoyageNumber",
+    "VoyageFrom", "VoyageTo", "Distance", "*Consumption*",
+]
 
-# --------------------------------------------------
-# STEP 1: ASSIGN LEG IDs
-# --------------------------------------------------
-def assign_legs(df):
 
-    df = df.copy()
-    df["DateTimeInUTC"] = pd.to_datetime(df["DateTimeInUTC"], errors="coerce")
-    df = df.sort_values("DateTimeInUTC")
+# Vessel key columns, first match wins (fleet exports)
+VESSEL_KEYS = ("IMO", "IMONumber", "VesselIMO", "VesselName")
+
 
-    leg_id = 0
-    active_leg = False
-    leg_ids = []
+def find_vessel_key(df):
+    return next((c for c in VESSEL_KEYS if c in df.columns), None)
 
-    for _, row in df.iterrows():
-        event = str(row.get("EventType", "")).lower()
 
-        if "departure" in event:
-            leg_id += 1
-            active_leg = True
+def event_flags(df):
+    """
+    (is_departure, is_arrival) boolean arrays from EventType.
+    Substring tests run once per distinct EventType.
+    """
+    if "EventType" not in df.columns:
+        none = np.zeros(len(df), dtype=bool)
+        return none, none
 
-        leg_ids.append(f"LEG-{leg_id}" if active_leg else None)
+    codes, events = pd.factorize(df["EventType"])
+    events = pd.Index(events).astype(str).str.lower()
+    is_dep = np.append(events.str.contains("departure", regex=False), False)[codes]
+    is_arr = np.append(events.str.contains("arrival", regex=False), False)[codes]
+    return is_dep, is_arr
 
-        if "arrival" in event and active_leg:
-            active_leg = False
 
-    df["Leg_ID"] = leg_ids
+# --------------------------------------------------
+# STEP 1: ASSIGN LEG IDs
+# --------------------------------------------------
+@profiled
+def assign_legs(df, vessel_col=None):
+    """
+    Adds Leg_ID ("LEG-n", None outside a leg).
+
+    A departure opens leg n (n = running departure count) and the
+    first arrival after it closes the leg, inclusive of the arrival
+    report. Evaluated column-wise with cumulative sums; legs are
+    numbered per vessel when a vessel key is present.
+    """
+    df = ensure_canonical(df)
+
+    vessel_col = vessel_col or find_vessel_key(df)
+    if vessel_col:
+        df = df.sort_values([vessel_col, "DateTimeInUTC"], kind="stable")
+    else:
+        df = df.sort_values("DateTimeInUTC")
+
+    is_dep, is_arr = event_flags(df)
+
+    dep = pd.Series(is_dep.astype(np.int64), index=df.index)
+    # Arrivals strictly before each row
+    arr_before = pd.Series(is_arr.astype(np.int64), index=df.index)
+
+    if vessel_col:
+        keys = df[vessel_col]
+        leg_no = dep.groupby(keys, sort=False, dropna=False).cumsum()
+        arr_before = (
+            arr_before.groupby(keys, sort=False, dropna=False).cumsum() - arr_before
+        )
+        group = [keys, leg_no]
+    else:
+        leg_no = dep.cumsum()
+        arr_before = arr_before.cumsum() - arr_before
+        group = leg_no
+
+    # Active while no arrival has been seen since the opening departure
+    arr_at_open = arr_before.groupby(group, sort=False, dropna=False).transform("first")
+    active = (leg_no > 0) & (arr_before == arr_at_open)
+
+    leg_no = leg_no.to_numpy()
+    names = np.array([f"LEG-{i}" for i in range(leg_no.max(initial=0) + 1)], dtype=object)
+    df["Leg_ID"] = np.where(active.to_numpy(), names[leg_no], None)
     return df
 
 
 # --------------------------------------------------
 # STEP 2: LEG SUMMARY
 # --------------------------------------------------
+@profiled
 def summarize_voyages(df):
+    """
+    One row per VoyageNumber, computed in a single named-aggregation
+    pass over the time-sorted frame.
+    """
+    df = ensure_canonical(df)
+
+    if "VoyageNumber" not in df.columns or df["VoyageNumber"].notna().sum() == 0:
+        return pd.DataFrame()
+
+    df = df.sort_values("DateTimeInUTC", kind="stable")
+    fuel = df.filter(like="Consumption").to_numpy(dtype=float, na_value=0.0).sum(axis=1)
+    work = df.assign(_fuel=fuel)
+
+    aggs = {
+        "Total_Legs": ("Leg_ID", "nunique"),
+        "Start": ("DateTimeInUTC", "min"),
+        "End": ("DateTimeInUTC", "max"),
+        "Total_Distance_NM": ("Distance", "sum"),
+        "Total_Fuel_MT": ("_fuel", "sum"),
+        "Total_Records": ("DateTimeInUTC", "size"),
+    }
+    summary = work.groupby("VoyageNumber", dropna=True).agg(**aggs).reset_index()
+
+    # Port of the voyage's first / last row, blank or not ("first" / "last" skip NaN)
+    for col, source, keep in (("From", "VoyageFrom", "first"), ("To", "VoyageTo", "last")):
+        if source in work.columns:
+            ends = work.drop_duplicates("VoyageNumber", keep=keep).set_index("VoyageNumber")[source]
+            summary[col] = summary["VoyageNumber"].map(ends)
+    summary = summary.reindex(columns=[
+        "VoyageNumber", "Total_Legs", "From", "To", "Start", "End",
+        "Total_Distance_NM", "Total_Fuel_MT", "Total_Records",
+    ], fill_value="")
+
+    # Resolve From / To once per distinct code: "Name (CODE)"
+    for col in ("From", "To"):
+        codes = summary[col]
+        summary[col] = (
+            resolve_port_names(codes).astype(str) + " (" + codes.map(str) + ")"
+        )
+
+    return summary
 
-    summaries = []
 
-    for voyage_no, vdf in df.groupby("VoyageNumber", dropna=True):
-
-        vdf = vdf.sort_values("DateTimeInUTC")
-
-        from_code = vdf["VoyageFrom"].iloc[0] if "VoyageFrom" in vdf.columns else ""
-        to_code = vdf["VoyageTo"].iloc[-1] if "VoyageTo" in vdf.columns else ""
-
-        summaries.append({
-            "VoyageNumber": voyage_no,
-            "Total_Legs": vdf["Leg_ID"].nunique(),
-            "From": f"{resolve_port_name(from_code)} ({from_code})",
-            "To": f"{resolve_port_name(to_code)} ({to_code})",
-            "Start": vdf["DateTimeInUTC"].min(),
-            "End": vdf["DateTimeInUTC"].max(),
-            "Total_Distance_NM": vdf["Distance"].fillna(0).sum(),
-            "Total_Fuel_MT": vdf.filter(like="Consumption").fillna(0).sum().sum(),
-            "Total_Records": len(vdf)
-        })
-
-    return pd.DataFrame(summaries)
+# --------------------------------------------------
+# STEP 3: VOYAGE -> ROW SLICE INDEX
+# --------------------------------------------------
+@profiled
+def voyage_row_index(df):
+    """
+    Returns (frame, {VoyageNumber: slice}) with each voyage's rows
+    contiguous in time order, so detail tables are frame.iloc[slice].
+    Voyages follow in order of first report; the labels are never
+    compared, so exports mixing numeric and text voyage numbers work.
+    """
+    if "VoyageNumber" not in df.columns:
+        return df, {}
+
+    df = df.sort_values("DateTimeInUTC", kind="stable")
+    codes, uniques = pd.factorize(df["VoyageNumber"])
+    codes = np.where(codes < 0, len(uniques), codes)                       # missing last
+    df = df.iloc[np.argsort(codes, kind="stable")]
+
+    voyages = df["VoyageNumber"].to_numpy()
+    valid = pd.notna(voyages)
+    if not valid.any():
+        return df, {}
+
+    keys = voyages[valid]
+    change = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    stops = np.concatenate((change, [len(keys)]))
+
+    return df, {
+        keys[a]: slice(int(a), int(b)) for a, b in zip(starts, stops)
+    }
@@ -0,0 +1,306 @@
+"""
+Monthly emission report engine.
+
+Noon reports are folded into one materialised bucket per calendar month
+(by DateUTC): reports, distance, CO2, fuel per consumer x fuel column,
+fuel per type and hours at sea / port / drifting. Every bucket column is
+a sum, so buckets can be rebuilt or extended independently:
+
+- MonthlyStore.refresh(df) takes an export (full or partial) and
+  recomputes only the months in it whose rows changed (per-month
+  content fingerprint); other stored months are kept;
+- MonthlyStore.append(df) takes new reports only and adds them into
+  the months they touch.
+
+The report (running AER, rating) is derived from the buckets alone.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.canonical import CO2_COLUMN, ensure_canonical
+from utils.cii_utils import EVENT_CATEGORY, OPERATION_EVENTS, cii_ratings, required_aer
+from utils.fuel_registry import FUELS, parse_fuel_columns
+from utils.profiling import profiled
+
+# IMO columns a store is keyed by, in order of preference
+IMO_KEYS = ("IMO", "IMONumber", "VesselIMO")
+
+# Columns read by the monthly engine
+MONTHLY_COLUMNS = [
+    "DateUTC", "Distance", "EventType", "TimeSincePreviousReport", "*Consumption*",
+    *IMO_KEYS,
+]
+
+REPORT_DIR = Path(
+    os.environ.get(
+        "EMISSIONS_REPORT_DIR",
+        Path.home() / ".cache" / "emissions_apps" / "monthly"
+    )
+)
+
+HOUR_COLUMNS = [f"{cat} Hours" for cat in OPERATION_EVENTS] + ["Other Hours"]
+FUEL_TYPE_COLUMNS = [f"{fuel} (MT)" for fuel in FUELS]
+
+# Leading bucket columns; per consumer x fuel columns follow
+BASE_COLUMNS = [
+    "Reports", "Distance (NM)", "CO2 (MT)", "Total Fuel (MT)",
+    *FUEL_TYPE_COLUMNS, *HOUR_COLUMNS, "Missing Intervals",
+]
+
+_FINGERPRINT = "_fingerprint"
+_IMO = "_imo"
+
+
+# --------------------------------------------------
+# VESSEL IDENTITY
+# --------------------------------------------------
+def _imo_text(value):
+    """IMO as text: 9000001, 9000001.0 and "9000001" compare equal."""
+    text = str(value).strip()
+    return text[:-2] if text.endswith(".0") and text[:-2].isdigit() else text
+
+
+def vessel_imo(df) -> str:
+    """
+    The single IMO number the export belongs to. Raises ValueError when
+    the export has no IMO column / values or mixes several vessels.
+    """
+    key = next((c for c in IMO_KEYS if c in df.columns), None)
+    if key is None:
+        raise ValueError(f"No IMO column ({', '.join(IMO_KEYS)}) in the export")
+    imos = {_imo_text(v) for v in df[key].dropna().unique()} - {""}
+    if not imos:
+        raise ValueError(f"No IMO number in column {key}")
+    if len(imos) > 1:
+        raise ValueError(f"Export mixes {len(imos)} vessels (IMO {', '.join(sorted(imos))}); upload one vessel at a time")
+    return imos.pop()
+
+
+# --------------------------------------------------
+# BUCKETING
+# --------------------------------------------------
+def month_of(df) -> pd.Series:
+    """First day of each report's DateUTC month (NaT kept)."""
+    return df["DateUTC"].dt.to_period("M").dt.to_timestamp()
+
+
+def month_fingerprints(df, month=None) -> pd.Series:
+    """
+    Order-independent content hash per month: the wrapping uint64 sum
+    of the row hashes, so it is also additive across appends.
+    """
+    df = ensure_canonical(df)
+    month = month_of(df) if month is None else month
+    row_hash = pd.util.hash_pandas_object(df, index=False)
+    valid = month.notna()
+    return row_hash[valid].groupby(month[valid]).sum().astype(np.uint64)
+
+
+@profiled
+def aggregate_months(df, month=None) -> pd.DataFrame:
+    """One bucket row per month present in df, indexed by month start."""
+    df = ensure_canonical(df)
+    month = month_of(df) if month is None else month
+    valid = month.notna().to_numpy()
+    df, month = df[valid], month[valid]
+
+    fuel_cols = [col for col, _, _ in parse_fuel_columns(df.columns)]
+    fuel = df[fuel_cols].to_numpy(dtype=float, na_value=0.0)
+
+    parts = {
+        "Reports": np.ones(len(df)),
+        "Distance (NM)": df["Distance"].to_numpy(dtype=float) if "Distance" in df.columns else np.zeros(len(df)),
+        "CO2 (MT)": df[CO2_COLUMN].to_numpy(dtype=float),
+        "Total Fuel (MT)": fuel.sum(axis=1),
+    }
+    for fuel_type in FUELS:
+        idx = [i for i, (_, _, f) in enumerate(parse_fuel_columns(fuel_cols)) if f == fuel_type]
+        parts[f"{fuel_type} (MT)"] = fuel[:, idx].sum(axis=1)
+
+    # Hours per operating category, EventType mapped once per distinct value
+    if "TimeSincePreviousReport" in df.columns:
+        hours = df["TimeSincePreviousReport"].to_numpy(dtype=float)
+    else:
+        hours = np.full(len(df), np.nan)
+
+    if "EventType" in df.columns:
+        codes, events = pd.factorize(df["EventType"])
+        labels = pd.Index(events).astype(str).str.strip().map(EVENT_CATEGORY)
+        labels = np.append(np.asarray(labels, dtype=object), None)
+        category = labels[codes]
+    else:
+        category = np.full(len(df), None, dtype=object)
+
+    known = np.zeros(len(df), dtype=bool)
+    filled = np.nan_to_num(hours)
+    for cat in OPERATION_EVENTS:
+        is_cat = category == cat
+        known |= is_cat
+        parts[f"{cat} Hours"] = np.where(is_cat, filled, 0.0)
+    parts["Other Hours"] = np.where(known, 0.0, filled)
+    parts["Missing Intervals"] = np.isnan(hours).astype(float)
+
+    for i, col in enumerate(fuel_cols):
+        parts[col] = fuel[:, i]
+
+    buckets = pd.DataFrame(parts, index=df.index).groupby(month.to_numpy()).sum()
+    buckets.index.name = "Month"
+    return buckets
+
+
+def _align(a, b):
+    """Union of bucket columns, consumer x fuel columns zero-filled."""
+    cols = list(dict.fromkeys([*BASE_COLUMNS, *a.columns, *b.columns]))
+    return a.reindex(columns=cols, fill_value=0.0), b.reindex(columns=cols, fill_value=0.0)
+
+
+# --------------------------------------------------
+# MATERIALISED STORE
+# --------------------------------------------------
+class MonthlyStore:
+    """
+    Per-vessel month buckets plus a content fingerprint per month.
+    The store belongs to one IMO (set by the first export that fills
+    it); exports of another vessel are refused.
+    """
+
+    def __init__(self, buckets=None, fingerprints=None, imo=None):
+        self.buckets = buckets if buckets is not None else pd.DataFrame(columns=BASE_COLUMNS, dtype=float)
+        self.fingerprints = (
+            fingerprints if fingerprints is not None
+            else pd.Series(dtype=np.uint64)
+        )
+        self.imo = imo
+
+    def _claim(self, df):
+        """Checks df is this store's vessel (when it has an IMO column) and records it."""
+        if not any(c in df.columns for c in IMO_KEYS):
+            return
+        imo = vessel_imo(df)
+        if self.imo is not None and imo != self.imo:
+            raise ValueError(f"Export is IMO {imo}, but this store holds IMO {self.imo}")
+        self.imo = imo
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def refresh(self, df):
+        """
+        Syncs the store with an export: months in df whose fingerprint
+        changed are recomputed, stored months df does not cover are
+        kept, so uploading only the latest month preserves the history.
+        Returns the recomputed months.
+        """
+        df = ensure_canonical(df)
+        self._claim(df)
+        month = month_of(df)
+        fps = month_fingerprints(df, month)
+
+        present = fps.index.isin(self.fingerprints.index)
+        old = self.fingerprints.reindex(fps.index, fill_value=0).astype(np.uint64)
+        changed = fps.index[~present | (old.to_numpy() != fps.to_numpy())]
+        if not len(changed):
+            return []
+
+        fresh = aggregate_months(df[month.isin(changed).to_numpy()], month[month.isin(changed)])
+        kept, fresh = _align(self.buckets[~self.buckets.index.isin(changed)], fresh)
+        self.buckets = pd.concat([kept, fresh]).sort_index().rename_axis("Month")
+
+        merged = self.fingerprints.reindex(self.fingerprints.index.union(fps.index), fill_value=0)
+        merged = merged.astype(np.uint64)
+        merged.loc[changed] = fps.loc[changed].to_numpy()
+        self.fingerprints = merged
+        return list(changed)
+
+    def append(self, df):
+        """
+        Adds new reports only: their buckets are summed into the months
+        they fall in. Returns the months touched.
+        """
+        df = ensure_canonical(df)
+        self._claim(df)
+        month = month_of(df)
+        new = aggregate_months(df, month)
+        if new.empty:
+            return []
+
+        current, new = _align(self.buckets, new)
+        self.buckets = current.add(new, fill_value=0.0).sort_index().rename_axis("Month")
+
+        fps = month_fingerprints(df, month)
+        merged = self.fingerprints.reindex(self.fingerprints.index.union(fps.index), fill_value=0)
+        merged = merged.astype(np.uint64)
+        merged.loc[fps.index] = merged.loc[fps.index].to_numpy() + fps.to_numpy()
+        self.fingerprints = merged
+        return list(new.index)
+
+    # ---------------- persistence ----------------
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        out = self.buckets.copy()
+        out.index.name = "Month"
+        out[_FINGERPRINT] = self.fingerprints.reindex(out.index, fill_value=0).astype(np.uint64)
+        out[_IMO] = self.imo
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        out.reset_index().to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        df = pd.read_parquet(path).set_index("Month")
+        fps = df.pop(_FINGERPRINT).astype(np.uint64)
+        imo = df.pop(_IMO).dropna().unique() if _IMO in df.columns else []
+        return cls(df, fps, _imo_text(imo[0]) if len(imo) else None)
+
+
+def store_path(imo) -> Path:
+    """On-disk store of one vessel, keyed by its IMO number (see vessel_imo)."""
+    safe_name = "".join(c for c in _imo_text(imo) if c.isalnum())
+    if not safe_name:
+        raise ValueError(f"Invalid IMO number {imo!r}")
+    return REPORT_DIR / f"IMO{safe_name}.parquet"
+
+
+# --------------------------------------------------
+# REPORT
+# --------------------------------------------------
+@profiled
+def monthly_report(buckets, ship_type, dwt):
+    """
+    Month rows with year-to-date totals, running attained AER,
+    required AER and rating. Cost depends on months, not reports.
+    """
+    if buckets.empty:
+        return pd.DataFrame(columns=["Month", *BASE_COLUMNS])
+
+    b = buckets.sort_index()
+    b.index.name = "Month"
+    year = b.index.year
+
+    ytd_co2 = b["CO2 (MT)"].groupby(year).cumsum().to_numpy()
+    ytd_dist = b["Distance (NM)"].groupby(year).cumsum().to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        attained = np.where(ytd_dist > 0, ytd_co2 / (dwt * ytd_dist) * 1_000_000, np.nan)
+        monthly = np.where(
+            b["Distance (NM)"] > 0,
+            b["CO2 (MT)"] / (dwt * b["Distance (NM)"]) * 1_000_000,
+            np.nan,
+        )
+
+    required_by_year = {y: required_aer(ship_type, dwt, y) for y in np.unique(year)}
+    required = np.array([required_by_year[y] for y in year])
+
+    report = b.reset_index()
+    report.insert(1, "Year", year)
+    report["Monthly AER"] = monthly
+    report["CO2 YTD (MT)"] = ytd_co2
+    report["Distance YTD (NM)"] = ytd_dist
+    report["Running AER"] = attained
+    report["Required AER"] = required
+    report["Running Rating"] = cii_ratings(attained, required)
+    return report
@@ -1,17 +1,25 @@
 import pandas as pd
 
-def classify_operation_by_events_in_range(df, date_from, date_to):
+from utils.profiling import profiled
+from utils.range_index import build_range_index
 
-    df = df.copy()
-    df["DateUTC"] = pd.to_datetime(df["DateUTC"], errors="coerce")
+# Columns read by classify_operation_by_events_in_range
+OPERATIONS_COLUMNS = ["DateUTC", "TimeElapsed*", "*Consumption*"]
 
-    date_from = pd.to_datetime(date_from)
-    date_to = pd.to_datetime(date_to)
 
-    df = df[(df["DateUTC"] >= date_from) & (df["DateUTC"] <= date_to)]
+@profiled
+def classify_operation_by_events_in_range(df, date_from, date_to, index=None):
+    """
+    Hours and consumption from the TimeElapsed* / consumer columns
+    over the DateUTC range, read off a shared TimeRangeIndex.
+    """
+    if index is None:
+        index = build_range_index(df)
+
+    lo, hi = index.span(pd.to_datetime(date_from), pd.to_datetime(date_to))
 
     def s(col):
-        return df[col].fillna(0).sum() if col in df.columns else 0.0
+        return index.total(col, lo, hi)
 
     ops = {
         "Sea Hours": s("TimeElapsedSailing"),
@@ -0,0 +1,247 @@
+"""
+UN/LOCODE port master, stored as an indexed SQLite file and opened
+lazily on the first lookup.
+
+Build it from the UNECE code list CSVs (CodeListPart1..3.csv):
+    python -m utils.port_master build CodeListPart*.csv
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+DB_PATH = Path(
+    os.environ.get(
+        "EMISSIONS_PORT_MASTER",
+        Path(__file__).resolve().parent.parent / "assets" / "port_master.sqlite"
+    )
+)
+
+# EU member states + EEA (Iceland, Liechtenstein, Norway), ISO 3166 alpha-2
+EU_EEA_COUNTRIES = frozenset({
+    "AT", "BE", "BG", "HR", "CY", "CZ", "DK", "EE", "FI", "FR", "DE", "GR",
+    "HU", "IE", "IT", "LV", "LT", "LU", "MT", "NL", "PL", "PT", "RO", "SK",
+    "SI", "ES", "SE",
+    "IS", "LI", "NO",
+})
+
+FIELDS = ("code", "name", "country", "subdivision", "function", "eu_eea", "lat", "lon")
+
+_SCHEMA = """
+CREATE TABLE ports (
+    code        TEXT PRIMARY KEY,
+    name        TEXT NOT NULL,
+    name_upper  TEXT NOT NULL,
+    country     TEXT NOT NULL,
+    subdivision TEXT,
+    function    TEXT,
+    eu_eea      INTEGER NOT NULL,
+    lat         REAL,
+    lon         REAL
+) WITHOUT ROWID;
+CREATE INDEX ports_name ON ports (name_upper);
+"""
+
+_lock = threading.Lock()
+_conn = None
+
+
+# --------------------------------------------------
+# LAZY CONNECTION
+# --------------------------------------------------
+def _connection():
+    """
+    Opens the database on first use; None while it has not been built
+    (re-checked on each call, so a database built later is picked up).
+    """
+    global _conn
+    if _conn is not None:
+        return _conn
+
+    with _lock:
+        if _conn is None and DB_PATH.exists():
+            _conn = sqlite3.connect(
+                f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False
+            )
+    return _conn
+
+
+def _query(sql, params=()):
+    conn = _connection()
+    if conn is None:
+        return []
+    with _lock:
+        rows = conn.execute(sql, params).fetchall()
+    return [dict(zip(FIELDS, r)) for r in rows]
+
+
+def is_available() -> bool:
+    return _connection() is not None
+
+
+# --------------------------------------------------
+# LOOKUPS
+# --------------------------------------------------
+_SELECT = f"SELECT {', '.join(FIELDS)} FROM ports"
+
+
+def normalize_code(code) -> str:
+    return str(code).strip().upper().replace(" ", "")
+
+
+def lookup(code):
+    """Port record for one UN/LOCODE (primary-key B-tree), or None."""
+    rows = _query(f"{_SELECT} WHERE code = ?", (normalize_code(code),))
+    return rows[0] if rows else None
+
+
+def lookup_many(codes) -> dict:
+    """{code: record} for the codes found, in batched IN queries."""
+    codes = sorted({normalize_code(c) for c in codes})
+    found = {}
+    for i in range(0, len(codes), 500):
+        chunk = codes[i:i + 500]
+        marks = ", ".join("?" * len(chunk))
+        for r in _query(f"{_SELECT} WHERE code IN ({marks})", chunk):
+            found[r["code"]] = r
+    return found
+
+
+def search(text, limit=20):
+    """
+    Autocomplete: ports whose code or name starts with text.
+    Both are index range scans.
+    """
+    prefix = str(text).strip().upper()
+    if not prefix:
+        return []
+
+    upper = prefix + "\uffff"
+    code_hits = _query(
+        f"{_SELECT} WHERE code >= ? AND code < ? ORDER BY code LIMIT ?",
+        (prefix.replace(" ", ""), upper.replace(" ", ""), limit),
+    )
+    name_hits = _query(
+        f"{_SELECT} WHERE name_upper >= ? AND name_upper < ? ORDER BY name_upper LIMIT ?",
+        (prefix, upper, limit),
+    )
+
+    seen, out = set(), []
+    for r in code_hits + name_hits:
+        if r["code"] not in seen:
+            seen.add(r["code"])
+            out.append(r)
+    return out[:limit]
+
+
+def is_eu_eea(code) -> bool:
+    """EU/EEA flag from the port master, else from the country prefix."""
+    rec = lookup(code) if is_available() else None
+    if rec is not None:
+        return bool(rec["eu_eea"])
+    return normalize_code(code)[:2] in EU_EEA_COUNTRIES
+
+
+# --------------------------------------------------
+# BUILD (from UNECE UN/LOCODE CSV)
+# --------------------------------------------------
+def parse_coordinates(text):
+    """'5155N 00430E' -> (51.9167, 4.5)."""
+    try:
+        lat_s, lon_s = str(text).split()
+        lat = int(lat_s[:2]) + int(lat_s[2:4]) / 60
+        lon = int(lon_s[:3]) + int(lon_s[3:5]) / 60
+        if lat_s[-1] == "S":
+            lat = -lat
+        if lon_s[-1] == "W":
+            lon = -lon
+        return round(lat, 4), round(lon, 4)
+    except (ValueError, IndexError):
+        return None, None
+
+
+def read_unlocode_csv(paths, ports_only=True):
+    """
+    Yields port records from the official code list CSVs
+    (Change, Country, Location, Name, NameWoDiacritics, Subdivision,
+    Status, Function, Date, IATA, Coordinates, Remarks).
+    """
+    for path in paths:
+        with open(path, newline="", encoding="latin-1") as f:
+            for row in csv.reader(f):
+                if len(row) < 11 or not row[2].strip():
+                    continue                                  # country header rows
+                if row[0].strip() == "X":
+                    continue                                  # marked for deletion
+
+                function = row[7].strip()
+                if ports_only and not function.startswith("1"):
+                    continue
+
+                country = row[1].strip().upper()
+                lat, lon = parse_coordinates(row[10])
+                name = (row[4] or row[3]).strip()
+
+                yield {
+                    "code": country + row[2].strip().upper(),
+                    "name": name,
+                    "country": country,
+                    "subdivision": row[5].strip() or None,
+                    "function": function,
+                    "eu_eea": int(country in EU_EEA_COUNTRIES),
+                    "lat": lat,
+                    "lon": lon,
+                }
+
+
+def build_port_master(paths, out_path=DB_PATH, ports_only=True):
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(_SCHEMA)
+        conn.executemany(
+            "INSERT OR REPLACE INTO ports VALUES "
+            "(:code, :name, :name_upper, :country, :subdivision, :function, :eu_eea, :lat, :lon)",
+            ({**r, "name_upper": r["name"].upper()} for r in read_unlocode_csv(paths, ports_only)),
+        )
+        conn.commit()
+        count = conn.execute("SELECT COUNT(*) FROM ports").fetchone()[0]
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp, out_path)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="UN/LOCODE port master")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="build the SQLite port master from UN/LOCODE CSVs")
+    b.add_argument("csv", nargs="+")
+    b.add_argument("-o", "--output", default=str(DB_PATH))
+    b.add_argument("--all-functions", action="store_true",
+                   help="keep non-port locations too")
+
+    s = sub.add_parser("search", help="prefix search by code or name")
+    s.add_argument("text")
+
+    args = parser.parse_args(argv)
+
+    if args.cmd == "build":
+        n = build_port_master(args.csv, args.output, ports_only=not args.all_functions)
+        print(f"{n:,} locations -> {args.output}")
+    else:
+        for r in search(args.text):
+            print(f"{r['code']}  {r['name']}  ({r['country']}{', EU/EEA' if r['eu_eea'] else ''})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Hot-path timing instrumentation.
+
+utils functions are wrapped with @profiled and page stages with
+`with stage(...)`. Both record a span (wall time, rows processed and,
+optionally, the peak traced-memory delta) into the Recorder active in
+the current context. With no active recorder a wrapped call costs one
+ContextVar lookup, so instrumentation stays in place in production.
+
+    recorder = Recorder(memory=True)
+    with recording(recorder):
+        calculate_cii(...)
+    recorder.to_chrome_trace()      # chrome://tracing / Perfetto
+
+Pages switch it on from the sidebar (begin_page / show_panel); the
+EMISSIONS_PROFILE=1 environment variable makes that the default.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+PROFILE_DEFAULT = os.environ.get("EMISSIONS_PROFILE", "") not in ("", "0")
+
+_active = ContextVar("emissions_profiler", default=None)
+
+
+# --------------------------------------------------
+# MEMORY TRACING (process-wide, shared by recorders)
+# --------------------------------------------------
+# tracemalloc is global: recorders share it through a reference count,
+# and open memory spans of every recorder are registered so the peak
+# counter is only reset with one recorder tracing, after folding the
+# peak into each open span.
+_memory_lock = threading.Lock()
+_memory_users = 0
+_memory_started = False
+_open_frames = {}                            # id(frame) -> frame
+
+
+def _tracing_acquire():
+    global _memory_users, _memory_started
+    with _memory_lock:
+        if _memory_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _memory_started = True
+        _memory_users += 1
+
+
+def _tracing_release():
+    global _memory_users, _memory_started
+    with _memory_lock:
+        _memory_users -= 1
+        if _memory_users == 0 and _memory_started:
+            tracemalloc.stop()
+            _memory_started = False
+
+
+def _observe(frame, current, peak):
+    """Folds the traced peak since frame["base"] into frame["peak"]."""
+    # A peak not above the base may predate the frame; current is what is known
+    frame["peak"] = max(frame["peak"], peak if peak > frame["base"] else current)
+
+
+def _frame_open():
+    with _memory_lock:
+        current, peak = tracemalloc.get_traced_memory()
+        frame = {"start_mem": current, "peak": current, "base": peak}
+        if _memory_users == 1:
+            for other in _open_frames.values():
+                _observe(other, current, peak)
+                other["base"] = current
+            tracemalloc.reset_peak()
+            frame["base"] = current
+        _open_frames[id(frame)] = frame
+        return frame
+
+
+def _frame_close(frame):
+    """Peak traced memory above the frame's start."""
+    with _memory_lock:
+        _observe(frame, *tracemalloc.get_traced_memory())
+        _open_frames.pop(id(frame), None)
+        return frame["peak"] - frame["start_mem"]
+
+
+# --------------------------------------------------
+# RECORDER
+# --------------------------------------------------
+class Recorder:
+    """
+    Collects spans for one run. Spans nest per thread; with memory=True
+    tracemalloc runs until close() (shared with other recorders) and
+    each span records the peak allocation above its starting point
+    (children included). Tracing is process-wide, so allocations of
+    concurrent sessions count too.
+    """
+
+    def __init__(self, memory=False, label=""):
+        self.label = label
+        self.memory = memory
+        self.spans = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._tracing = False
+        if memory:
+            _tracing_acquire()
+            self._tracing = True
+
+    def close(self):
+        if self._tracing:
+            self._tracing = False
+            _tracing_release()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name, kind="function", rows=None):
+        stack = self._stack()
+        tracing = self._tracing and tracemalloc.is_tracing()
+        frame = _frame_open() if tracing else {}
+
+        stack.append(frame)
+        t0 = time.perf_counter()
+        try:
+            yield frame
+        finally:
+            t1 = time.perf_counter()
+            stack.pop()
+            mem_delta = _frame_close(frame) if tracing else None
+
+            self.spans.append({
+                "name": name,
+                "kind": kind,
+                "start_s": t0 - self.origin,
+                "wall_s": t1 - t0,
+                "rows": frame.get("rows", rows),
+                "mem_delta_bytes": mem_delta,
+                "depth": len(stack),
+                "thread": threading.get_ident(),
+            })
+
+    def merge(self, other):
+        """Appends other's spans (e.g. a background job's), shifted onto this clock."""
+        shift = other.origin - self.origin
+        self.spans.extend({**s, "start_s": s["start_s"] + shift} for s in other.spans)
+
+    # --------------------------------------------------
+    # REPORTS / EXPORT
+    # --------------------------------------------------
+    def summary(self):
+        """Per-name calls, total / max wall time, rows and peak memory delta, slowest first."""
+        out = {}
+        for s in self.spans:
+            agg = out.setdefault(s["name"], {
+                "name": s["name"], "kind": s["kind"], "calls": 0,
+                "total_s": 0.0, "max_s": 0.0, "rows": 0, "peak_mem_bytes": None,
+            })
+            agg["calls"] += 1
+            agg["total_s"] += s["wall_s"]
+            agg["max_s"] = max(agg["max_s"], s["wall_s"])
+            agg["rows"] += s["rows"] or 0
+            if s["mem_delta_bytes"] is not None:
+                agg["peak_mem_bytes"] = max(agg["peak_mem_bytes"] or 0, s["mem_delta_bytes"])
+        return sorted(out.values(), key=lambda a: -a["total_s"])
+
+    def to_json(self):
+        return json.dumps({"label": self.label, "memory": self.memory, "spans": self.spans}, indent=2)
+
+    def to_chrome_trace(self):
+        """Trace Event Format: one complete ("X") event per span, in microseconds."""
+        events = [
+            {
+                "name": s["name"],
+                "cat": s["kind"],
+                "ph": "X",
+                "ts": round(s["start_s"] * 1e6, 3),
+                "dur": round(s["wall_s"] * 1e6, 3),
+                "pid": os.getpid(),
+                "tid": s["thread"],
+                "args": {"rows": s["rows"], "mem_delta_bytes": s["mem_delta_bytes"]},
+            }
+            for s in self.spans
+        ]
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms",
+                           "otherData": {"label": self.label}})
+
+
+def current():
+    return _active.get()
+
+
+@contextmanager
+def recording(recorder):
+    """Makes recorder the active one for the enclosed block (this context only)."""
+    token = _active.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _active.reset(token)
+
+
+# --------------------------------------------------
+# INSTRUMENTATION POINTS
+# --------------------------------------------------
+def _rows_of(obj):
+    """Row count of a frame / series / array argument, else None."""
+    shape = getattr(obj, "shape", None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+def profiled(fn=None, *, name=None):
+    """Decorator recording a span per call; rows = length of the first array-like argument."""
+    if fn is None:
+        return functools.partial(profiled, name=name)
+
+    label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        recorder = _active.get()
+        if recorder is None:
+            return fn(*args, **kwargs)
+
+        rows = next((r for r in map(_rows_of, (*args, *kwargs.values())) if r is not None), None)
+        with recorder.span(label, "function", rows):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def stage(name, rows=None):
+    """
+    Page-stage span. Set frame["rows"] on the yielded dict when the row
+    count is only known at the end.
+    """
+    recorder = _active.get()
+    if recorder is None:
+        yield {}
+        return
+    with recorder.span(name, "stage", rows) as frame:
+        yield frame
+
+
+# --------------------------------------------------
+# STREAMLIT PANEL (streamlit imported on use)
+# --------------------------------------------------
+def begin_page(page):
+    """
+    Reads the sidebar profiling toggles and, when on, activates a fresh
+    Recorder for this script run. Returns it (None when off).
+    """
+    import streamlit as st
+
+    _active.set(None)
+    previous = st.session_state.pop("_profiling_recorder", None)
+    if previous is not None:
+        previous.close()
+
+    with st.sidebar.expander("🛠 Profiling"):
+        enabled = st.checkbox("Record timings", value=PROFILE_DEFAULT, key="profiling_enabled")
+        memory = st.checkbox("Track peak memory (slower)", value=False, key="profiling_memory")
+    if not enabled:
+        return None
+
+    recorder = Recorder(memory=memory, label=page)
+    st.session_state["_profiling_recorder"] = recorder
+    _active.set(recorder)
+    return recorder
+
+
+def show_panel(recorder):
+    """Sidebar table of the run's spans plus JSON / Chrome-trace downloads."""
+    if recorder is None:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    _active.set(None)
+    recorder.close()
+
+    with st.sidebar.expander(f"⏱ Timings – {recorder.label}", expanded=True):
+        summary = pd.DataFrame(recorder.summary())
+        if summary.empty:
+            st.caption("No instrumented calls in this run.")
+            return
+        summary["total ms"] = (summary.pop("total_s") * 1000).round(1)
+        summary["max ms"] = (summary.pop("max_s") * 1000).round(1)
+        peak = summary.pop("peak_mem_bytes")
+        if recorder.memory:
+            summary["peak MB"] = (peak.astype(float) / 1e6).round(2)
+        st.dataframe(summary, hide_index=True, use_container_width=True)
+
+        st.download_button("⬇️ JSON", recorder.to_json(), file_name="profile.json", mime="application/json")
+        st.download_button(
+            "⬇️ Chrome trace", recorder.to_chrome_trace(),
+            file_name="profile.trace.json", mime="application/json"
+        )
@@ -0,0 +1,107 @@
+from fnmatch import fnmatchcase
+
+import numpy as np
+import pandas as pd
+
+from utils.canonical import CO2_COLUMN, ensure_canonical
+from utils.profiling import profiled
+
+# Numeric columns carried as prefix sums
+PREFIX_SUM_COLUMNS = [
+    "Distance", "TimeSincePreviousReport", "TimeElapsed*", "*Consumption*",
+    CO2_COLUMN,
+]
+
+_DAY = np.timedelta64(1, "D")
+
+
+class TimeRangeIndex:
+    """
+    Date-sorted view of a noon-report frame with cumulative sums.
+
+    Built once per upload; every date-range total is then two binary
+    searches plus one row difference of the prefix-sum matrix, and the
+    filtered frame is a positional slice.
+    """
+
+    def __init__(self, df, time_col="DateUTC", columns=PREFIX_SUM_COLUMNS):
+        df = ensure_canonical(df)
+        ts = df[time_col]
+        order = np.argsort(ts.to_numpy(), kind="stable")
+        valid = order[~ts.isna().to_numpy()[order]]
+
+        self.time_col = time_col
+        self.frame = df.iloc[valid].reset_index(drop=True)
+        self.times = self.frame[time_col].to_numpy(dtype="datetime64[ns]")
+
+        self.columns = [
+            c for c in self.frame.columns
+            if any(fnmatchcase(str(c), p) for p in columns)
+        ]
+        self._pos = {c: i for i, c in enumerate(self.columns)}
+
+        # canonical columns are already numeric with NaN filled
+        values = np.zeros((len(self.frame) + 1, len(self.columns)))
+        for i, c in enumerate(self.columns):
+            values[1:, i] = self.frame[c].to_numpy(dtype=float, na_value=0.0)
+        self._cum = np.cumsum(values, axis=0)
+
+        years = self.times.astype("datetime64[Y]")
+        self._years, self._year_start = np.unique(years, return_index=True)
+
+    def __len__(self):
+        return len(self.frame)
+
+    # --------------------------------------------------
+    # RANGE LOOKUP
+    # --------------------------------------------------
+    def span(self, start, end, whole_days=False):
+        """
+        Row positions [lo, hi) with start <= time <= end.
+        whole_days extends end to the last instant of its day.
+        """
+        start = np.datetime64(pd.Timestamp(start).to_datetime64(), "ns")
+        end = np.datetime64(pd.Timestamp(end).to_datetime64(), "ns")
+
+        if whole_days:
+            end = end.astype("datetime64[D]") + _DAY
+            hi = np.searchsorted(self.times, end, side="left")
+        else:
+            hi = np.searchsorted(self.times, end, side="right")
+
+        lo = np.searchsorted(self.times, start, side="left")
+        return int(lo), int(max(lo, hi))
+
+    def rows(self, lo, hi):
+        return self.frame.iloc[lo:hi]
+
+    # --------------------------------------------------
+    # TOTALS
+    # --------------------------------------------------
+    def total(self, col, lo, hi):
+        """Sum of col over [lo, hi); 0.0 when the column is absent."""
+        i = self._pos.get(col)
+        if i is None:
+            return 0.0
+        return float(self._cum[hi, i] - self._cum[lo, i])
+
+    def totals(self, lo, hi, like=None):
+        """{column: sum} over [lo, hi), optionally only columns containing like."""
+        diff = self._cum[hi] - self._cum[lo]
+        return {
+            c: float(diff[i]) for c, i in self._pos.items()
+            if like is None or like in c
+        }
+
+    def modal_year(self, lo, hi):
+        """Most frequent calendar year in [lo, hi) (smallest on ties)."""
+        if hi <= lo:
+            return None
+        ends = np.append(self._year_start[1:], len(self.times))
+        counts = np.clip(ends, lo, hi) - np.clip(self._year_start, lo, hi)
+        return int(self._years[np.argmax(counts)].astype(int) + 1970)
+
+
+@profiled
+def build_range_index(df, time_col="DateUTC"):
+    return TimeRangeIndex(df, time_col=time_col)
@@ -0,0 +1,138 @@
+"""
+Process-wide memo of calculation results, shared by all sessions.
+
+Entries are keyed by (calculation, upload content hash, inputs), so two
+analysts looking at the same file and period share one computation.
+The cache is bounded by an estimate of the results' memory and evicts
+least recently used entries. Cached results are shared objects: callers
+must not mutate them.
+"""
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.ingest_cache import read_upload_bytes
+
+MAX_RESULT_BYTES = int(os.environ.get("EMISSIONS_RESULT_CACHE_MB", 256)) * 1024 * 1024
+
+_lock = threading.Lock()
+_entries = OrderedDict()                     # key -> (result, nbytes)
+_inflight = {}                               # key -> Event, one computation per key
+_size = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+# --------------------------------------------------
+# KEYING
+# --------------------------------------------------
+def upload_digest(file) -> str:
+    """SHA-256 of the uploaded bytes."""
+    return hashlib.sha256(read_upload_bytes(file)).hexdigest()
+
+
+def _normalize(part):
+    """Key parts compare by value: 50000 == 50000.0, numpy scalars as Python."""
+    if isinstance(part, np.generic):
+        part = part.item()
+    if isinstance(part, float) and part.is_integer():
+        return int(part)
+    if isinstance(part, (list, tuple)):
+        return tuple(_normalize(p) for p in part)
+    return part
+
+
+def result_key(kind, digest, *inputs):
+    return (kind, digest) + tuple(_normalize(p) for p in inputs)
+
+
+# --------------------------------------------------
+# SIZE ESTIMATE
+# --------------------------------------------------
+def estimate_bytes(obj) -> int:
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimate_bytes(k) + estimate_bytes(v) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(estimate_bytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+# --------------------------------------------------
+# CACHE
+# --------------------------------------------------
+def _store(key, result):
+    global _size
+    nbytes = estimate_bytes(result)
+    if nbytes > MAX_RESULT_BYTES:
+        return
+
+    _entries[key] = (result, nbytes)
+    _size += nbytes
+    while _size > MAX_RESULT_BYTES:
+        _, (_, dropped) = _entries.popitem(last=False)
+        _size -= dropped
+        _stats["evictions"] += 1
+
+
+def cached_result(key, compute, *args, **kwargs):
+    """
+    compute(*args, **kwargs) memoised under key. Concurrent callers
+    with the same key wait for the first computation instead of
+    repeating it.
+    """
+    while True:
+        with _lock:
+            hit = _entries.get(key)
+            if hit is not None:
+                _entries.move_to_end(key)
+                _stats["hits"] += 1
+                return hit[0]
+
+            pending = _inflight.get(key)
+            if pending is None:
+                _inflight[key] = threading.Event()
+                _stats["misses"] += 1
+                break
+
+        # Another session is computing this key; a failed computation
+        # leaves no entry and the loop computes it here instead
+        pending.wait()
+
+    try:
+        result = compute(*args, **kwargs)
+        with _lock:
+            _store(key, result)
+        return result
+    finally:
+        with _lock:
+            _inflight.pop(key).set()
+
+
+def result_cache_stats():
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "entries": len(_entries),
+            "bytes": _size,
+            "hit_rate": round(_stats["hits"] / total, 3) if total else 0.0,
+        }
+
+
+def clear_results():
+    global _size
+    with _lock:
+        _entries.clear()
+        _size = 0
@@ -1,16 +1,16 @@
 import pandas as pd
 
+from utils.fuel_registry import CO2_FACTORS, co2_from_totals
+from utils.profiling import profiled
+from utils.range_index import build_range_index
+
 # --------------------------------------------------
 # EMISSION FACTORS (kg CO2 / tonne fuel)
 # --------------------------------------------------
-EMISSION_FACTORS = {
-    "HFO": 3114,
-    "MGO": 3206,
-    "MDO": 3206,
-    "LFO": 3151,
-    "LNG": 2750,
-    "Methanol": 1375
-}
+EMISSION_FACTORS = {fuel: round(cf * 1000, 6) for fuel, cf in CO2_FACTORS.items()}
+
+# Columns read by calculate_scc_intensity
+SCC_COLUMNS = ["DateUTC", "Distance", "*Consumption*"]
 
 # --------------------------------------------------
 # SCC TRAJECTORY (Indicative – aligned with Sea Cargo Charter)
@@ -37,33 +37,27 @@ def interpolate_target(year):
 # --------------------------------------------------
 # SCC + EEOI CALCULATION
 # --------------------------------------------------
-def calculate_scc_intensity(df, ship_type, date_from, date_to, cargo_mt):
-
-    df["DateUTC"] = pd.to_datetime(df["DateUTC"], errors="coerce")
-    filtered = df[(df["DateUTC"] >= pd.to_datetime(date_from)) &
-                  (df["DateUTC"] <= pd.to_datetime(date_to))]
+@profiled
+def calculate_scc_intensity(df, ship_type, date_from, date_to, cargo_mt, index=None):
+    """
+    SCC intensity and EEOI for the DateUTC range.
+    Shares the TimeRangeIndex used by calculate_cii when one is passed.
+    """
+    if index is None:
+        index = build_range_index(df)
+
+    lo, hi = index.span(pd.to_datetime(date_from), pd.to_datetime(date_to))
+    filtered = index.rows(lo, hi)
 
     if filtered.empty:
         return filtered, {}
 
     # ---------------- Distance ----------------
-    distance_nm = filtered["Distance"].fillna(0).sum()
-
-    # ---------------- Fuel ----------------
-    fuel_map = {
-        "HFO": filtered.filter(like="ConsumptionHFO").sum().sum(),
-        "MGO": filtered.filter(like="ConsumptionMGO").sum().sum(),
-        "MDO": filtered.filter(like="ConsumptionMDO").sum().sum(),
-        "LFO": filtered.filter(like="ConsumptionLFO").sum().sum(),
-        "LNG": filtered.filter(like="ConsumptionLNG").sum().sum(),
-        "Methanol": filtered.filter(like="ConsumptionMethanol").sum().sum(),
-    }
+    distance_nm = index.total("Distance", lo, hi)
 
     # ---------------- CO2 ----------------
-    total_co2_kg = sum(
-        fuel * EMISSION_FACTORS.get(fuel_type, 0)
-        for fuel_type, fuel in fuel_map.items()
-    )
+    fuel = index.totals(lo, hi, like="Consumption")
+    total_co2_kg = co2_from_totals(fuel, EMISSION_FACTORS)
 
     # ---------------- SCC ----------------
     transport_work = cargo_mt * distance_nm
@@ -73,7 +67,7 @@ def calculate_scc_intensity(df, ship_type, date_from, date_to, cargo_mt):
     eeoi = (total_co2_kg / transport_work) if transport_work > 0 else 0
 
     # ---------------- ALIGNMENT ----------------
-    year = filtered["DateUTC"].dt.year.mode()[0]
+    year = index.modal_year(lo, hi)
     target = interpolate_target(year)
     alignment = "ALIGNED ✅" if scc_intensity <= target else "MISALIGNED ❌"
 
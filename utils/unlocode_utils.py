@@ -1,7 +1,12 @@
+import numpy as np
 import pandas as pd
 
+from utils import port_master
+from utils.profiling import profiled
+
 # --------------------------------------------------
 # UN/LOCODE → PORT NAME MAP
+# Local names, checked before the on-disk port master
 # --------------------------------------------------
 UNLOCODE_MAP = {
     "IDBLW": "Mumbai",
@@ -27,22 +32,79 @@ def resolve_port_name(unlo_code: str) -> str:
         return ""
 
     code = str(unlo_code).strip().upper()
-    return UNLOCODE_MAP.get(code, code)
+    if code in UNLOCODE_MAP:
+        return UNLOCODE_MAP[code]
+
+    rec = port_master.lookup(code)
+    return rec["name"] if rec else code
+
+# --------------------------------------------------
+# BATCH RESOLVER (distinct codes only)
+# --------------------------------------------------
+def resolve_port_names(codes) -> pd.Series:
+    """
+    Vectorised resolve_port_name.
+    Each distinct raw code is normalised and resolved once and the
+    names are broadcast back by code; the result is categorical.
+    """
+    codes = pd.Series(codes)
+    idx, uniques = pd.factorize(codes)
+
+    normalized = [str(u).strip().upper() for u in uniques]
+    master = port_master.lookup_many(c for c in normalized if c not in UNLOCODE_MAP)
+
+    names = [
+        UNLOCODE_MAP.get(c) or (master.get(port_master.normalize_code(c)) or {}).get("name") or c
+        for c in normalized
+    ] + [""]   # "" for missing (-1)
+    categories, name_idx = np.unique(np.array(names, dtype=object), return_inverse=True)
+
+    return pd.Series(
+        pd.Categorical.from_codes(name_idx[idx], categories=categories),
+        index=codes.index,
+        name=codes.name,
+    )
+
+
+# --------------------------------------------------
+# BATCH EU / EEA FLAG (distinct codes only)
+# --------------------------------------------------
+def eu_eea_flags(codes) -> np.ndarray:
+    """
+    Vectorised port_master.is_eu_eea: True for ports in an EU / EEA
+    state. One lookup per distinct code; missing codes are False.
+    """
+    codes = pd.Series(codes)
+    idx, uniques = pd.factorize(codes)
+
+    normalized = [port_master.normalize_code(u) for u in uniques]
+    master = port_master.lookup_many(normalized) if port_master.is_available() else {}
+
+    flags = np.array([
+        bool(master[c]["eu_eea"]) if c in master
+        else c[:2] in port_master.EU_EEA_COUNTRIES
+        for c in normalized
+    ] + [False], dtype=bool)   # False for missing (-1)
+
+    return flags[idx]
+
 
 # --------------------------------------------------
 # DATAFRAME MAPPER (STEP 2)
 # --------------------------------------------------
+@profiled
 def map_ports(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Adds VoyageFromName and VoyageToName columns
+    Adds categorical VoyageFromName and VoyageToName columns
     """
 
-    df = df.copy()
+    names = {}
 
     if "VoyageFrom" in df.columns:
-        df["VoyageFromName"] = df["VoyageFrom"].apply(resolve_port_name)
+        names["VoyageFromName"] = resolve_port_names(df["VoyageFrom"])
 
     if "VoyageTo" in df.columns:
-        df["VoyageToName"] = df["VoyageTo"].apply(resolve_port_name)
+        names["VoyageToName"] = resolve_port_names(df["VoyageTo"])
 
-    return df
+    # assign() derives a new frame without copying the input's columns
+    return df.assign(**names)
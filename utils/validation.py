@@ -0,0 +1,218 @@
+"""
+Noon-report data quality.
+
+Every rule is a boolean mask over the canonical frame, evaluated in
+one pass (vessel / time order is computed once and shared). Rules
+whose columns are absent are skipped. The per-row result is a bit
+code, so the issue table stores one integer per flagged row and the
+"Issues" text is built once per distinct combination.
+
+    error    row is wrong on its face; pages can exclude it
+    warning  row is suspicious; pages flag it
+"""
+import numpy as np
+import pandas as pd
+
+from utils.canonical import ensure_canonical
+from utils.cii_utils import EVENT_CATEGORY
+from utils.fuel_registry import fuel_columns
+from utils.leg_utils import find_vessel_key, VESSEL_KEYS
+from utils.profiling import profiled
+
+# Columns read by validate_reports
+VALIDATION_COLUMNS = [
+    "DateTimeInUTC", "EventType", "TimeSincePreviousReport",
+    "Distance", "*Consumption*", *VESSEL_KEYS,
+]
+
+# TimeSincePreviousReport may differ from the timestamp delta by
+# max(INTERVAL_TOLERANCE_H, INTERVAL_TOLERANCE_PCT of the delta)
+INTERVAL_TOLERANCE_H = 1.0
+INTERVAL_TOLERANCE_PCT = 0.10
+
+MAX_SPEED_KN = 30.0
+MAX_DISTANCE_NM = 800.0
+
+# Fuel per hour above SPIKE_FACTOR x the vessel's median rate
+# (and at least SPIKE_MIN_FUEL_MT in the report) is a spike
+SPIKE_FACTOR = 8.0
+SPIKE_MIN_FUEL_MT = 1.0
+
+# rule -> (severity, description); order fixes the bit of each rule
+RULES = {
+    "missing_timestamp": ("error", "DateTimeInUTC missing or unparseable"),
+    "duplicate_timestamp": ("error", "Same DateTimeInUTC as an earlier report of the vessel"),
+    "negative_distance": ("error", "Distance below zero"),
+    "absurd_distance": ("error", f"Distance above {MAX_DISTANCE_NM:.0f} NM or implied speed above {MAX_SPEED_KN:.0f} kn"),
+    "negative_fuel": ("error", "Consumption below zero"),
+    "interval_mismatch": ("warning", "TimeSincePreviousReport disagrees with the DateTimeInUTC delta"),
+    "missing_interval": ("warning", "TimeSincePreviousReport missing"),
+    "fuel_spike": ("warning", f"Fuel rate above {SPIKE_FACTOR:g}x the vessel median"),
+    "unknown_event": ("warning", "EventType not mapped to Sea / Port / Drifting"),
+}
+
+ERROR_RULES = [rule for rule, (severity, _) in RULES.items() if severity == "error"]
+
+ISSUE_COLUMNS = ["Row", "Vessel", "DateTimeInUTC", "EventType", "Severity", "Issues", "Code"]
+
+
+# --------------------------------------------------
+# RULE MASKS
+# --------------------------------------------------
+def _time_order(df, vessel):
+    """Positions in vessel / time order, or None when already in that order."""
+    ts = df["DateTimeInUTC"].to_numpy(dtype="datetime64[ns]").view("int64")
+    codes = pd.factorize(vessel)[0] if vessel is not None else np.zeros(len(df), dtype=int)
+    if len(df) < 2 or ((np.diff(codes) > 0) | ((np.diff(codes) == 0) & (np.diff(ts) >= 0))).all():
+        return None, ts, codes
+    order = np.lexsort((ts, codes))
+    return order, ts, codes
+
+
+def _masks(df, vessel):
+    """rule -> boolean mask (row order of df) for every applicable rule."""
+    n = len(df)
+    masks = {}
+    columns = df.columns
+
+    if "Distance" in columns:
+        distance = df["Distance"].to_numpy(dtype=float, na_value=0.0)
+        masks["negative_distance"] = distance < 0
+
+    fuel_cols = fuel_columns(df)
+    if fuel_cols:
+        consumption = df[fuel_cols].to_numpy(dtype=float, na_value=0.0)
+        masks["negative_fuel"] = (consumption < 0).any(axis=1)
+        fuel = consumption.sum(axis=1)
+
+    if "EventType" in columns:
+        codes, events = pd.factorize(df["EventType"])
+        known = pd.Index(events).astype(str).str.strip().isin(list(EVENT_CATEGORY))
+        known = np.append(np.asarray(known, dtype=bool), False)            # missing event (-1)
+        masks["unknown_event"] = ~known[codes]
+
+    hours = None
+    if "TimeSincePreviousReport" in columns:
+        hours = df["TimeSincePreviousReport"].to_numpy(dtype=float, na_value=np.nan)
+        masks["missing_interval"] = np.isnan(hours)
+
+    if "DateTimeInUTC" in columns:
+        order, ts, codes = _time_order(df, vessel)
+        missing = df["DateTimeInUTC"].isna().to_numpy()
+        masks["missing_timestamp"] = missing
+
+        # Deltas in vessel / time order, scattered back to row order
+        pos = np.arange(n) if order is None else order
+        ts_s, codes_s, missing_s = ts[pos], codes[pos], missing[pos]
+        same = np.zeros(n, dtype=bool)
+        same[1:] = (codes_s[1:] == codes_s[:-1]) & ~missing_s[1:] & ~missing_s[:-1]
+        delta_h = np.full(n, np.nan)
+        delta_h[1:] = np.where(same[1:], (ts_s[1:] - ts_s[:-1]) / 3.6e12, np.nan)
+
+        duplicate = np.zeros(n, dtype=bool)
+        duplicate[pos] = same & (delta_h == 0)
+        masks["duplicate_timestamp"] = duplicate
+
+        delta = np.empty(n)
+        delta[pos] = delta_h
+        if hours is not None:
+            with np.errstate(invalid="ignore"):
+                tolerance = np.maximum(INTERVAL_TOLERANCE_H, INTERVAL_TOLERANCE_PCT * delta)
+                masks["interval_mismatch"] = ~np.isnan(delta) & ~duplicate & (np.abs(hours - delta) > tolerance)
+    else:
+        delta = np.full(n, np.nan)
+
+    # Report duration: TimeSincePreviousReport, else the timestamp delta
+    duration = delta if hours is None else np.where(np.isnan(hours), delta, hours)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if "Distance" in columns:
+            speed = np.where(duration > 0, distance / duration, np.nan)
+            masks["absurd_distance"] = (distance > MAX_DISTANCE_NM) | (speed > MAX_SPEED_KN)
+
+        if fuel_cols:
+            rate = np.where((duration > 0) & (fuel > 0), fuel / duration, np.nan)
+            groups = vessel if vessel is not None else np.zeros(n, dtype=int)
+            median = pd.Series(rate).groupby(np.asarray(groups), sort=False).transform("median").to_numpy()
+            masks["fuel_spike"] = (rate > SPIKE_FACTOR * median) & (fuel >= SPIKE_MIN_FUEL_MT)
+
+    return masks
+
+
+# --------------------------------------------------
+# VALIDATION
+# --------------------------------------------------
+def describe_codes(codes):
+    """Comma-separated rule names per bit code, built once per distinct code."""
+    codes = np.asarray(codes)
+    unique, inverse = np.unique(codes, return_inverse=True)
+    text = np.array([
+        ", ".join(rule for bit, rule in enumerate(RULES) if code >> bit & 1)
+        for code in unique
+    ], dtype=object)
+    return text[inverse]
+
+
+@profiled
+def validate_reports(df, vessel_col=None):
+    """
+    Runs every applicable rule over the canonical frame.
+
+    Returns (issues, summary): one row per flagged report (Row is the
+    frame's index label, Code the rule bits) and one row per rule with
+    severity, description and the number of rows it flags.
+    """
+    df = ensure_canonical(df)
+    vessel_col = vessel_col or find_vessel_key(df)
+    vessel = df[vessel_col] if vessel_col else None
+
+    masks = _masks(df, vessel)
+
+    code = np.zeros(len(df), dtype=np.int64)
+    for bit, rule in enumerate(RULES):
+        if rule in masks:
+            code |= masks[rule].astype(np.int64) << bit
+
+    error_bits = sum(1 << bit for bit, rule in enumerate(RULES) if rule in ERROR_RULES)
+    flagged = np.flatnonzero(code)
+    flagged_code = code[flagged]
+
+    def column(name):
+        if name not in df.columns:
+            return np.full(len(flagged), None, dtype=object)
+        return df[name].take(flagged).to_numpy()
+
+    issues = pd.DataFrame({
+        "Row": df.index.take(flagged),
+        "Vessel": column(vessel_col) if vessel_col else np.full(len(flagged), "", dtype=object),
+        "DateTimeInUTC": column("DateTimeInUTC"),
+        "EventType": column("EventType"),
+        "Severity": np.where(flagged_code & error_bits, "error", "warning"),
+        "Issues": describe_codes(flagged_code),
+        "Code": flagged_code,
+    }, columns=ISSUE_COLUMNS)
+
+    summary = pd.DataFrame(
+        [
+            (rule, severity, description, rule in masks, int(masks[rule].sum()) if rule in masks else 0)
+            for rule, (severity, description) in RULES.items()
+        ],
+        columns=["Rule", "Severity", "Description", "Checked", "Rows"],
+    )
+    return issues, summary
+
+
+def rule_mask(issues, rules=ERROR_RULES):
+    """Issue rows hitting any of rules."""
+    bits = sum(1 << bit for bit, rule in enumerate(RULES) if rule in rules)
+    return (issues["Code"].to_numpy() & bits) != 0
+
+
+def exclude_rows(df, issues, rules=ERROR_RULES):
+    """df without the reports flagged by rules; the canonical flag is kept."""
+    drop = issues["Row"].to_numpy()[rule_mask(issues, rules)]
+    if not len(drop):
+        return df
+    out = df[~df.index.isin(drop)]
+    out.attrs["canonical"] = df.attrs.get("canonical", False)
+    return out